@@ -0,0 +1,67 @@
+"""
+Run the same tests on the in-process EVM and on an external node and compare their wall time.
+
+Each backend runs `ape test` once with BACKEND_TIMING set (see `BackendTimer` in tests/conftest.py),
+which records the wall time of every test call and of every transaction it sends. The report shows
+both per test, with the per-transaction time, and the speedup of the in-process backend. Tests marked
+`node` only run on the node and show up in its column only.
+
+Run: `python benchmarks/bench_backends.py [tests ...] [--in-process ethereum:local:test] [--node ethereum:local:foundry]`
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+
+
+def run(tests, network, path):
+    start = time.perf_counter()
+    subprocess.run(
+        ["ape", "test", *tests, "--network", network, "-q"],
+        cwd=ROOT, env={**os.environ, "BACKEND_TIMING": path}, check=False,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    elapsed = time.perf_counter() - start
+    with open(path, "r") as file:
+        return elapsed, json.load(file)["tests"]
+
+
+def per_transaction(result):
+    return result["transaction_seconds"] / result["transactions"] * 1e3 if result["transactions"] else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("tests", nargs="*", default=["tests/test_market.py"])
+    parser.add_argument("--in-process", default="ethereum:local:test")
+    parser.add_argument("--node", default=os.getenv("APE_NETWORK", "ethereum:local:foundry"))
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        results = {}
+        for backend, network in (("in-process", args.in_process), ("node", args.node)):
+            results[backend] = run(args.tests, network, os.path.join(workdir, f"{backend}.json"))
+
+    (fast_total, fast), (node_total, node) = results["in-process"], results["node"]
+    print(f"{'test':<64} {'in-process':>11} {'node':>8} {'ms/tx':>13} {'speedup':>8}")
+    for nodeid in sorted(set(fast) | set(node)):
+        a, b = fast.get(nodeid), node.get(nodeid)
+        seconds_a = f"{a['seconds']:.3f}" if a else "-"
+        seconds_b = f"{b['seconds']:.3f}" if b else "-"
+        transaction = f"{per_transaction(a) if a else 0:.2f}/{per_transaction(b) if b else 0:.2f}"
+        speedup = f"{b['seconds'] / a['seconds']:.1f}x" if a and b and a["seconds"] else "-"
+        print(f"{nodeid:<64} {seconds_a:>11} {seconds_b:>8} {transaction:>13} {speedup:>8}")
+    shared = set(fast) & set(node)
+    test_a = sum(fast[nodeid]["seconds"] for nodeid in shared)
+    test_b = sum(node[nodeid]["seconds"] for nodeid in shared)
+    print(f"tests run on both: {test_a:.2f}s in-process, {test_b:.2f}s node ({test_b / test_a:.1f}x)" if test_a else "no test ran on both backends")
+    print(f"whole run (startup, compile, sandbox deployment): {fast_total:.2f}s in-process, {node_total:.2f}s node")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Benchmark finding the `MarketInitialized` event of a receipt with many logs.
+
+Builds a synthetic receipt of `logs` token logs (`Transfer` and `RoleGranted`, like the outcome
+token deployments of `initialize_market`) with one `MarketInitialized` log at the end, then
+compares decoding every log through the ABI, as `receipt.decode_logs()` does, with the topic0
+filtered typed decoder of `scripts.events`.
+
+Run: `python benchmarks/bench_decode.py [logs] [rounds]`
+"""
+import os
+import sys
+import time
+from eth_abi import encode
+from eth_utils import keccak
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts.events import EventDecoder, find_market_event
+
+MARKET_INITIALIZED = ("bytes32", "string", "string", "string", "address", "address", "uint256", "uint256")
+ABI = [
+    {
+        "type": "event",
+        "name": "MarketInitialized",
+        "anonymous": False,
+        "inputs": [
+            {"name": name, "type": arg_type, "indexed": False}
+            for name, arg_type in zip(
+                ("market_id", "outcome1", "outcome2", "description", "outcome1_token", "outcome2_token", "reward", "required_bond"),
+                MARKET_INITIALIZED,
+            )
+        ],
+    },
+    {
+        "type": "event",
+        "name": "Transfer",
+        "anonymous": False,
+        "inputs": [
+            {"name": "owner", "type": "address", "indexed": True},
+            {"name": "to", "type": "address", "indexed": True},
+            {"name": "amount", "type": "uint256", "indexed": False},
+        ],
+    },
+    {
+        "type": "event",
+        "name": "RoleGranted",
+        "anonymous": False,
+        "inputs": [
+            {"name": "role", "type": "bytes32", "indexed": True},
+            {"name": "account", "type": "address", "indexed": True},
+            {"name": "sender", "type": "address", "indexed": True},
+        ],
+    },
+]
+
+
+def generate(count):
+    transfer, role_granted = keccak(text="Transfer(address,address,uint256)"), keccak(text="RoleGranted(bytes32,address,address)")
+    logs = []
+    for index in range(count):
+        account = bytes(12) + index.to_bytes(20, "big")
+        if index % 2:
+            logs.append({"address": b"\x01" * 20, "topics": [transfer, bytes(32), account], "data": (10**18 + index).to_bytes(32, "big")})
+        else:
+            logs.append({"address": b"\x01" * 20, "topics": [role_granted, bytes(32), account, account], "data": b""})
+    values = [b"\x42" * 32, "yes", "no", "Arsenal Won the 2025 Premier League.", "0x" + "11" * 20, "0x" + "22" * 20, 10**18, 10**17]
+    logs.append({"address": b"\xaa" * 20, "topics": [keccak(text=f"MarketInitialized({','.join(MARKET_INITIALIZED)})")], "data": encode(MARKET_INITIALIZED, values)})
+    return logs
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    logs = generate(count)
+    full_decoder = EventDecoder(ABI, ("MarketInitialized", "Transfer", "RoleGranted"))
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        expected = next(args for name, args in full_decoder.decode_logs(logs) if name == "MarketInitialized")
+    full_seconds = time.perf_counter() - start
+    print(f"decode every log:  {full_seconds / rounds * 1e3:8.3f}ms per receipt ({len(logs)} logs)")
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        event = find_market_event(logs, "MarketInitialized", b"\xaa" * 20)
+    typed_seconds = time.perf_counter() - start
+    print(f"topic0 + typed:    {typed_seconds / rounds * 1e3:8.3f}ms per receipt ({full_seconds / typed_seconds:.1f}x faster)")
+
+    assert tuple(event) == tuple(expected.values())
+    print("results identical")
+
+
+if __name__ == "__main__":
+    main()
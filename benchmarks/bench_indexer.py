@@ -0,0 +1,49 @@
+"""
+Throughput benchmark for `MarketEventIndexer`.
+
+Indexes the deployed market from `start_block` into a fresh SQLite store and reports logs/sec
+for the full sync and for decoding alone. Fill the chain first with `gen_market_events.py`.
+
+Run: `python benchmarks/bench_indexer.py [start_block]`
+"""
+import os
+import sys
+import time
+import tempfile
+from ape import chain, networks
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts.indexer import EventStore, MarketEventIndexer
+from scripts.registry import DeploymentRegistry
+
+
+def main():
+    start_block = int(sys.argv[1]) if len(sys.argv) > 1 else 0
+
+    with networks.parse_network_choice(os.getenv("APE_NETWORK", "ethereum:local:foundry")):
+        web3 = chain.provider.web3
+        registry = DeploymentRegistry(namespace=os.getenv("DEPLOYMENTS_NAMESPACE"))
+
+        with tempfile.TemporaryDirectory() as workdir:
+            store = EventStore(os.path.join(workdir, "events.db"))
+            indexer = MarketEventIndexer(web3, registry.get("market_address"), store, start_block=start_block)
+            head = web3.eth.block_number
+
+            start = time.perf_counter()
+            indexed = indexer.sync(head)
+            sync_seconds = time.perf_counter() - start
+
+            logs = indexer._get_logs(start_block, head)
+            start = time.perf_counter()
+            for log in logs:
+                indexer.decoder.decode(log)
+            decode_seconds = time.perf_counter() - start
+            store.close()
+
+    print(f"blocks {start_block}..{head}, {indexed} logs")
+    print(f"  sync:   {sync_seconds:8.3f} s  {indexed / sync_seconds:10.0f} logs/s")
+    print(f"  decode: {decode_seconds:8.3f} s  {len(logs) / max(decode_seconds, 1e-9):10.0f} logs/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""
+Overhead of `scripts.metrics` per JSON-RPC request and per operation.
+
+Sends `requests` requests through a provider that answers from memory, so that the measured time
+is the provider's JSON encoding and decoding plus the instrumentation, without a node. A real
+request to a local node takes a few hundred microseconds, a mined transaction far more.
+
+Run: `python benchmarks/bench_metrics.py [requests]`
+"""
+import os
+import sys
+import json
+import time
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts.metrics import Metrics
+
+RECEIPT = {"transactionHash": "0x" + "01" * 32, "gasUsed": hex(50_000), "effectiveGasPrice": hex(10**9), "logs": []}
+
+
+class MemoryProvider(JSONBaseProvider):
+    def make_request(self, method, params):
+        request = json.loads(self.encode_rpc_request(method, params))
+        result = RECEIPT if method == "eth_getTransactionReceipt" else "0x1"
+        return self.decode_rpc_response(json.dumps({"jsonrpc": "2.0", "id": request["id"], "result": result}).encode())
+
+
+def run(provider, count):
+    start = time.perf_counter()
+    for index in range(count):
+        provider.make_request("eth_getTransactionReceipt" if index % 10 == 0 else "eth_call", [{"to": "0x" + "00" * 20}, "latest"])
+    return time.perf_counter() - start
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    run(MemoryProvider(), count // 10)  # warm up
+    plain = run(MemoryProvider(), count)
+    print(f"requests without metrics: {plain / count * 1e6:7.2f}us per request")
+
+    provider = MemoryProvider()
+    metrics = Metrics()
+    metrics.watch(Web3(provider))
+    watched = run(provider, count)
+    print(f"requests with metrics:    {watched / count * 1e6:7.2f}us per request (+{(watched - plain) / count * 1e6:.2f}us)")
+
+    start = time.perf_counter()
+    for _ in range(count):
+        with metrics.operation("noop", market_id="0x01"):
+            pass
+    print(f"empty operation:          {(time.perf_counter() - start) / count * 1e6:7.2f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""
+Micro-benchmark: `edit_value`/`get_value` versus `DeploymentRegistry`.
+
+Replays the access pattern of one sandbox + market deployment (every address written
+once and read back a few times) against a temporary copy of `deployments.json`.
+
+Run: `python benchmarks/bench_registry.py [rounds]`
+"""
+import os
+import sys
+import json
+import shutil
+import tempfile
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts import utils
+from scripts.registry import DeploymentRegistry
+
+READS_PER_KEY = 4
+
+
+def _sample():
+    with open(os.path.join(utils.base_dir, "deployments.json"), "r") as file:
+        return json.load(file)
+
+
+def bench_legacy(workdir, sample):
+    # `edit_value`/`get_value` resolve the file relative to `utils.base_dir`.
+    utils.base_dir = workdir
+    start = time.perf_counter()
+    for key, value in sample.items():
+        utils.edit_value(key, value)
+    for _ in range(READS_PER_KEY):
+        for key in sample:
+            utils.get_value(key)
+    return time.perf_counter() - start
+
+
+def bench_registry(workdir, sample):
+    start = time.perf_counter()
+    registry = DeploymentRegistry(os.path.join(workdir, "deployments.json"))
+    with registry.transaction():
+        for key, value in sample.items():
+            registry.set(key, value)
+        for _ in range(READS_PER_KEY):
+            for key in sample:
+                registry.get(key)
+    return time.perf_counter() - start
+
+
+def main():
+    rounds = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    original_base_dir = utils.base_dir
+    sample = _sample()
+    ops = len(sample) * (1 + READS_PER_KEY)
+
+    results = {}
+    workdir = tempfile.mkdtemp()
+    try:
+        for name, bench in (("edit_value/get_value", bench_legacy), ("DeploymentRegistry", bench_registry)):
+            total = 0.0
+            for _ in range(rounds):
+                shutil.copy(os.path.join(original_base_dir, "deployments.json"), workdir)
+                total += bench(workdir, sample)
+            results[name] = total / rounds
+    finally:
+        utils.base_dir = original_base_dir
+        shutil.rmtree(workdir)
+
+    print(f"{rounds} rounds, {ops} operations per round")
+    for name, seconds in results.items():
+        print(f"{name:>22}: {seconds * 1e3:8.3f} ms/round  {seconds / ops * 1e6:8.2f} us/op")
+    print(f"{'speedup':>22}: {results['edit_value/get_value'] / results['DeploymentRegistry']:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Compare one `ape run market` process per step with `scripts/lifecycle.py` running all steps in one process.
+
+Both modes run the same steps against the deployed sandbox and market from the README (each run
+initializes a fresh market). Reports the startup time of the runner (`--help` and a rejected step,
+which must not import ape) and the end-to-end time of both modes. Set
+`APE_ACCOUNTS_account<N>_PASSPHRASE` for the three accounts so that no passphrase prompt is timed.
+
+Run: `python benchmarks/bench_runner.py [--network ethereum:local:foundry]`
+"""
+import os
+import sys
+import time
+import argparse
+import subprocess
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../"))
+sys.path.append(ROOT)
+from scripts.lifecycle import LIFECYCLE
+
+
+def timed(command, env=None, check=True):
+    start = time.perf_counter()
+    subprocess.run(
+        command, cwd=ROOT, env={**os.environ, **(env or {})}, check=check,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--network", default=os.getenv("APE_NETWORK", "ethereum:local:foundry"))
+    args = parser.parse_args()
+    runner = [sys.executable, "-m", "scripts.lifecycle"]
+
+    print(f"lifecycle --help:      {timed(runner + ['--help']):6.2f}s")
+    print(f"lifecycle bad step:    {timed(runner + ['init', 'bogus'], check=False):6.2f}s")
+
+    per_step = []
+    for step in LIFECYCLE:
+        seconds = timed(["ape", "run", "market", "--network", args.network], env={"APE_METHOD": step})
+        per_step.append(seconds)
+        print(f"  ape run market {step:<18} {seconds:6.2f}s")
+    print(f"ape run per step:      {sum(per_step):6.2f}s ({len(per_step)} processes)")
+
+    single = timed(runner + ["--network", args.network] + LIFECYCLE)
+    print(f"lifecycle one process: {single:6.2f}s ({sum(per_step) / single:.1f}x faster)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmark column scans of a snapshot (`scripts/snapshot.py`) against loading every column.
+
+Writes a snapshot of `positions` synthetic positions over `markets` markets, then counts the
+positions of every market from the memory-mapped `market_index` column alone, and again after
+reading all position columns into memory. The counts are compared for equality. Only the scanned
+column is read from disk; the balances (most of the snapshot) are never touched.
+
+Run: `python benchmarks/bench_snapshot.py [positions] [markets] [directory]`
+"""
+import os
+import sys
+import time
+import tempfile
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts.payouts import LIMBS
+from scripts.snapshot import TABLES, Snapshot, write_snapshot
+
+
+def generate(positions, markets, seed=1):
+    rng = np.random.default_rng(seed)
+    accounts = max(positions // 10, 1)
+    balances = np.zeros((positions, LIMBS), dtype=np.uint64)
+    balances[:, -3:] = rng.integers(0, 2**32, size=(positions, 3), dtype=np.uint64)
+    return {
+        "markets": {
+            "market_id": rng.integers(0, 256, size=(markets, 32), dtype=np.uint8),
+            "outcome1_token": rng.integers(0, 256, size=(markets, 20), dtype=np.uint8),
+            "outcome2_token": rng.integers(0, 256, size=(markets, 20), dtype=np.uint8),
+            "reward": np.zeros((markets, LIMBS), dtype=np.uint64),
+            "required_bond": np.zeros((markets, LIMBS), dtype=np.uint64),
+            "resolved": np.zeros(markets, dtype=bool),
+            "asserted_outcome": np.zeros(markets, dtype=np.uint8),
+        },
+        "accounts": {"account": rng.integers(0, 256, size=(accounts, 20), dtype=np.uint8)},
+        "positions": {
+            "account_index": rng.integers(0, accounts, size=positions, dtype=np.uint32),
+            "market_index": rng.integers(0, markets, size=positions, dtype=np.uint32),
+            "outcome1_balance": balances,
+            "outcome2_balance": balances[::-1].copy(),
+        },
+    }
+
+
+def main():
+    positions = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    markets = int(sys.argv[2]) if len(sys.argv) > 2 else 1_000
+    directory = sys.argv[3] if len(sys.argv) > 3 else tempfile.mkdtemp(prefix="snapshot-")
+
+    tables = generate(positions, markets)
+    start = time.perf_counter()
+    write_snapshot(directory, 0, "0x" + "00" * 20, tables)
+    written = time.perf_counter() - start
+    size = sum(os.path.getsize(os.path.join(directory, name)) for name in os.listdir(directory))
+    del tables
+
+    start = time.perf_counter()
+    snapshot = Snapshot(directory)
+    scanned = np.bincount(snapshot.column("positions", "market_index"), minlength=markets)
+    scan = time.perf_counter() - start
+    scanned_bytes = positions * np.dtype(TABLES["positions"]["market_index"][0]).itemsize
+
+    start = time.perf_counter()
+    snapshot = Snapshot(directory)
+    loaded = {name: np.array(snapshot.column("positions", name)) for name in TABLES["positions"]}
+    counts = np.bincount(loaded["market_index"], minlength=markets)
+    load = time.perf_counter() - start
+    assert np.array_equal(scanned, counts), "counts differ"
+
+    print(f"{positions} positions, {markets} markets, {size / 1e6:.1f} MB in {directory}")
+    print(f"write:                 {written:.3f}s")
+    print(f"scan market_index:     {scan:.3f}s  ({scanned_bytes / 1e6:.1f} MB read)")
+    print(f"load all, then count:  {load:.3f}s  ({sum(array.nbytes for array in loaded.values()) / 1e6:.1f} MB read)")
+
+
+if __name__ == "__main__":
+    main()
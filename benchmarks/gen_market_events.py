@@ -0,0 +1,49 @@
+"""
+Fill a local chain with PredictionMarket activity for `bench_indexer.py`.
+
+Initializes `markets` markets in batches, then creates and redeems outcome tokens in each of
+them for `rounds` rounds. Requires the sandbox and market from the README to be deployed.
+
+Run: `python benchmarks/gen_market_events.py [markets] [rounds]`
+"""
+import os
+import sys
+from ape import networks, project
+from hexbytes import HexBytes
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts import constants
+
+
+def main():
+    markets = int(sys.argv[1]) if len(sys.argv) > 1 else 64
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    with networks.parse_network_choice(os.getenv("APE_NETWORK", "ethereum:local:foundry")):
+        from scripts.market import PredictionMarketManager
+
+        manager = PredictionMarketManager()
+        specs = [
+            {
+                "outcome1": constants.outcome_one,
+                "outcome2": constants.outcome_two,
+                "description": f"{constants.description} #{index}",
+                "reward": constants.reward,
+                "required_bond": constants.required_bond,
+            }
+            for index in range(markets)
+        ]
+        market_ids = [HexBytes(market_id) for market_id, _, _ in manager.init_markets(specs)]
+
+        pred_market = project.PredictionMarket.at(manager.registry.get("market_address"), fetch_from_explorer=False)
+        manager._allocate_and_approve_tokens(manager.deployer, constants.amount * markets * rounds)
+        for _ in range(rounds):
+            for market_id in market_ids:
+                pred_market.create_outcome_tokens(market_id, constants.amount, sender=manager.deployer)
+                pred_market.redeem_outcome_tokens(market_id, constants.redeem_amount, sender=manager.deployer)
+
+        print(f"Generated {markets} markets and {2 * markets * rounds} token operations")
+
+
+if __name__ == "__main__":
+    main()
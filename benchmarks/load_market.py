@@ -0,0 +1,282 @@
+"""
+Load generator for the full market lifecycle.
+
+Deploys the test `Sandbox` (the UMA sandbox plus `PredictionMarket`) on a local chain, then runs
+the `scripts/market.py` flow init -> create -> redeem -> trade -> assert -> settle_assertion ->
+settle_tokens in `workers` processes. Every worker initializes `markets` markets and drives them
+with its own `holders` test accounts, so workers never share a nonce. All workers assert before
+the liveness window is skipped once for everybody.
+
+The workers send the same contract calls as the `PredictionMarketManager` methods rather than calling
+them: the manager drives the single market recorded in its registry with the keystore accounts
+`account1`-`account3`, reads balances around every call, and its `settle_assertion` advances chain
+time itself. Here every worker needs its own markets and test accounts, one shared time skip, and
+the receipt of each call on its own.
+
+Reports transactions per second, latency percentiles and gas per operation, and the CPU and
+memory use of the local node (read from /proc, so Linux only; set NODE_PID when the node was not
+started by ape).
+
+Run: `python benchmarks/load_market.py --workers 4 --markets 8 --holders 2 --rounds 2 [--json out.json]`
+"""
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+import multiprocessing
+from collections import defaultdict
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+OPERATIONS = ("init", "create", "redeem", "trade", "assert", "settle_assertion", "settle_tokens")
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+class NodeSampler(threading.Thread):
+    """Samples CPU (percent of one core) and resident memory of process `pid` from /proc."""
+
+    def __init__(self, pid, interval=0.5):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.cpu = []
+        self.rss = []
+        self._stop_event = threading.Event()
+
+    def _cpu_seconds(self):
+        with open(f"/proc/{self.pid}/stat") as file:
+            fields = file.read().rsplit(")", 1)[1].split()
+        return (int(fields[11]) + int(fields[12])) / os.sysconf("SC_CLK_TCK")  # utime + stime
+
+    def _rss_bytes(self):
+        with open(f"/proc/{self.pid}/status") as file:
+            for line in file:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+        return 0
+
+    def run(self):
+        last_cpu, last_time = self._cpu_seconds(), time.perf_counter()
+        while not self._stop_event.wait(self.interval):
+            cpu, now = self._cpu_seconds(), time.perf_counter()
+            self.cpu.append(100 * (cpu - last_cpu) / (now - last_time))
+            self.rss.append(self._rss_bytes())
+            last_cpu, last_time = cpu, now
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+
+
+def _worker(index, args, addresses, first_account, barrier, results):
+    from ape import accounts, chain, networks, project
+    from hexbytes import HexBytes
+    from scripts import constants
+
+    samples = defaultdict(list)  # operation -> [(latency, gas)]
+
+    def send(operation, method, *call_args, sender):
+        start = time.perf_counter()
+        receipt = method(*call_args, sender=sender)
+        samples[operation].append((time.perf_counter() - start, receipt.gas_used))
+        return receipt
+
+    with networks.parse_network_choice(args.network):
+        market = project.PredictionMarket.at(addresses["market"], fetch_from_explorer=False)
+        currency = project.TestERC20.at(addresses["currency"], fetch_from_explorer=False)
+        oov3 = project.OOV3.at(addresses["oov3"], fetch_from_explorer=False)
+        holders = [accounts.test_accounts[first_account + offset] for offset in range(args.holders)]
+        creator = holders[0]
+
+        # init
+        market_ids = []
+        for number in range(args.markets):
+            currency.allocateTo(creator, constants.reward, sender=creator)
+            currency.approve(market.address, constants.reward, sender=creator)
+            receipt = send(
+                "init",
+                market.initialize_market,
+                constants.outcome_one,
+                constants.outcome_two,
+                f"Load market {index}/{number}: {constants.description}",
+                constants.reward,
+                constants.required_bond,
+                sender=creator,
+            )
+            market_ids.append(HexBytes(next(iter(market.MarketInitialized.from_receipt(receipt))).market_id))
+
+        # create, redeem and trade
+        for holder in holders:
+            total = constants.amount * args.markets * args.rounds
+            currency.allocateTo(holder, total, sender=holder)
+            currency.approve(market.address, total, sender=holder)
+        for _ in range(args.rounds):
+            for market_id in market_ids:
+                for holder in holders:
+                    send("create", market.create_outcome_tokens, market_id, constants.amount, sender=holder)
+                    send("redeem", market.redeem_outcome_tokens, market_id, constants.redeem_amount, sender=holder)
+        for market_id in market_ids:
+            token_one = project.ExpandedERC20.at(market.markets(market_id).outcome1_token, fetch_from_explorer=False)
+            for position, holder in enumerate(holders):
+                receiver = holders[(position + 1) % len(holders)]
+                send("trade", token_one.transfer, receiver, constants.transfer_amount, sender=holder)
+
+        # assert, then let one worker skip the liveness window for everybody
+        currency.allocateTo(creator, constants.required_bond * args.markets, sender=creator)
+        currency.approve(market.address, constants.required_bond * args.markets, sender=creator)
+        assertion_ids = [
+            send("assert", market.assert_market, market_id, constants.outcome_one, sender=creator).return_value
+            for market_id in market_ids
+        ]
+        if barrier.wait() == 0:
+            chain.pending_timestamp += constants.default_liveness
+            chain.mine()
+        barrier.wait()
+
+        for assertion_id in assertion_ids:
+            send("settle_assertion", oov3.settleAssertion, assertion_id, sender=creator)
+        for market_id in market_ids:
+            for holder in holders:
+                send("settle_tokens", market.settle_outcome_tokens, market_id, sender=holder)
+
+    results.put((index, dict(samples)))
+
+
+def deploy(count):
+    """
+    Deploy the sandbox and fund the first `count` test accounts. Returns the addresses the
+    workers need and the pid of the node, when ape started it.
+    """
+    from ape import accounts, chain, project
+
+    # Imported by path: an installed package named `tests` would shadow the repository's.
+    sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../tests")))
+    from conftest import Sandbox
+
+    sandbox = Sandbox(project, accounts.test_accounts[0])
+    market = sandbox.deploy_prediction_market()
+    contracts = sandbox.get_contracts()
+    for index in range(count):
+        # Accounts past the node's configured test accounts start without ether.
+        account = accounts.test_accounts[index]
+        if account.balance < 10**20:
+            chain.provider.set_balance(account.address, 10**21)
+
+    process = getattr(chain.provider, "process", None)
+    return {
+        "market": market.address,
+        "currency": contracts["currency"].address,
+        "oov3": contracts["optimistic_oracle_v3"].address,
+    }, getattr(process, "pid", None)
+
+
+def run_workers(args, addresses):
+    """Run the workers to completion and return the merged samples of every operation."""
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(args.workers)
+    results = context.Queue()
+    # Account 0 deployed the sandbox; every worker gets the next `holders` accounts.
+    workers = [
+        context.Process(target=_worker, args=(index, args, addresses, 1 + index * args.holders, barrier, results))
+        for index in range(args.workers)
+    ]
+    for process in workers:
+        process.start()
+
+    samples = defaultdict(list)
+    done = 0
+    while done < len(workers):
+        try:
+            _, worker_samples = results.get(timeout=1)
+        except queue.Empty:
+            failed = [process for process in workers if process.exitcode not in (None, 0)]
+            if failed:
+                for process in workers:
+                    process.terminate()
+                raise RuntimeError(f"{len(failed)} worker(s) failed")
+            continue
+        for operation, values in worker_samples.items():
+            samples[operation].extend(values)
+        done += 1
+    for process in workers:
+        process.join()
+    return samples
+
+
+def report(samples, elapsed, sampler):
+    transactions = sum(len(values) for values in samples.values())
+    summary = {"transactions": transactions, "seconds": elapsed, "tps": transactions / elapsed, "operations": {}}
+    print(f"{transactions} transactions in {elapsed:.1f}s: {summary['tps']:.1f} tx/s")
+    print(f"{'operation':<18} {'count':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'mean gas':>10}")
+    for operation in OPERATIONS:
+        values = samples.get(operation)
+        if not values:
+            continue
+        latencies = [latency * 1000 for latency, _ in values]
+        stats = {
+            "count": len(values),
+            "p50_ms": _percentile(latencies, 0.50),
+            "p95_ms": _percentile(latencies, 0.95),
+            "p99_ms": _percentile(latencies, 0.99),
+            "mean_gas": sum(gas for _, gas in values) // len(values),
+        }
+        summary["operations"][operation] = stats
+        print(
+            f"{operation:<18} {stats['count']:>6} {stats['p50_ms']:>8.1f} {stats['p95_ms']:>8.1f}"
+            f" {stats['p99_ms']:>8.1f} {stats['mean_gas']:>10}"
+        )
+    if sampler is not None and sampler.cpu:
+        summary["node"] = {
+            "cpu_mean_percent": sum(sampler.cpu) / len(sampler.cpu),
+            "cpu_max_percent": max(sampler.cpu),
+            "rss_max_mb": max(sampler.rss) / 2**20,
+        }
+        node = summary["node"]
+        print(
+            f"node: cpu mean {node['cpu_mean_percent']:.0f}%, max {node['cpu_max_percent']:.0f}%,"
+            f" rss max {node['rss_max_mb']:.0f} MB"
+        )
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", type=int, default=2)
+    parser.add_argument("--markets", type=int, default=4, help="markets per worker")
+    parser.add_argument("--holders", type=int, default=2, help="accounts per worker")
+    parser.add_argument("--rounds", type=int, default=1, help="create/redeem rounds per market and holder")
+    parser.add_argument("--network", default=os.getenv("APE_NETWORK", "ethereum:local:foundry"))
+    parser.add_argument("--json", help="also write the summary to this file")
+    args = parser.parse_args()
+
+    from ape import networks
+
+    # Stay connected while the workers run, so a node started by ape is kept alive.
+    with networks.parse_network_choice(args.network):
+        addresses, pid = deploy(1 + args.workers * args.holders)
+        pid = int(os.getenv("NODE_PID", pid or 0)) or None
+        sampler = NodeSampler(pid) if pid and os.path.exists(f"/proc/{pid}") else None
+
+        if sampler is not None:
+            sampler.start()
+        start = time.perf_counter()
+        samples = run_workers(args, addresses)
+        elapsed = time.perf_counter() - start
+        if sampler is not None:
+            sampler.stop()
+
+    summary = report(samples, elapsed, sampler)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(summary, file, indent=4)
+
+
+if __name__ == "__main__":
+    main()
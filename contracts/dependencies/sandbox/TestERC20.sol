@@ -2,14 +2,16 @@
 pragma solidity ^0.8.0;
 
 import "@openzeppelin/contracts/token/ERC20/ERC20.sol";
+import "@openzeppelin/contracts/token/ERC20/extensions/draft-ERC20Permit.sol";
 
 /**
  * @title An implementation of ERC20 with the same interface as the Compound project's testnet tokens (mainly DAI)
  * @dev This contract can be deployed or the interface can be used to communicate with Compound's ERC20 tokens.  Note:
- * this token should never be used to store real value since it allows permissionless minting.
+ * this token should never be used to store real value since it allows permissionless minting. Approvals can also be
+ * given with EIP-2612 signed permits.
  */
 
-contract TestERC20 is ERC20 {
+contract TestERC20 is ERC20, ERC20Permit {
     uint8 _decimals;
 
     /**
@@ -17,12 +19,14 @@ contract TestERC20 is ERC20 {
      * @param _name The name which describes the new token.
      * @param _symbol The ticker abbreviation of the name. Ideally < 5 chars.
      * @param _tokenDecimals The number of decimals to define token precision.
+     * @param _eip712Name The name of the EIP-712 domain of permits (version "1").
      */
     constructor(
         string memory _name,
         string memory _symbol,
-        uint8 _tokenDecimals
-    ) ERC20(_name, _symbol) {
+        uint8 _tokenDecimals,
+        string memory _eip712Name
+    ) ERC20(_name, _symbol) ERC20Permit(_eip712Name) {
         _decimals = _tokenDecimals;
     }
 
@@ -40,10 +40,15 @@ event MarketAsserted:
     market_id: bytes32
     asserted_outcome: String[16]
     assertion_id: bytes32
+    asserter: address
 
 event MarketResolved:
     market_id: bytes32
 
+event MarketAssertionRejected:
+    market_id: bytes32
+    assertion_id: bytes32
+
 event TokensCreated:
     market_id: bytes32
     account: address
@@ -62,6 +67,8 @@ event TokensSettled:
     outcome2_tokens: uint256
 
 # Define structs
+# Fields read by the market operations. The names and description live in `market_descriptions`
+# and are only read when composing the assertion claim.
 struct Market:
     resolved: bool  # True if the market has been resolved and payouts can be settled.
     asserted_outcome_id: bytes32  # Hash of asserted outcome (outcome1, outcome2, or unresolvable).
@@ -69,10 +76,35 @@ struct Market:
     outcome2_token: address  # Address of ERC20 token representing the value of the second outcome.
     reward: uint256  # Reward available for asserting true market outcome.
     required_bond: uint256  # Expected bond to assert market outcome.
+    outcome1_id: bytes32  # Hash of the first outcome name.
+    outcome2_id: bytes32  # Hash of the second outcome name.
+
+struct MarketDescription:
     outcome1: Bytes[16]  # Short name of the first outcome.
     outcome2: Bytes[16]  # Short name of the second outcome.
     description: Bytes[720]  # Description of the market.
 
+struct MarketSpec:
+    outcome1: String[16]  # Short name of the first outcome.
+    outcome2: String[16]  # Short name of the second outcome.
+    description: String[720]  # Description of the market.
+    reward: uint256  # Reward available for asserting true market outcome.
+    required_bond: uint256  # Expected bond to assert market outcome.
+
+struct Position:
+    market_id: bytes32  # Identifier for markets mapping.
+    amount: uint256  # Amount of outcome token pairs to create or redeem.
+
+struct MarketState:
+    market: Market  # Stored market fields.
+    outcome1_balances: DynArray[uint256, MAX_VIEW_ACCOUNTS]  # outcome1_token balance of each requested account.
+    outcome2_balances: DynArray[uint256, MAX_VIEW_ACCOUNTS]  # outcome2_token balance of each requested account.
+
+struct MarketSummary:
+    market_id: bytes32  # Identifier for markets mapping.
+    status: uint8  # MARKET_OPEN, MARKET_ASSERTED or MARKET_RESOLVED.
+    market: Market  # Stored market fields, without the names and description.
+
 struct AssertedMarket:
     asserter: address  # Address of the asserter used for reward payout.
     market_id: bytes32  # Identifier for markets mapping.
@@ -84,15 +116,31 @@ ancillary_data_instance: IAncillaryDataInterface
 OOv3_instance: immutable(IOptimisticOracleV3) # Optimistic Oracle V3 interface
 OOv3_callback_instance: IOptimisticOracleV3CallbackRecipient
 markets: public(HashMap[bytes32, Market])
+market_descriptions: public(HashMap[bytes32, MarketDescription])
 asserted_markets: public(HashMap[bytes32, AssertedMarket])
 currency: public(immutable(IERC20))  # Currency used for all prediction markets
 assertion_liveness: constant(uint64) = 7200  # 2 hours
 default_identifier: immutable(bytes32)  # Default identifier for prediction markets
 unresolvable: constant(Bytes[16]) = b"Unresolvable"
+unresolvable_id: constant(bytes32) = keccak256(unresolvable)
 outcome_token_factory: immutable(address)
+MAX_BATCH_MARKETS: constant(uint256) = 32  # Maximum number of markets initialized in one transaction.
+MAX_VIEW_MARKETS: constant(uint256) = 32  # Maximum number of markets read by get_market_states.
+MAX_VIEW_ACCOUNTS: constant(uint256) = 64  # Maximum number of accounts read by get_market_states.
+MAX_PAGE_MARKETS: constant(uint256) = 256  # Maximum number of markets returned by one page of the market index.
+
+# Market index. Status 0 (MARKET_ALL) lists every market in initialization order and is only appended to. Every market
+# is also in the list of its current status; it leaves that list by moving the last entry into its place.
+MARKET_ALL: constant(uint8) = 0
+MARKET_OPEN: constant(uint8) = 1
+MARKET_ASSERTED: constant(uint8) = 2
+MARKET_RESOLVED: constant(uint8) = 3
+market_index_count: HashMap[uint8, uint256]  # Number of markets in the list of each status.
+market_index: HashMap[uint8, HashMap[uint256, bytes32]]  # Market id at each position of the list of each status.
+market_index_position: HashMap[bytes32, uint256]  # Position of a market in the list of its current status.
 
 interface OutComeTokenFactory:
-    def deploy_outcome_token(_name: String[22], _symbol: String[5], _decimals: uint8) -> address: nonpayable
+    def deploy_outcome_token_pair(_name1: String[22], _name2: String[22], _decimals: uint8) -> (address, address): nonpayable
 
 
 @deploy
@@ -121,6 +169,8 @@ def __init__(
    self._confirm_collateral_whitelist(_currency)
    currency = IERC20(_currency)
    outcome_token_factory = _outcome_token_factory
+   # Standing allowance for the assertion bonds pulled by OOv3.
+   extcall currency.approve(_oov3, max_value(uint256), default_return_value=True)
 
    default_identifier = staticcall OOv3_instance.defaultIdentifier()
 
@@ -133,6 +183,79 @@ def __init__(
 def get_market(market_id: bytes32) -> Market:
     return self.markets[market_id]
 
+@view
+@external
+def get_market_count(status: uint8) -> uint256:
+    """
+    @notice Number of markets with `status` (MARKET_OPEN, MARKET_ASSERTED or MARKET_RESOLVED), or of all markets for
+        MARKET_ALL.
+    """
+    assert status <= MARKET_RESOLVED, "Invalid status"
+    return self.market_index_count[status]
+
+@view
+@external
+def get_market_ids(status: uint8, offset: uint256, limit: uint256) -> DynArray[bytes32, MAX_PAGE_MARKETS]:
+    """
+    @notice Ids of up to `limit` (at most MAX_PAGE_MARKETS) markets with `status`, starting at position `offset` of its
+        list. MARKET_ALL pages through every market in initialization order.
+    @dev The order of the open, asserted and resolved lists changes when a market leaves them, so a client that pages
+        through them across blocks should read them at a fixed block.
+    """
+    market_ids: DynArray[bytes32, MAX_PAGE_MARKETS] = []
+    for index: uint256 in range(self._page_length(status, offset, limit), bound=MAX_PAGE_MARKETS):
+        market_ids.append(self.market_index[status][offset + index])
+    return market_ids
+
+@view
+@external
+def get_market_summaries(status: uint8, offset: uint256, limit: uint256) -> DynArray[MarketSummary, MAX_PAGE_MARKETS]:
+    """
+    @notice Same page as get_market_ids, with the status and stored fields of each market. Outcome names and
+        descriptions are left out; they are in `market_descriptions`.
+    """
+    summaries: DynArray[MarketSummary, MAX_PAGE_MARKETS] = []
+    for index: uint256 in range(self._page_length(status, offset, limit), bound=MAX_PAGE_MARKETS):
+        market_id: bytes32 = self.market_index[status][offset + index]
+        market: Market = self.markets[market_id]
+        summaries.append(MarketSummary(market_id=market_id, status=self._market_status(market), market=market))
+    return summaries
+
+@view
+@external
+def get_market_states(
+    market_ids: DynArray[bytes32, MAX_VIEW_MARKETS],
+    accounts: DynArray[address, MAX_VIEW_ACCOUNTS]
+) -> (DynArray[MarketState, MAX_VIEW_MARKETS], DynArray[uint256, MAX_VIEW_ACCOUNTS]):
+    """
+    @notice Reads several markets together with the outcome token balances of every account in a single call.
+    @dev Balances of markets that do not exist are reported as zero.
+    @return The state of each market in `market_ids` order and the currency balance of each account.
+    """
+    states: DynArray[MarketState, MAX_VIEW_MARKETS] = []
+    for market_id: bytes32 in market_ids:
+        market: Market = self.markets[market_id]
+        outcome1_balances: DynArray[uint256, MAX_VIEW_ACCOUNTS] = []
+        outcome2_balances: DynArray[uint256, MAX_VIEW_ACCOUNTS] = []
+        for account: address in accounts:
+            if market.outcome1_token == empty(address):
+                outcome1_balances.append(0)
+                outcome2_balances.append(0)
+            else:
+                outcome1_balances.append(staticcall ExpandedIERC20(market.outcome1_token).balanceOf(account))
+                outcome2_balances.append(staticcall ExpandedIERC20(market.outcome2_token).balanceOf(account))
+        states.append(MarketState(
+            market=market,
+            outcome1_balances=outcome1_balances,
+            outcome2_balances=outcome2_balances
+        ))
+
+    currency_balances: DynArray[uint256, MAX_VIEW_ACCOUNTS] = []
+    for account: address in accounts:
+        currency_balances.append(staticcall currency.balanceOf(account))
+
+    return states, currency_balances
+
 @external
 def initialize_market(
     outcome1: String[16], # Short name of the first outcome.
@@ -141,97 +264,78 @@ def initialize_market(
     reward: uint256, # Reward available for asserting true market outcome.
     required_bond: uint256 # Expected bond to assert market outcome (OOv3 can require higher bond).
 ):
-    assert len(outcome1) > 0, "Empty First Outcome"
-    assert len(outcome2) > 0, "Empty Second Outcome"
-    assert keccak256(outcome1) != keccak256(outcome2), "Outcomes are the same"
-    assert len(description) > 0, "Empty Description"
-    market_id: bytes32 = keccak256(abi_encode(block.number, description))
-    assert self.markets[market_id].outcome1_token == empty(address), "Market already exists."
-    # assert reward > 0, "Low reward amount."
+    self._initialize_and_fund_market(outcome1, outcome2, description, reward, required_bond)
 
-    # Create position tokens with this contract having minter and burner roles.
-    _decimals: uint8 = 18
-    outcome1_token_address: address = extcall OutComeTokenFactory(outcome_token_factory).deploy_outcome_token(
-        concat(outcome1, " Token"),
-        "O1T",
-        _decimals
-    )
-    assert outcome1_token_address != empty(address), "Outcome1 token creation failed"
-    outcome2_token_address: address = extcall OutComeTokenFactory(outcome_token_factory).deploy_outcome_token(
-        concat(outcome2, " Token"),
-        "O2T",
-        _decimals
-    )
-    assert outcome2_token_address != empty(address), "Outcome2 token creation failed"
-
-    extcall ExpandedIERC20(outcome1_token_address).add_minter(self)
-    extcall ExpandedIERC20(outcome2_token_address).add_minter(self)
-    extcall ExpandedIERC20(outcome1_token_address).add_burner(self)
-    extcall ExpandedIERC20(outcome2_token_address).add_burner(self)
+@external
+def initialize_market_with_permit(
+    outcome1: String[16],
+    outcome2: String[16],
+    description: String[720],
+    reward: uint256,
+    required_bond: uint256,
+    deadline: uint256, # Deadline of the EIP-2612 permit of `reward` currency to this contract.
+    v: uint8,
+    r: bytes32,
+    s: bytes32
+):
+    """
+    @notice Same as initialize_market, with the reward approved by a signed permit instead of a prior approve.
+    """
+    self._permit(reward, deadline, v, r, s)
+    self._initialize_and_fund_market(outcome1, outcome2, description, reward, required_bond)
 
-    self.markets[market_id] = Market(
-        resolved=False,
-        asserted_outcome_id=empty(bytes32),
-        outcome1_token=outcome1_token_address,
-        outcome2_token=outcome2_token_address,
-        reward=reward,
-        required_bond=required_bond,
-        outcome1=convert(outcome1, Bytes[16]),
-        outcome2=convert(outcome2, Bytes[16]),
-        description=convert(description, Bytes[720])
-    )
-    if reward > 0:
-        extcall currency.transferFrom(msg.sender, self, reward, default_return_value=True) # Pull Reward.
-    
-    log MarketInitialized(
+@external
+def initialize_markets(specs: DynArray[MarketSpec, MAX_BATCH_MARKETS]):
+    """
+    @notice Initialize several markets in one transaction. The rewards of all markets are pulled in a single transfer
+        and one MarketInitialized event is emitted per market.
+    @dev A description repeated within the same block would derive an existing market_id, so the position of the
+        spec in the batch is mixed into the id in that case.
+    """
+    total_reward: uint256 = 0
+    index: uint256 = 0
+    for spec: MarketSpec in specs:
+        market_id: bytes32 = keccak256(abi_encode(block.number, spec.description))
+        if self.markets[market_id].outcome1_token != empty(address):
+            market_id = keccak256(abi_encode(block.number, spec.description, index))
+            assert self.markets[market_id].outcome1_token == empty(address), "Market already exists."
+
+        self._initialize_market(
             market_id,
-            outcome1,
-            outcome2,
-            description,
-            outcome1_token_address,
-            outcome2_token_address,
-            reward,
-            required_bond
+            spec.outcome1,
+            spec.outcome2,
+            spec.description,
+            spec.reward,
+            spec.required_bond
         )
+        total_reward += spec.reward
+        index += 1
+
+    if total_reward > 0:
+        extcall currency.transferFrom(msg.sender, self, total_reward, default_return_value=True) # Pull Rewards.
 
 @external
 def assert_market(market_id: bytes32, asserted_outcome: String[16]) -> bytes32:
     """
     @notice Assert the market with any of 3 possible outcomes: names of outcome1, outcome2 or unresolvable.
     """
-    market: Market = self.markets[market_id]
-    assert market.outcome1_token != empty(address), "Market does not exist"
-    _asserted_outcome_id: bytes32 = keccak256(convert(asserted_outcome, Bytes[16]))
-    assert market.asserted_outcome_id == empty(bytes32), "Assertion active or resolved"
-    assert (
-        _asserted_outcome_id == keccak256(market.outcome1) or
-        _asserted_outcome_id == keccak256(market.outcome2) or
-        _asserted_outcome_id == keccak256(unresolvable)
-    ), "Invalid asserted Outcome"
+    return self._assert_market(market_id, asserted_outcome)
 
-    
-    market.asserted_outcome_id = _asserted_outcome_id
-    minimum_bond: uint256 = staticcall OOv3_instance.getMinimumBond(currency.address)
-    bond: uint256 = market.required_bond
-    if market.required_bond <= minimum_bond:
-        bond = minimum_bond
-
-    claim: Bytes[920] = self._compose_claim(asserted_outcome, market.description)
-
-    # Pull bond and make the assertion.
-    extcall currency.transferFrom(msg.sender, self, bond, default_return_value=True)
-    extcall currency.approve(OOv3_instance.address, bond, default_return_value=True)
-    assertion_id: bytes32 = self._assert_truth_with_defaults(claim, bond)
-
-    # Store the asserter and marketId for the assertionResolvedCallback.
-    self.asserted_markets[assertion_id] = AssertedMarket(asserter=msg.sender, market_id=market_id)
-
-    # update markets
-    self.markets[market_id] = market
-
-    log MarketAsserted(market_id, asserted_outcome, assertion_id)
-
-    return assertion_id
+@external
+def assert_market_with_permit(
+    market_id: bytes32,
+    asserted_outcome: String[16],
+    deadline: uint256, # Deadline of the EIP-2612 permit of the bond to this contract.
+    v: uint8,
+    r: bytes32,
+    s: bytes32
+) -> bytes32:
+    """
+    @notice Same as assert_market, with the bond approved by a signed permit instead of a prior approve. The permit
+        must be for the bond the market requires: max(required_bond, minimum bond of OOv3).
+    """
+    self._permit(self._bond(market_id), deadline, v, r, s)
+    return self._assert_market(market_id, asserted_outcome)
 
 @external
 def assertionResolvedCallback(assertion_id: bytes32, asserted_truthfully: bool):
@@ -242,20 +346,21 @@ def assertionResolvedCallback(assertion_id: bytes32, asserted_truthfully: bool):
     """
     assert msg.sender == OOv3_instance.address, "Not authorized"
     _market_id: bytes32 = self.asserted_markets[assertion_id].market_id
-    market: Market = self.markets[_market_id]
     if asserted_truthfully:
-        market.resolved = True
-        self.markets[_market_id] = market
-        if market.reward > 0 :
+        self.markets[_market_id].resolved = True
+        self._move_market(_market_id, MARKET_ASSERTED, MARKET_RESOLVED)
+        reward: uint256 = self.markets[_market_id].reward
+        if reward > 0 :
             extcall currency.transfer(
                 self.asserted_markets[assertion_id].asserter,
-                market.reward,
+                reward,
                 default_return_value=True
             )
-        log MarketResolved(self.asserted_markets[assertion_id].market_id)
+        log MarketResolved(_market_id)
     else:
-        market.asserted_outcome_id = empty(bytes32)
-        self.markets[_market_id] = market
+        self.markets[_market_id].asserted_outcome_id = empty(bytes32)
+        self._move_market(_market_id, MARKET_ASSERTED, MARKET_OPEN)
+        log MarketAssertionRejected(_market_id, assertion_id)
     self.asserted_markets[assertion_id] = empty(AssertedMarket) # delete record
 
 @external
@@ -268,31 +373,59 @@ def create_outcome_tokens(market_id: bytes32, tokens_to_create: uint256):
     @notice Mints pair of tokens representing the value of outcome1 and outcome2. Trading of outcome tokens is outside of the
         scope of this contract. The caller must approve this contract to spend the currency tokens.
     """
-    market: Market = self.markets[market_id]
-    ot1: address = market.outcome1_token
-    ot2: address = market.outcome2_token
-    assert ot1 != empty(address), "Market does not exist"
+    extcall currency.transferFrom(msg.sender, self, tokens_to_create, default_return_value=True)
+    self._create_outcome_tokens(market_id, tokens_to_create)
 
+@external
+def create_outcome_tokens_with_permit(
+    market_id: bytes32,
+    tokens_to_create: uint256,
+    deadline: uint256, # Deadline of the EIP-2612 permit of `tokens_to_create` currency to this contract.
+    v: uint8,
+    r: bytes32,
+    s: bytes32
+):
+    """
+    @notice Same as create_outcome_tokens, with the currency approved by a signed permit instead of a prior approve.
+    """
+    self._permit(tokens_to_create, deadline, v, r, s)
     extcall currency.transferFrom(msg.sender, self, tokens_to_create, default_return_value=True)
-    
-    extcall ExpandedIERC20(ot1).mint(msg.sender, tokens_to_create)
-    extcall ExpandedIERC20(ot2).mint(msg.sender, tokens_to_create)
-    log TokensCreated(market_id, msg.sender, tokens_to_create)
+    self._create_outcome_tokens(market_id, tokens_to_create)
 
 @external
-def redeem_outcome_tokens(market_id: bytes32, tokens_to_redeem: uint256):
+def create_outcome_tokens_batch(positions: DynArray[Position, MAX_BATCH_MARKETS]):
     """
-    @notice Burns equal amount of outcome1 and outcome2 tokens returning settlement currency tokens.
+    @notice Mints outcome token pairs in several markets, pulling the currency for all of them in a single transfer.
+        A `TokensCreated` event is emitted for every position.
     """
-    market: Market = self.markets[market_id]
-    assert market.outcome1_token != empty(address), "Market does not exist"
+    total: uint256 = 0
+    for position: Position in positions:
+        total += position.amount
 
-    extcall ExpandedIERC20(market.outcome1_token).burn_from(msg.sender, tokens_to_redeem)
-    extcall ExpandedIERC20(market.outcome2_token).burn_from(msg.sender, tokens_to_redeem)
+    extcall currency.transferFrom(msg.sender, self, total, default_return_value=True)
+    for position: Position in positions:
+        self._create_outcome_tokens(position.market_id, position.amount)
 
+@external
+def redeem_outcome_tokens(market_id: bytes32, tokens_to_redeem: uint256):
+    """
+    @notice Burns equal amount of outcome1 and outcome2 tokens returning settlement currency tokens.
+    """
+    self._redeem_outcome_tokens(market_id, tokens_to_redeem)
     extcall currency.transfer(msg.sender, tokens_to_redeem, default_return_value=True)
 
-    log TokensRedeemed(market_id, msg.sender, tokens_to_redeem)
+@external
+def redeem_outcome_tokens_batch(positions: DynArray[Position, MAX_BATCH_MARKETS]):
+    """
+    @notice Burns equal amounts of outcome1 and outcome2 tokens in several markets, returning the settlement currency
+        for all of them in a single transfer. A `TokensRedeemed` event is emitted for every position.
+    """
+    total: uint256 = 0
+    for position: Position in positions:
+        self._redeem_outcome_tokens(position.market_id, position.amount)
+        total += position.amount
+
+    extcall currency.transfer(msg.sender, total, default_return_value=True)
 
 @external
 def settle_outcome_tokens(market_id: bytes32) -> uint256:
@@ -304,27 +437,25 @@ def settle_outcome_tokens(market_id: bytes32) -> uint256:
         nothing. If the market was resolved to the split outcome, then both outcome tokens provides half of their balance
         as currency payout.
     """
-    market: Market = self.markets[market_id]
-    assert market.resolved, "Market not resolved"
+    payout: uint256 = self._settle_outcome_tokens(market_id)
+    extcall currency.transfer(msg.sender, payout, default_return_value=True)
 
-    outcome1_balance: uint256 = staticcall ExpandedIERC20(market.outcome1_token).balanceOf(msg.sender)
-    outcome2_balance: uint256 = staticcall ExpandedIERC20(market.outcome2_token).balanceOf(msg.sender)
-    payout: uint256 = 0
-    
-    if market.asserted_outcome_id == keccak256(market.outcome1):
-        payout = outcome1_balance
-    elif market.asserted_outcome_id == keccak256(market.outcome2):
-        payout = outcome2_balance
-    else:
-        payout = (outcome1_balance + outcome2_balance) // 2
+    return payout
 
-    extcall ExpandedIERC20(market.outcome1_token).burn_from(msg.sender, outcome1_balance)
-    extcall ExpandedIERC20(market.outcome2_token).burn_from(msg.sender, outcome2_balance)
-    extcall currency.transfer(msg.sender, payout, default_return_value=True)
+@external
+def settle_outcome_tokens_batch(market_ids: DynArray[bytes32, MAX_BATCH_MARKETS]) -> uint256:
+    """
+    @notice Settles the caller's outcome tokens in several resolved markets, paying the summed payout in a single
+        transfer. A `TokensSettled` event with the payout of each market is emitted for every market.
+    @return The total payout.
+    """
+    total: uint256 = 0
+    for market_id: bytes32 in market_ids:
+        total += self._settle_outcome_tokens(market_id)
 
-    log TokensSettled(market_id, msg.sender, payout, outcome1_balance, outcome2_balance)
+    extcall currency.transfer(msg.sender, total, default_return_value=True)
 
-    return payout
+    return total
         
 #############################################
 #              Internal Functions           #
@@ -341,21 +472,135 @@ def _confirm_collateral_whitelist(_addr: address):
     )
     assert staticcall self.whitelist_instance.isOnWhitelist(_addr), "Unsupported Currency!"
 
+@view
+@internal
+def _market_status(market: Market) -> uint8:
+    if market.resolved:
+        return MARKET_RESOLVED
+    if market.asserted_outcome_id != empty(bytes32):
+        return MARKET_ASSERTED
+    return MARKET_OPEN
+
+@view
+@internal
+def _page_length(status: uint8, offset: uint256, limit: uint256) -> uint256:
+    """
+    @dev Number of markets of the page at `offset` of the list of `status`, at most `limit` and MAX_PAGE_MARKETS.
+    """
+    assert status <= MARKET_RESOLVED, "Invalid status"
+    count: uint256 = self.market_index_count[status]
+    if offset >= count:
+        return 0
+    return min(min(count - offset, limit), MAX_PAGE_MARKETS)
+
+@internal
+def _index_market(market_id: bytes32, status: uint8):
+    """
+    @dev Append the market to the list of `status`. Its position is only tracked for the status lists it can leave.
+    """
+    position: uint256 = self.market_index_count[status]
+    self.market_index[status][position] = market_id
+    self.market_index_count[status] = position + 1
+    if status != MARKET_ALL:
+        self.market_index_position[market_id] = position
+
+@internal
+def _move_market(market_id: bytes32, from_status: uint8, to_status: uint8):
+    """
+    @dev Move the market from the list of `from_status` to the end of the list of `to_status`. The last market of the
+        list it leaves takes its position.
+    """
+    position: uint256 = self.market_index_position[market_id]
+    last: uint256 = self.market_index_count[from_status] - 1
+    if position != last:
+        last_market_id: bytes32 = self.market_index[from_status][last]
+        self.market_index[from_status][position] = last_market_id
+        self.market_index_position[last_market_id] = position
+    self.market_index[from_status][last] = empty(bytes32)
+    self.market_index_count[from_status] = last
+    self._index_market(market_id, to_status)
+
+@internal
+def _permit(amount: uint256, deadline: uint256, v: uint8, r: bytes32, s: bytes32):
+    """
+    @dev Submit the caller's EIP-2612 permit of `amount` currency to this contract. A failed permit is ignored: anyone
+        can submit a signed permit first, which consumes its nonce, and the allowance it gave is then used by the
+        transferFrom that follows (which reverts if there is none).
+    """
+    success: bool = raw_call(
+        currency.address,
+        abi_encode(
+            msg.sender,
+            self,
+            amount,
+            deadline,
+            v,
+            r,
+            s,
+            method_id=method_id("permit(address,address,uint256,uint256,uint8,bytes32,bytes32)")
+        ),
+        revert_on_failure=False
+    )
+
+@view
+@internal
+def _bond(market_id: bytes32) -> uint256:
+    """
+    @dev Bond of an assertion of the market: its required bond, raised to the minimum bond of OOv3.
+    """
+    minimum_bond: uint256 = staticcall OOv3_instance.getMinimumBond(currency.address)
+    bond: uint256 = self.markets[market_id].required_bond
+    if bond <= minimum_bond:
+        bond = minimum_bond
+    return bond
+
 @internal
-def _compose_claim(outcome: String[16], description: Bytes[720]) -> Bytes[920]:
-    return concat(
+def _initialize_and_fund_market(
+    outcome1: String[16],
+    outcome2: String[16],
+    description: String[720],
+    reward: uint256,
+    required_bond: uint256
+):
+    market_id: bytes32 = keccak256(abi_encode(block.number, description))
+    assert self.markets[market_id].outcome1_token == empty(address), "Market already exists."
+
+    self._initialize_market(market_id, outcome1, outcome2, description, reward, required_bond)
+    if reward > 0:
+        extcall currency.transferFrom(msg.sender, self, reward, default_return_value=True) # Pull Reward.
+
+@internal
+def _assert_market(market_id: bytes32, asserted_outcome: String[16]) -> bytes32:
+    assert self.markets[market_id].outcome1_token != empty(address), "Market does not exist"
+    _asserted_outcome_id: bytes32 = keccak256(convert(asserted_outcome, Bytes[16]))
+    assert self.markets[market_id].asserted_outcome_id == empty(bytes32), "Assertion active or resolved"
+    assert (
+        _asserted_outcome_id == self.markets[market_id].outcome1_id or
+        _asserted_outcome_id == self.markets[market_id].outcome2_id or
+        _asserted_outcome_id == unresolvable_id
+    ), "Invalid asserted Outcome"
+
+    self.markets[market_id].asserted_outcome_id = _asserted_outcome_id
+    self._move_market(market_id, MARKET_OPEN, MARKET_ASSERTED)
+    bond: uint256 = self._bond(market_id)
+
+    # The claim is built in place, reading the description straight from storage into the claim buffer.
+    claim: Bytes[920] = concat(
         b"As of assertion timestamp ",
-        extcall self.ancillary_data_instance.toUtf8BytesUint(block.timestamp),
+        convert(uint2str(block.timestamp), Bytes[78]),
         b", the described prediction market outcome is: ",
-        convert(outcome, Bytes[16]),
+        convert(asserted_outcome, Bytes[16]),
         b". The market description is: ",
-        description
+        self.market_descriptions[market_id].description
     )
 
-@internal
-def _assert_truth_with_defaults(_claim: Bytes[920], bond: uint256) -> bytes32:
+    # Pull bond and make the assertion. OOv3 spends from the standing allowance set in the constructor,
+    # which is only topped up again if the currency decreases infinite allowances.
+    extcall currency.transferFrom(msg.sender, self, bond, default_return_value=True)
+    if staticcall currency.allowance(self, OOv3_instance.address) < bond:
+        extcall currency.approve(OOv3_instance.address, max_value(uint256), default_return_value=True)
     assertion_id: bytes32 = extcall OOv3_instance.assertTruth(
-        _claim,
+        claim,
         msg.sender, # asserter
         self, # Receive callback in this contract.
         empty(address), # No sovereign security.
@@ -365,4 +610,122 @@ def _assert_truth_with_defaults(_claim: Bytes[920], bond: uint256) -> bytes32:
         default_identifier,
         empty(bytes32) # No bond
     )
-    return assertion_id
\ No newline at end of file
+
+    # Store the asserter and marketId for the assertionResolvedCallback.
+    self.asserted_markets[assertion_id] = AssertedMarket(asserter=msg.sender, market_id=market_id)
+
+    log MarketAsserted(market_id, asserted_outcome, assertion_id, msg.sender)
+
+    return assertion_id
+
+@internal
+def _create_outcome_tokens(market_id: bytes32, tokens_to_create: uint256):
+    """
+    @notice Mints `tokens_to_create` of both outcome tokens to the caller. The caller is responsible for pulling the currency.
+    """
+    ot1: address = self.markets[market_id].outcome1_token
+    ot2: address = self.markets[market_id].outcome2_token
+    assert ot1 != empty(address), "Market does not exist"
+
+    extcall ExpandedIERC20(ot1).mint(msg.sender, tokens_to_create)
+    extcall ExpandedIERC20(ot2).mint(msg.sender, tokens_to_create)
+    log TokensCreated(market_id, msg.sender, tokens_to_create)
+
+@internal
+def _redeem_outcome_tokens(market_id: bytes32, tokens_to_redeem: uint256):
+    """
+    @notice Burns `tokens_to_redeem` of both outcome tokens from the caller. The caller is responsible for the currency payout.
+    """
+    ot1: address = self.markets[market_id].outcome1_token
+    ot2: address = self.markets[market_id].outcome2_token
+    assert ot1 != empty(address), "Market does not exist"
+
+    extcall ExpandedIERC20(ot1).burn_from(msg.sender, tokens_to_redeem)
+    extcall ExpandedIERC20(ot2).burn_from(msg.sender, tokens_to_redeem)
+    log TokensRedeemed(market_id, msg.sender, tokens_to_redeem)
+
+@internal
+def _settle_outcome_tokens(market_id: bytes32) -> uint256:
+    """
+    @notice Burns all of the caller's outcome tokens of a resolved market and returns the currency payout owed for them.
+        The caller is responsible for transferring the payout.
+    """
+    market: Market = self.markets[market_id]
+    assert market.resolved, "Market not resolved"
+
+    # Each token burns the caller's whole balance and reports it, one call per token.
+    outcome1_balance: uint256 = extcall ExpandedIERC20(market.outcome1_token).burn_all_from(msg.sender)
+    outcome2_balance: uint256 = extcall ExpandedIERC20(market.outcome2_token).burn_all_from(msg.sender)
+    payout: uint256 = 0
+    
+    if market.asserted_outcome_id == market.outcome1_id:
+        payout = outcome1_balance
+    elif market.asserted_outcome_id == market.outcome2_id:
+        payout = outcome2_balance
+    else:
+        payout = (outcome1_balance + outcome2_balance) // 2
+
+    log TokensSettled(market_id, msg.sender, payout, outcome1_balance, outcome2_balance)
+
+    return payout
+
+@internal
+def _initialize_market(
+    market_id: bytes32,
+    outcome1: String[16],
+    outcome2: String[16],
+    description: String[720],
+    reward: uint256,
+    required_bond: uint256
+):
+    """
+    @notice Deploys the outcome tokens and stores a new market. The caller is responsible for pulling the reward.
+    """
+    assert len(outcome1) > 0, "Empty First Outcome"
+    assert len(outcome2) > 0, "Empty Second Outcome"
+    outcome1_id: bytes32 = keccak256(outcome1)
+    outcome2_id: bytes32 = keccak256(outcome2)
+    assert outcome1_id != outcome2_id, "Outcomes are the same"
+    assert len(description) > 0, "Empty Description"
+    # assert reward > 0, "Low reward amount."
+
+    # Create position tokens (minimal proxy clones) with this contract having minter and burner roles.
+    _decimals: uint8 = 18
+    outcome1_token_address: address = empty(address)
+    outcome2_token_address: address = empty(address)
+    outcome1_token_address, outcome2_token_address = extcall OutComeTokenFactory(outcome_token_factory).deploy_outcome_token_pair(
+        concat(outcome1, " Token"),
+        concat(outcome2, " Token"),
+        _decimals
+    )
+    assert outcome1_token_address != empty(address), "Outcome1 token creation failed"
+    assert outcome2_token_address != empty(address), "Outcome2 token creation failed"
+
+    self.markets[market_id] = Market(
+        resolved=False,
+        asserted_outcome_id=empty(bytes32),
+        outcome1_token=outcome1_token_address,
+        outcome2_token=outcome2_token_address,
+        reward=reward,
+        required_bond=required_bond,
+        outcome1_id=outcome1_id,
+        outcome2_id=outcome2_id
+    )
+    self.market_descriptions[market_id] = MarketDescription(
+        outcome1=convert(outcome1, Bytes[16]),
+        outcome2=convert(outcome2, Bytes[16]),
+        description=convert(description, Bytes[720])
+    )
+    self._index_market(market_id, MARKET_ALL)
+    self._index_market(market_id, MARKET_OPEN)
+
+    log MarketInitialized(
+            market_id,
+            outcome1,
+            outcome2,
+            description,
+            outcome1_token_address,
+            outcome2_token_address,
+            reward,
+            required_bond
+        )
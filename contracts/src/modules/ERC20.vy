@@ -10,12 +10,12 @@ implements: IERC20Detailed
 balanceOf: public(HashMap[address, uint256])
 allowance: public(HashMap[address, HashMap[address, uint256]])
 totalSupply: public(uint256)
-name: public(String[15])
+name: public(String[22])
 symbol: public(String[5])
 decimals: public(uint8)
 
 @deploy
-def __init__(_name: String[15], _symbol: String[5], _decimals: uint8):
+def __init__(_name: String[22], _symbol: String[5], _decimals: uint8):
     """
     @notice implements ERC20 standard.
     @param _name The name which describes the new token.
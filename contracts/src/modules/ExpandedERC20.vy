@@ -20,17 +20,20 @@ exports: (
     erc20.__interface__
 )
 
+# Set once the token is configured, either by the constructor or by `initialize` on a clone.
+initialized: public(bool)
 
 
 @deploy
 @payable
 def __init__(
-    _name: String[15],
+    _name: String[22],
     _symbol: String[5],
     _decimals: uint8
 ):
     """
     @notice Constructs the ExpandedERC20.
+    @dev Also locks `initialize`, so the instance used as the clone implementation cannot be taken over.
     """
     erc20.__init__(_name, _symbol, _decimals)
     ctl.__init__()
@@ -41,6 +44,41 @@ def __init__(
 
     # set role admin
     ctl._grant_role(constants.MANAGER_ROLE, msg.sender)
+    self.initialized = True
+
+@external
+def initialize(
+    _name: String[22],
+    _symbol: String[5],
+    _decimals: uint8,
+    _manager: address,
+    _minter: address,
+    _burner: address
+):
+    """
+    @notice Configures a minimal proxy (EIP-1167) clone of the ExpandedERC20.
+    @dev Sets up the same state as the constructor plus the minter and burner roles, in a single call.
+        The caller (the factory) receives the default admin role, like the deployer of a blueprint token.
+    @param _name Name of the token.
+    @param _symbol Symbol of the token.
+    @param _decimals Decimals of the token.
+    @param _manager The address granted the `MANAGER_ROLE` role.
+    @param _minter The address granted the `MINT_ROLE` role.
+    @param _burner The address granted the `BURN_ROLE` role.
+    """
+    assert not self.initialized, "Token already initialized"
+    self.initialized = True
+
+    erc20.name = _name
+    erc20.symbol = _symbol
+    erc20.decimals = _decimals
+
+    ctl._grant_role(ctl.DEFAULT_ADMIN_ROLE, msg.sender)
+    ctl._set_role_admin(constants.MINT_ROLE, constants.MANAGER_ROLE)
+    ctl._set_role_admin(constants.BURN_ROLE, constants.MANAGER_ROLE)
+    ctl._grant_role(constants.MANAGER_ROLE, _manager)
+    ctl._grant_role(constants.MINT_ROLE, _minter)
+    ctl._grant_role(constants.BURN_ROLE, _burner)
 
 @external
 def mint(_recipient: address, _value: uint256):
@@ -74,6 +112,22 @@ def burn_from(_recipient: address, amount: uint256):
     ctl._check_role(constants.BURN_ROLE, msg.sender)
     erc20._burn(_recipient, amount)
 
+@external
+def burn_all_from(_account: address) -> uint256:
+    """
+    @dev Destroys the whole balance of `_account` and returns the amount destroyed, so that settling
+         a position takes one call per token instead of `balanceOf` followed by `burn_from`.
+    @notice Note that `msg.sender` must have
+        `BURN_ROLE`. Nothing is burned (and no `Transfer` is logged) for an empty balance.
+    @param _account address to burn tokens from.
+    @return uint256 The amount of tokens destroyed.
+    """
+    ctl._check_role(constants.BURN_ROLE, msg.sender)
+    amount: uint256 = erc20.balanceOf[_account]
+    if amount != 0:
+        erc20._burn(_account, amount)
+    return amount
+
 @external
 def add_minter(_account: address):
     """
@@ -9,14 +9,20 @@ from contracts.src.modules import constants
 from contracts.src.modules.interfaces import ExpandedIERC20
 
 target: public(immutable(address))
+implementation: public(immutable(address))
 owner: public(immutable(address))
 is_whitelisted: public(HashMap[address, bool])
 
 
 @deploy
 @payable
-def __init__(_target: address):
+def __init__(_target: address, _implementation: address):
+    """
+    @param _target The ExpandedERC20 blueprint used by `deploy_outcome_token`.
+    @param _implementation A deployed ExpandedERC20 cloned by `clone_outcome_token` and `deploy_outcome_token_pair`.
+    """
     target = _target
+    implementation = _implementation
     owner = msg.sender
 
 @external
@@ -46,6 +52,68 @@ def deploy_outcome_token(
 
     return new_contract_address
 
+@external
+def clone_outcome_token(
+    _name: String[22],
+    _symbol: String[5],
+    _decimals: uint8,
+    _minter: address,
+    _burner: address
+) -> address:
+    """
+    @notice Deploys a new outcome token as a minimal proxy (EIP-1167) of `implementation`.
+    @dev The caller is granted the `MANAGER_ROLE` role, `_minter` and `_burner` their roles, all in the
+        initializing call.
+    @param _name Name of the token.
+    @param _symbol Symbol of the token.
+    @param _decimals Decimals of the token.
+    @param _minter The address allowed to mint.
+    @param _burner The address allowed to burn.
+    @return address Address of the deployed token.
+    """
+    assert self.is_whitelisted[msg.sender], "Only whitelisted addresses can deploy outcome tokens."
+    return self._clone(_name, _symbol, _decimals, msg.sender, _minter, _burner)
+
+@external
+def deploy_outcome_token_pair(
+    _name1: String[22],
+    _name2: String[22],
+    _decimals: uint8
+) -> (address, address):
+    """
+    @notice Deploys both outcome tokens of a market as minimal proxies of `implementation`.
+    @dev The caller is granted the manager, minter and burner roles of both tokens, with symbols "O1T" and "O2T".
+    @param _name1 Name of the first outcome token.
+    @param _name2 Name of the second outcome token.
+    @param _decimals Decimals of both tokens.
+    @return (address, address) Addresses of the first and second outcome tokens.
+    """
+    assert self.is_whitelisted[msg.sender], "Only whitelisted addresses can deploy outcome tokens."
+    return (
+        self._clone(_name1, "O1T", _decimals, msg.sender, msg.sender, msg.sender),
+        self._clone(_name2, "O2T", _decimals, msg.sender, msg.sender, msg.sender)
+    )
+
+@internal
+def _clone(
+    _name: String[22],
+    _symbol: String[5],
+    _decimals: uint8,
+    _manager: address,
+    _minter: address,
+    _burner: address
+) -> address:
+    new_contract_address: address = create_minimal_proxy_to(implementation)
+    extcall ExpandedIERC20(new_contract_address).initialize(
+        _name,
+        _symbol,
+        _decimals,
+        _manager,
+        _minter,
+        _burner
+    )
+    return new_contract_address
+
 @external
 def whitelist(_addr: address):
     """
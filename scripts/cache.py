@@ -0,0 +1,53 @@
+from typing import Dict, Optional, Tuple
+from ape import project
+
+
+class ContractCache:
+    """Shared cache of contract instances keyed by (contract type, address).
+
+    `project.X.at(address)` rebuilds the contract handle (and its method tables) on every call.
+    Instances are instead created once on first use and reused by every manager. Freshly deployed
+    contracts should be passed to `add` so that a redeploy to a recycled address (forexample after
+    restarting anvil) replaces the stale handle; `invalidate` drops entries explicitly.
+    """
+
+    def __init__(self):
+        self._instances: Dict[Tuple[str, str], object] = {}
+
+    @staticmethod
+    def _key(contract_name: str, address) -> Tuple[str, str]:
+        return contract_name, str(address).lower()
+
+    def at(self, container, address):
+        """Return the cached instance of `container` (forexample `project.TestERC20`) at `address`."""
+        key = self._key(container.contract_type.name, address)
+        instance = self._instances.get(key)
+        if instance is None:
+            instance = container.at(address, fetch_from_explorer=False)
+            self._instances[key] = instance
+        return instance
+
+    def get(self, contract_name: str, address):
+        """Like `at`, with the container looked up on the project by name."""
+        return self.at(getattr(project, contract_name), address)
+
+    def add(self, instance):
+        """Store a freshly deployed instance, replacing any handle cached for its address."""
+        self._instances[self._key(instance.contract_type.name, instance.address)] = instance
+        return instance
+
+    def invalidate(self, address=None, contract_name: Optional[str] = None):
+        """Drop cached instances matching `address` and/or `contract_name`; everything when both are omitted."""
+        for key in list(self._instances):
+            if address is not None and key[1] != str(address).lower():
+                continue
+            if contract_name is not None and key[0] != contract_name:
+                continue
+            del self._instances[key]
+
+    def __len__(self) -> int:
+        return len(self._instances)
+
+
+# Shared by PredictionMarketManager and OracleContracts.
+contracts = ContractCache()
@@ -28,6 +28,7 @@ default_currency_symbol = f"PUSDT"
 currency_initial_supply = int(0)
 currency_name_eip712 = f"Currency"
 currency_version_eip712 = f"1"
+permit_validity = int(3600) # seconds a signed currency permit stays valid
 default_currency_decimal = int(18)
 token_name = f"Outcome Token"
 token_symbol = f"OT"
@@ -49,3 +50,14 @@ amount = int(10000e18)
 redeem_amount = int(5000e18)
 transfer_amount = int(5000e18)
 duration = int(7200)
+max_batch_markets = int(32) # MAX_BATCH_MARKETS in PredictionMarket.vy (market and position batches)
+max_view_markets = int(32) # MAX_VIEW_MARKETS in PredictionMarket.vy
+max_view_accounts = int(64) # MAX_VIEW_ACCOUNTS in PredictionMarket.vy
+max_page_markets = int(256) # MAX_PAGE_MARKETS in PredictionMarket.vy
+# Status filters of the market index (MARKET_ALL, MARKET_OPEN, MARKET_ASSERTED, MARKET_RESOLVED in PredictionMarket.vy)
+market_all = int(0)
+market_open = int(1)
+market_asserted = int(2)
+market_resolved = int(3)
+assertion_liveness = int(7200) # assertion_liveness in PredictionMarket.vy
+max_settle_batch = int(32) # assertions settled per OOV3.multicall by scripts/scheduler.py
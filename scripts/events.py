@@ -0,0 +1,191 @@
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from eth_abi import decode
+from eth_utils import keccak, to_checksum_address, to_hex
+from hexbytes import HexBytes
+
+
+def _as_bytes(value) -> bytes:
+    return value if isinstance(value, bytes) else bytes(HexBytes(value))
+
+
+class EventIndex:
+    """Events of one ABI by name and by topic0, with their signature hashed once."""
+
+    def __init__(self, abi: List[Dict[str, Any]]):
+        self.by_name: Dict[str, Dict[str, Any]] = {}
+        self.topics: Dict[str, bytes] = {}
+        self.by_topic: Dict[bytes, Dict[str, Any]] = {}
+        for item in abi:
+            if item.get("type") != "event":
+                continue
+            types = ",".join(input["type"] for input in item["inputs"])
+            topic = keccak(text=f"{item['name']}({types})")
+            self.by_name.setdefault(item["name"], item)
+            self.topics.setdefault(item["name"], topic)
+            self.by_topic[topic] = item
+
+
+# Keyed by id(abi); the ABI is kept alongside so that the id cannot be reused while cached.
+_indexes: Dict[int, Tuple[List[Dict[str, Any]], EventIndex]] = {}
+
+
+def event_index(abi: List[Dict[str, Any]]) -> EventIndex:
+    """The `EventIndex` of `abi`, built on first use. Treat `abi` as read-only afterwards."""
+    cached = _indexes.get(id(abi))
+    if cached is None or cached[0] is not abi:
+        cached = _indexes[id(abi)] = (abi, EventIndex(abi))
+    return cached[1]
+
+
+class EventDecoder:
+    """Decodes raw logs of a fixed set of events.
+
+    Topics and argument types are resolved once from the ABI, so decoding a log is a dict
+    lookup on topic0 followed by a single `eth_abi.decode` of the data. `decode_logs` skips
+    every log whose topic0 is not one of the events before touching its data.
+    """
+
+    def __init__(self, abi: List[Dict[str, Any]], event_names: Iterable[str]):
+        index = event_index(abi)
+        self._events: Dict[bytes, Tuple[str, List[Dict[str, Any]], List[str], List[str]]] = {}
+        for name in event_names:
+            if name not in index.by_name:
+                raise ValueError(f"Event '{name}' not found in ABI.")
+            inputs = index.by_name[name]["inputs"]
+            indexed = [item for item in inputs if item.get("indexed")]
+            data_inputs = [item for item in inputs if not item.get("indexed")]
+            self._events[index.topics[name]] = (
+                name,
+                indexed,
+                [item["name"] for item in data_inputs],
+                [item["type"] for item in data_inputs],
+            )
+
+    @property
+    def topics(self) -> List[str]:
+        return [to_hex(topic) for topic in self._events]
+
+    def decode(self, log: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        topics = [HexBytes(topic) for topic in log["topics"]]
+        name, indexed, names, types = self._events[bytes(topics[0])]
+
+        args: Dict[str, Any] = {}
+        for item, topic in zip(indexed, topics[1:]):
+            # Dynamic indexed values are only available as their hash.
+            if item["type"] in ("string", "bytes") or item["type"].endswith("]"):
+                args[item["name"]] = bytes(topic)
+            else:
+                args[item["name"]] = decode([item["type"]], topic)[0]
+        for arg_name, arg_type, value in zip(names, types, decode(types, HexBytes(log["data"]))):
+            args[arg_name] = to_checksum_address(value) if arg_type == "address" else value
+        return name, args
+
+    def decode_logs(self, logs: Iterable[Dict[str, Any]], address: Optional[str] = None) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """Decode the logs of the decoder's events (emitted by `address`, when given) and skip the rest."""
+        address = _as_bytes(address) if address is not None else None
+        for log in logs:
+            if not log["topics"] or _as_bytes(log["topics"][0]) not in self._events:
+                continue
+            if address is not None and _as_bytes(log["address"]) != address:
+                continue
+            yield self.decode(log)
+
+
+# Typed fast path for the `PredictionMarket` events: none of their arguments is indexed, so the
+# fields are read from fixed 32-byte slots of the data without going through `eth_abi`.
+
+MarketInitialized = namedtuple(
+    "MarketInitialized",
+    "market_id outcome1 outcome2 description outcome1_token outcome2_token reward required_bond",
+)
+MarketAsserted = namedtuple("MarketAsserted", "market_id asserted_outcome assertion_id asserter")
+MarketResolved = namedtuple("MarketResolved", "market_id")
+MarketAssertionRejected = namedtuple("MarketAssertionRejected", "market_id assertion_id")
+TokensCreated = namedtuple("TokensCreated", "market_id account tokens_created")
+TokensRedeemed = namedtuple("TokensRedeemed", "market_id account tokens_redeemed")
+TokensSettled = namedtuple("TokensSettled", "market_id account payout outcome1_tokens outcome2_tokens")
+
+
+def _word(data: bytes, slot: int) -> bytes:
+    return data[32 * slot:32 * slot + 32]
+
+
+def _uint(data: bytes, slot: int) -> int:
+    return int.from_bytes(data[32 * slot:32 * slot + 32], "big")
+
+
+def _address(data: bytes, slot: int) -> str:
+    return to_checksum_address(data[32 * slot + 12:32 * slot + 32])
+
+
+def _string(data: bytes, slot: int) -> str:
+    offset = _uint(data, slot)
+    length = int.from_bytes(data[offset:offset + 32], "big")
+    return data[offset + 32:offset + 32 + length].decode()
+
+
+MARKET_EVENT_DECODERS: Dict[str, Tuple[str, Callable[[bytes], Any]]] = {
+    "MarketInitialized(bytes32,string,string,string,address,address,uint256,uint256)": (
+        "MarketInitialized",
+        lambda data: MarketInitialized(
+            _word(data, 0), _string(data, 1), _string(data, 2), _string(data, 3),
+            _address(data, 4), _address(data, 5), _uint(data, 6), _uint(data, 7),
+        ),
+    ),
+    "MarketAsserted(bytes32,string,bytes32,address)": (
+        "MarketAsserted",
+        lambda data: MarketAsserted(_word(data, 0), _string(data, 1), _word(data, 2), _address(data, 3)),
+    ),
+    "MarketResolved(bytes32)": ("MarketResolved", lambda data: MarketResolved(_word(data, 0))),
+    "MarketAssertionRejected(bytes32,bytes32)": (
+        "MarketAssertionRejected",
+        lambda data: MarketAssertionRejected(_word(data, 0), _word(data, 1)),
+    ),
+    "TokensCreated(bytes32,address,uint256)": (
+        "TokensCreated",
+        lambda data: TokensCreated(_word(data, 0), _address(data, 1), _uint(data, 2)),
+    ),
+    "TokensRedeemed(bytes32,address,uint256)": (
+        "TokensRedeemed",
+        lambda data: TokensRedeemed(_word(data, 0), _address(data, 1), _uint(data, 2)),
+    ),
+    "TokensSettled(bytes32,address,uint256,uint256,uint256)": (
+        "TokensSettled",
+        lambda data: TokensSettled(_word(data, 0), _address(data, 1), _uint(data, 2), _uint(data, 3), _uint(data, 4)),
+    ),
+}
+
+# topic0 -> (event name, decoder)
+MARKET_EVENT_TOPICS: Dict[bytes, Tuple[str, Callable[[bytes], Any]]] = {
+    keccak(text=signature): decoder for signature, decoder in MARKET_EVENT_DECODERS.items()
+}
+
+
+def decode_market_logs(
+    logs: Iterable[Dict[str, Any]],
+    names: Optional[Iterable[str]] = None,
+    address: Optional[str] = None,
+) -> Iterator[Any]:
+    """
+    Decode the `PredictionMarket` events among raw `logs` (for example `receipt.logs`) into typed
+    records, optionally only the events in `names` and only those emitted by `address`. Other logs,
+    such as the outcome tokens' `Transfer` and `RoleGranted` events, are skipped on their topic0.
+    """
+    names = set(names) if names is not None else None
+    address = _as_bytes(address) if address is not None else None
+    for log in logs:
+        topics = log["topics"]
+        if not topics:
+            continue
+        event = MARKET_EVENT_TOPICS.get(_as_bytes(topics[0]))
+        if event is None or (names is not None and event[0] not in names):
+            continue
+        if address is not None and _as_bytes(log["address"]) != address:
+            continue
+        yield event[1](_as_bytes(log["data"]))
+
+
+def find_market_event(logs: Iterable[Dict[str, Any]], name: str, address: Optional[str] = None) -> Optional[Any]:
+    """The first `name` event among `logs`, or None."""
+    return next(decode_market_logs(logs, (name,), address), None)
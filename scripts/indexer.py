@@ -0,0 +1,300 @@
+import os
+import json
+import sqlite3
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from eth_utils import to_checksum_address, to_hex
+from hexbytes import HexBytes
+from web3.exceptions import BlockNotFound, Web3Exception
+from scripts.events import EventDecoder
+from scripts.utils import base_dir, load_abi
+
+MARKET_EVENTS = (
+    "MarketInitialized",
+    "MarketAsserted",
+    "MarketResolved",
+    "MarketAssertionRejected",
+    "TokensCreated",
+    "TokensRedeemed",
+    "TokensSettled",
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    block_number INTEGER NOT NULL,
+    log_index INTEGER NOT NULL,
+    tx_hash TEXT NOT NULL,
+    address TEXT NOT NULL,
+    event TEXT NOT NULL,
+    market_id TEXT,
+    account TEXT,
+    args TEXT NOT NULL,
+    PRIMARY KEY (block_number, log_index)
+);
+CREATE INDEX IF NOT EXISTS events_by_market ON events (market_id, block_number);
+CREATE TABLE IF NOT EXISTS blocks (
+    address TEXT NOT NULL,
+    block_number INTEGER NOT NULL,
+    block_hash TEXT NOT NULL,
+    PRIMARY KEY (address, block_number)
+);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    address TEXT PRIMARY KEY,
+    block_number INTEGER NOT NULL
+);
+"""
+
+
+def _to_json(value: Any) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        return to_hex(value)
+    if isinstance(value, int) and not isinstance(value, bool) and value.bit_length() > 53:
+        return str(value)  # Keep wei amounts exact for JSON consumers.
+    return value
+
+
+class EventStore:
+    """SQLite store of decoded events, block hashes and the indexing checkpoint, per indexed address."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = sqlite3.connect(path)
+        self._migrate_blocks()
+        self.connection.executescript(SCHEMA)
+
+    def _migrate_blocks(self):
+        """Give block hashes recorded before they were kept per address to every checkpointed address."""
+        columns = [row[1] for row in self.connection.execute("PRAGMA table_info(blocks)")]
+        if not columns or "address" in columns:
+            return
+        with self.connection:
+            self.connection.execute("ALTER TABLE blocks RENAME TO blocks_unscoped")
+            self.connection.executescript(SCHEMA)
+            self.connection.execute(
+                "INSERT INTO blocks SELECT checkpoint.address, blocks_unscoped.block_number, blocks_unscoped.block_hash"
+                " FROM blocks_unscoped JOIN checkpoint ON blocks_unscoped.block_number <= checkpoint.block_number"
+            )
+            self.connection.execute("DROP TABLE blocks_unscoped")
+
+    def close(self):
+        self.connection.close()
+
+    def get_checkpoint(self, address: str) -> Optional[int]:
+        row = self.connection.execute(
+            "SELECT block_number FROM checkpoint WHERE address = ?", (address,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def get_block_hash(self, address: str, block_number: int) -> Optional[str]:
+        row = self.connection.execute(
+            "SELECT block_hash FROM blocks WHERE address = ? AND block_number = ?", (address, block_number)
+        ).fetchone()
+        return row[0] if row else None
+
+    def recorded_blocks(self, address: str, below: int, limit: int) -> List[Tuple[int, str]]:
+        """Return up to `limit` (block_number, block_hash) pairs recorded for `address` at or below `below`, newest first."""
+        return self.connection.execute(
+            "SELECT block_number, block_hash FROM blocks WHERE address = ? AND block_number <= ?"
+            " ORDER BY block_number DESC LIMIT ?",
+            (address, below, limit),
+        ).fetchall()
+
+    def commit_range(
+        self,
+        address: str,
+        rows: List[Tuple],
+        block_hashes: Dict[int, str],
+        checkpoint: int,
+    ):
+        """Write the events and block hashes of one indexed range and advance the checkpoint atomically."""
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self.connection.executemany(
+                "INSERT OR REPLACE INTO blocks VALUES (?, ?, ?)",
+                [(address, block_number, block_hash) for block_number, block_hash in block_hashes.items()],
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO checkpoint VALUES (?, ?)", (address, checkpoint)
+            )
+
+    def rollback_to(self, address: str, block_number: int):
+        """Drop everything indexed for `address` after `block_number`."""
+        with self.connection:
+            self.connection.execute(
+                "DELETE FROM events WHERE address = ? AND block_number > ?", (address, block_number)
+            )
+            self.connection.execute(
+                "DELETE FROM blocks WHERE address = ? AND block_number > ?", (address, block_number)
+            )
+            self.connection.execute(
+                "INSERT OR REPLACE INTO checkpoint VALUES (?, ?)", (address, block_number)
+            )
+
+    def events(self, market_id: Optional[str] = None, event: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT block_number, log_index, tx_hash, event, market_id, account, args FROM events"
+        clauses, params = [], []
+        if market_id is not None:
+            clauses.append("market_id = ?")
+            params.append(to_hex(HexBytes(market_id)))
+        if event is not None:
+            clauses.append("event = ?")
+            params.append(event)
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY block_number, log_index"
+        return [
+            {
+                "block_number": row[0],
+                "log_index": row[1],
+                "tx_hash": row[2],
+                "event": row[3],
+                "market_id": row[4],
+                "account": row[5],
+                "args": json.loads(row[6]),
+            }
+            for row in self.connection.execute(query, params)
+        ]
+
+
+class MarketEventIndexer:
+    """Incrementally indexes `PredictionMarket` events into an `EventStore`.
+
+    Logs are fetched with `eth_getLogs` in block ranges that grow while responses stay small
+    and shrink when the node rejects a range or returns too many logs. Every range is written
+    together with its checkpoint, so an interrupted sync resumes where it stopped.
+
+    Before each sync the hash recorded for the checkpoint block is compared with the chain. On
+    a mismatch the indexer walks back through the recorded hashes (at most `max_reorg_depth`
+    blocks) to the newest block still on the canonical chain and discards everything after it.
+    """
+
+    def __init__(
+        self,
+        web3,
+        address: str,
+        store: EventStore,
+        abi: Optional[List[Dict[str, Any]]] = None,
+        event_names: Iterable[str] = MARKET_EVENTS,
+        start_block: int = 0,
+        confirmations: int = 0,
+        initial_chunk: int = 1_000,
+        max_chunk: int = 50_000,
+        target_logs_per_chunk: int = 5_000,
+        max_reorg_depth: int = 64,
+    ):
+        self.web3 = web3
+        self.address = web3.to_checksum_address(address)
+        self.store = store
+        self.decoder = EventDecoder(
+            abi if abi is not None else load_abi("../.build/abi/PredictionMarket.json"),
+            event_names,
+        )
+        self.start_block = start_block
+        self.confirmations = confirmations
+        self.chunk = initial_chunk
+        self.max_chunk = max_chunk
+        self.target_logs_per_chunk = target_logs_per_chunk
+        self.max_reorg_depth = max_reorg_depth
+
+    def _block_hash(self, block_number: int) -> Optional[str]:
+        try:
+            return to_hex(self.web3.eth.get_block(block_number)["hash"])
+        except BlockNotFound:
+            return None  # The chain is now shorter than what was indexed.
+
+    def _get_logs(self, from_block: int, to_block: int) -> List[Dict[str, Any]]:
+        return self.web3.eth.get_logs({
+            "address": self.address,
+            "fromBlock": from_block,
+            "toBlock": to_block,
+            "topics": [self.decoder.topics],
+        })
+
+    def _row(self, log: Dict[str, Any]) -> Tuple:
+        name, args = self.decoder.decode(log)
+        market_id = args.get("market_id")
+        return (
+            log["blockNumber"],
+            log["logIndex"],
+            to_hex(log["transactionHash"]),
+            self.address,
+            name,
+            to_hex(market_id) if market_id is not None else None,
+            args.get("account"),
+            json.dumps({key: _to_json(value) for key, value in args.items()}),
+        )
+
+    def handle_reorg(self) -> Optional[int]:
+        """Roll back past any reorganized blocks. Returns the block rolled back to, if any."""
+        checkpoint = self.store.get_checkpoint(self.address)
+        if checkpoint is None:
+            return None
+        recorded = self.store.get_block_hash(self.address, checkpoint)
+        if recorded is None or recorded == self._block_hash(checkpoint):
+            return None
+
+        safe_block = max(checkpoint - self.max_reorg_depth, self.start_block - 1)
+        for block_number, block_hash in self.store.recorded_blocks(self.address, checkpoint - 1, self.max_reorg_depth):
+            if block_number <= safe_block:
+                break
+            if block_hash == self._block_hash(block_number):
+                safe_block = block_number
+                break
+        self.store.rollback_to(self.address, safe_block)
+        return safe_block
+
+    def sync(self, to_block: Optional[int] = None) -> int:
+        """Index up to `to_block` (default: latest block minus `confirmations`). Returns the number of logs stored."""
+        self.handle_reorg()
+        if to_block is None:
+            to_block = self.web3.eth.block_number - self.confirmations
+
+        checkpoint = self.store.get_checkpoint(self.address)
+        start = self.start_block if checkpoint is None else checkpoint + 1
+        indexed = 0
+        while start <= to_block:
+            end = min(start + self.chunk - 1, to_block)
+            try:
+                logs = self._get_logs(start, end)
+            except (ValueError, Web3Exception):
+                # Range too large for the node (response size or log count limit).
+                if self.chunk == 1:
+                    raise
+                self.chunk = max(self.chunk // 2, 1)
+                continue
+            if len(logs) > self.target_logs_per_chunk and self.chunk > 1:
+                self.chunk = max(self.chunk // 2, 1)
+                continue
+
+            block_hashes = {log["blockNumber"]: to_hex(log["blockHash"]) for log in logs}
+            block_hashes[end] = self._block_hash(end)
+            self.store.commit_range(self.address, [self._row(log) for log in logs], block_hashes, end)
+            indexed += len(logs)
+
+            if len(logs) < self.target_logs_per_chunk // 2:
+                self.chunk = min(self.chunk * 2, self.max_chunk)
+            start = end + 1
+        return indexed
+
+
+def main():
+    from ape import chain
+    from scripts.registry import DeploymentRegistry
+
+    registry = DeploymentRegistry(namespace=os.getenv("DEPLOYMENTS_NAMESPACE"))
+    store = EventStore(os.getenv("INDEXER_DB", os.path.join(base_dir, "market_events.db")))
+    indexer = MarketEventIndexer(
+        chain.provider.web3,
+        registry.get("market_address"),
+        store,
+        start_block=int(os.getenv("INDEXER_START_BLOCK", "0")),
+        confirmations=int(os.getenv("INDEXER_CONFIRMATIONS", "0")),
+    )
+    indexed = indexer.sync()
+    print(f"Indexed {indexed} logs up to block {store.get_checkpoint(indexer.address)}")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Run several `scripts/market.py` steps in one process.
+
+`APE_METHOD=<step> ape run market` pays for importing ape and its plugins, loading the project,
+unlocking the accounts and connecting to the provider on every step. This runner does that once
+and then runs the steps in order with a single `PredictionMarketManager`, so the contract cache
+and the registry are shared. Steps and the scenario file are validated before ape is imported,
+which keeps `--help` and typos fast.
+
+Run: `python -m scripts.lifecycle init create redeem trade assert settle_assertion settle_tokens balances`
+     `python -m scripts.lifecycle --scenario scenario.json`
+
+A scenario file is a JSON list of steps, or an object with `steps` and optionally `network`.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+
+# APE_METHOD value -> PredictionMarketManager method
+STEPS = {
+    "get_addresses": "get_addresses",
+    "deploy_market": "deploy_prediction_market",
+    "init": "init_market",
+    "create": "create_outcome_tokens",
+    "redeem": "redeem_outcome_tokens",
+    "trade": "simulate_trade",
+    "assert": "assert_market",
+    "settle_assertion": "settle_assertion",
+    "settle_due": "settle_assertions",
+    "settle_tokens": "settle_outcome_tokens",
+    "balances": "display_all_final_token_balances",
+}
+
+LIFECYCLE = ["init", "create", "redeem", "trade", "assert", "settle_assertion", "settle_tokens", "balances"]
+
+
+def parse_steps(values):
+    """Split comma separated step lists and reject unknown steps."""
+    steps = [step.strip() for value in values for step in value.split(",") if step.strip()]
+    unknown = [step for step in steps if step not in STEPS]
+    if unknown:
+        raise ValueError(f"Unknown step(s): {', '.join(unknown)}. Choose from: {', '.join(STEPS)}")
+    return steps
+
+
+def load_scenario(path):
+    """Return the (steps, network) of a scenario file; network may be None."""
+    with open(path, "r") as file:
+        scenario = json.load(file)
+    if isinstance(scenario, list):
+        scenario = {"steps": scenario}
+    return parse_steps(scenario.get("steps", [])), scenario.get("network")
+
+
+def run_steps(manager, steps):
+    """
+    Run `steps` with `manager`, writing the registry after each step so that completed steps
+    are kept if a later one fails. Returns the seconds spent in each step.
+    """
+    timings = []
+    for step in steps:
+        start = time.perf_counter()
+        with manager.registry.transaction():
+            getattr(manager, STEPS[step])()
+        timings.append((step, time.perf_counter() - start))
+    return timings
+
+
+def main(argv=None):
+    start = time.perf_counter()
+    parser = argparse.ArgumentParser(
+        description="Run several scripts/market.py steps in one process.",
+        epilog=f"Steps: {', '.join(STEPS)}. 'lifecycle' expands to: {' '.join(LIFECYCLE)}.",
+    )
+    parser.add_argument("steps", nargs="*", help="steps to run in order (space or comma separated)")
+    parser.add_argument("--scenario", help="JSON scenario file with the steps (and network)")
+    parser.add_argument("--network", help="ape network choice (default: APE_NETWORK or ethereum:local:foundry)")
+    args = parser.parse_args(argv)
+
+    values = [value for step in args.steps for value in (LIFECYCLE if step == "lifecycle" else [step])]
+    try:
+        steps = parse_steps(values)
+        network = None
+        if args.scenario:
+            scenario_steps, network = load_scenario(args.scenario)
+            steps = scenario_steps + steps
+    except (ValueError, OSError) as err:
+        parser.error(str(err))
+    if not steps:
+        parser.error("no steps given")
+    network = args.network or network or os.getenv("APE_NETWORK", "ethereum:local:foundry")
+
+    from ape import networks
+    from scripts.market import PredictionMarketManager
+
+    with networks.parse_network_choice(network):
+        manager = PredictionMarketManager()
+        startup = time.perf_counter() - start
+        try:
+            timings = run_steps(manager, steps)
+        finally:
+            manager.metrics.export_from_env()
+
+    print(f"startup (imports, provider, accounts): {startup:.2f}s")
+    for step, seconds in timings:
+        print(f"{step:<18} {seconds:.2f}s")
+    print(f"total: {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,38 +1,152 @@
 import os
 from ape import accounts, project, chain
 from hexbytes import HexBytes
-from scripts.utils import edit_value, get_value
+from scripts.registry import DeploymentRegistry
+from scripts.cache import contracts as contract_cache
+from scripts.events import find_market_event
+from scripts.metrics import instrumented, metrics as default_metrics
+from scripts.permit import sign_permit
+from scripts.pipeline import TransactionPipeline
+from scripts.scheduler import SettlementScheduler
+from scripts.lifecycle import parse_steps, run_steps
 from scripts import constants
 
 
+def _market_id(manager):
+    """Market the single market operations work on, as recorded in the registry."""
+    return manager.registry.get("market_id", None)
+
+
 class PredictionMarketManager:
-    def __init__(self):
+    def __init__(self, registry=None, contracts=None, async_mode=None, metrics=None, permit_mode=None):
+        self.registry = registry or DeploymentRegistry(namespace=os.getenv("DEPLOYMENTS_NAMESPACE"))
+        self.contracts = contracts if contracts is not None else contract_cache
+        # Wall time, gas and RPC traffic of every operation, see scripts/metrics.py.
+        self.metrics = metrics or default_metrics
+        self.metrics.watch(chain.provider.web3)
+        # Submit independent transactions concurrently through a TransactionPipeline.
+        self.async_mode = os.getenv("APE_ASYNC") == "1" if async_mode is None else async_mode
+        # Approve currency pulls with signed EIP-2612 permits instead of approve transactions, see scripts/permit.py.
+        self.permit_mode = os.getenv("APE_PERMIT") == "1" if permit_mode is None else permit_mode
         self.deployer = accounts.load("account1")
         self.user = accounts.load("account2")
         self.asserter_wallet = accounts.load("account3")
-        self.finder = get_value("finder_address")
-        self.oov3 = get_value("OOV3_address")
-        self.currency = get_value("currency_address")
-        self.ancillary = get_value("ancillary_data_address")
-        self.address_whitelist = get_value("address_whitelist")
+        self.finder = self.registry.get("finder_address")
+        self.oov3 = self.registry.get("OOV3_address")
+        self.currency = self.registry.get("currency_address")
+        self.ancillary = self.registry.get("ancillary_data_address")
+        self.address_whitelist = self.registry.get("address_whitelist")
+
+    def pipeline(self):
+        """A new TransactionPipeline on the connected provider."""
+        return TransactionPipeline(chain.provider.web3)
+
+    def _add_allocate_and_approve(self, pipeline, wallet, amount, prefix=""):
+        """Add the allocate and approve steps of `wallet` to `pipeline`. Returns their step names."""
+        token = self.contracts.at(project.TestERC20, self.currency)
+        return [
+            pipeline.add_call(f"{prefix}allocate", token.allocateTo, wallet, amount, sender=wallet),
+            pipeline.add_call(
+                f"{prefix}approve", token.approve, self.registry.get("market_address"), amount, sender=wallet
+            ),
+        ]
 
     def _allocate_and_approve_tokens(self, wallet, amount):
         """Allocate and approve tokens for the wallet."""
-        _address = get_value("market_address")
-        token = project.TestERC20.at(self.currency, fetch_from_explorer=False)
+        if self.async_mode:
+            pipeline = self.pipeline()
+            self._add_allocate_and_approve(pipeline, wallet, amount)
+            pipeline.run()
+            return
+
+        _address = self.registry.get("market_address")
+        token = self.contracts.at(project.TestERC20, self.currency)
         token.allocateTo(wallet, amount, sender=wallet)
         token.approve(_address, amount, sender=wallet)
 
+    def _allocate_and_permit_tokens(self, wallet, amount):
+        """
+        Allocate tokens for the wallet and return its signed permit of `amount` to the market, or allocate
+        and approve them and return None when permits are not used.
+        """
+        if not self.permit_mode:
+            self._allocate_and_approve_tokens(wallet, amount)
+            return None
+
+        token = self.contracts.at(project.TestERC20, self.currency)
+        token.allocateTo(wallet, amount, sender=wallet)
+        return sign_permit(wallet, token, self.registry.get("market_address"), amount)
+
+    @instrumented()
+    def get_market_states(self, market_ids, wallets):
+        """
+        Read markets together with the outcome and currency balances of `wallets` through
+        `get_market_states`, one call per page of `constants.max_view_markets` markets and
+        `constants.max_view_accounts` wallets.
+
+        Returns a list with one `(market, outcome1_balances, outcome2_balances)` tuple per market
+        and the list of currency balances of `wallets`.
+        """
+        pred_market = self.contracts.at(project.PredictionMarket, self.registry.get("market_address"))
+        market_ids = [HexBytes(_id) for _id in market_ids]
+        wallets = list(wallets)
+
+        states = []
+        currency_balances = []
+        for account_start in range(0, max(len(wallets), 1), constants.max_view_accounts):
+            page_wallets = wallets[account_start:account_start + constants.max_view_accounts]
+            for market_start in range(0, max(len(market_ids), 1), constants.max_view_markets):
+                page_ids = market_ids[market_start:market_start + constants.max_view_markets]
+                page_states, page_currency = pred_market.get_market_states(page_ids, page_wallets)
+                for index, state in enumerate(page_states):
+                    position = market_start + index
+                    if account_start == 0:
+                        states.append((state.market, list(state.outcome1_balances), list(state.outcome2_balances)))
+                    else:
+                        states[position][1].extend(state.outcome1_balances)
+                        states[position][2].extend(state.outcome2_balances)
+                if market_start == 0:
+                    currency_balances.extend(page_currency)
+
+        return states, currency_balances
+
+    @instrumented()
+    def list_markets(self, status=constants.market_all):
+        """
+        Read the market index: the `(market_id, status, market)` summary of every market with `status`
+        (`constants.market_open`, `market_asserted`, `market_resolved`, or `market_all` in initialization
+        order), one call per page of `constants.max_page_markets` markets.
+        """
+        pred_market = self.contracts.at(project.PredictionMarket, self.registry.get("market_address"))
+        count = pred_market.get_market_count(status)
+        summaries = []
+        for offset in range(0, count, constants.max_page_markets):
+            summaries.extend(pred_market.get_market_summaries(status, offset, constants.max_page_markets))
+        return summaries
+
+    def _balances(self, *wallets):
+        """
+        Return `(outcome1, outcome2, currency)` balances of each wallet for the current market in a single call.
+        """
+        market_id = self.registry.get("market_id", None)
+        states, currency_balances = self.get_market_states([market_id] if market_id else [], wallets)
+        if not states:
+            return [(0, 0, balance) for balance in currency_balances]
+        _, outcome1_balances, outcome2_balances = states[0]
+        return list(zip(outcome1_balances, outcome2_balances, currency_balances))
+
+    @instrumented()
     def get_addresses(self):
         """Retrieve and print addresses."""
-        oov3_address = project.FinderContract.at(self.finder, fetch_from_explorer=False).getImplementationAddress(
+        oov3_address = self.contracts.at(project.FinderContract, self.finder).getImplementationAddress(
             constants.OptimisticOracleV3,
             sender=self.deployer
         )
-        default_currency = project.OOV3.at(self.oov3, fetch_from_explorer=False).defaultCurrency()
+        default_currency = self.contracts.at(project.OOV3, self.oov3).defaultCurrency()
         print(f"OptimisticOracleV3 address: {oov3_address}")
         print(f"Currency: {default_currency}")
 
+    @instrumented()
     def deploy_prediction_market(self):
         """Deploy the prediction market contract."""
 
@@ -43,17 +157,27 @@ class PredictionMarketManager:
             "EXT",
             18
         )
-        edit_value("expanded_token_blueprint_address", expanded_token_blueprint.contract_address)
+        self.registry.set("expanded_token_blueprint_address", expanded_token_blueprint.contract_address)
+
+        # deploy expanded token implementation for minimal proxy clones
+        expanded_token_implementation = self.contracts.add(self.deployer.deploy(
+            project.ExpandedERC20,
+            "Expanded Token",
+            "EXT",
+            18
+        ))
+        self.registry.set("expanded_token_implementation_address", expanded_token_implementation.address)
 
         # deploy outcome token factory
-        outcome_token_factory = self.deployer.deploy(
+        outcome_token_factory = self.contracts.add(self.deployer.deploy(
             project.OutComeTokenFactory,
-            expanded_token_blueprint.contract_address
-        )
-        edit_value("outcome_token_factory_address", outcome_token_factory.address)
+            expanded_token_blueprint.contract_address,
+            expanded_token_implementation.address
+        ))
+        self.registry.set("outcome_token_factory_address", outcome_token_factory.address)
 
         # deploy the prediction market
-        contract = self.deployer.deploy(
+        contract = self.contracts.add(self.deployer.deploy(
             project.PredictionMarket,
             self.finder,
             self.address_whitelist,
@@ -62,216 +186,304 @@ class PredictionMarketManager:
             self.currency,
             outcome_token_factory.address
             
-        )
-        edit_value("market_address", contract.address)
+        ))
+        self.registry.set("market_address", contract.address)
         print(f"Market deployed at: {contract.address}")
 
         # whitelist market contract
         outcome_token_factory.whitelist(contract.address, sender=self.deployer)
 
 
+    @instrumented(_market_id)
     def init_market(self):
         """Initialize the prediction market."""
     
         # Load the deployed contract
-        _address = get_value("market_address")
+        _address = self.registry.get("market_address")
         
-        # Mint and approve tokens for the market
-        self._allocate_and_approve_tokens(self.deployer, constants.reward)
-        token = project.TestERC20.at(self.currency, fetch_from_explorer=False)
-        print(f"Deployer Balance before market Initialization: {contract_balance}")
+        # Mint and approve (or sign a permit of) tokens for the market
+        permit = self._allocate_and_permit_tokens(self.deployer, constants.reward)
+        (_, _, balance), = self._balances(self.deployer)
+        print(f"Deployer Balance before market Initialization: {balance / 1e18}")
 
-        pred_market = project.PredictionMarket.at(_address, fetch_from_explorer=False)
+        pred_market = self.contracts.at(project.PredictionMarket, _address)
     
         # Call the initialize_market function
-        receipt = pred_market.initialize_market(
-            constants.outcome_one,
-            constants.outcome_two,
-            constants.description,
-            constants.reward,
-            constants.required_bond,
-            sender=self.deployer
-        )
-        
-        contract_balance = token.balanceOf(_address)
-        print(f"Deployer Balance after market Initialization: {contract_balance}")
+        args = (constants.outcome_one, constants.outcome_two, constants.description, constants.reward, constants.required_bond)
+        if permit is None:
+            receipt = pred_market.initialize_market(*args, sender=self.deployer)
+        else:
+            receipt = pred_market.initialize_market_with_permit(*args, *permit, sender=self.deployer)
     
-        # Decode logs to find the MarketInitialized event
-        decoded_logs = receipt.decode_logs()
-        for log in decoded_logs:
-            if log.event_name == "MarketInitialized":
-                # extract the market_id
-                _market_id = log.market_id.hex()
-                edit_value("market_id", _market_id)
-
-                # extract the outcome token addresses
-                outcome_token_one = log.outcome1_token
-                edit_value("outcome1_token_address", outcome_token_one)
-                outcome_token_two = log.outcome2_token
-                edit_value("outcome2_token_address", outcome_token_two)
-                break
+        # Decode only the MarketInitialized event, skipping the token deployment logs
+        event = find_market_event(receipt.logs, "MarketInitialized", pred_market.address)
+        if event is not None:
+            # extract the market_id
+            _market_id = HexBytes(event.market_id).hex()
+            self.registry.set("market_id", _market_id)
+
+            # extract the outcome token addresses
+            self.registry.set("outcome1_token_address", event.outcome1_token)
+            self.registry.set("outcome2_token_address", event.outcome2_token)
+
+        (_, _, balance), (_, _, contract_balance) = self._balances(self.deployer, _address)
+        print(f"Deployer Balance after market Initialization: {balance / 1e18}")
+        print(f"Market contract balance after market Initialization: {contract_balance / 1e18}")
+
+    @instrumented()
+    def init_markets(self, specs):
+        """
+        Initialize many markets with `initialize_markets`, sending at most `constants.max_batch_markets`
+        markets per transaction. Each spec is a dict with `outcome1`, `outcome2`, `description`, `reward`
+        and `required_bond` keys. Returns the (market_id, outcome1_token, outcome2_token) of every market.
+        """
+        _address = self.registry.get("market_address")
+        pred_market = self.contracts.at(project.PredictionMarket, _address)
+
+        # Mint and approve the rewards of all markets at once
+        self._allocate_and_approve_tokens(self.deployer, sum(spec["reward"] for spec in specs))
 
+        markets = []
+        for start in range(0, len(specs), constants.max_batch_markets):
+            batch = specs[start:start + constants.max_batch_markets]
+            receipt = pred_market.initialize_markets(batch, sender=self.deployer)
+            for log in pred_market.MarketInitialized.from_receipt(receipt):
+                markets.append((log.market_id.hex(), log.outcome1_token, log.outcome2_token))
+            print(f"Initialized {len(batch)} markets, gas used: {receipt.gas_used}")
+
+        return markets
+
+    @instrumented(_market_id)
     def create_outcome_tokens(self):
         """Create the outcome tokens."""
 
-        _address = get_value("market_address")
-        _id = get_value("market_id")
+        _address = self.registry.get("market_address")
+        _id = self.registry.get("market_id")
         _market_id = HexBytes(_id)
 
-        # Mint and approve currency tokens for use
-        token = project.TestERC20.at(self.currency, fetch_from_explorer=False)
-        self._allocate_and_approve_tokens(self.deployer, constants.amount)
-        balance = token.balanceOf(self.deployer)
+        # Mint and approve (or sign a permit of) currency tokens for use
+        permit = self._allocate_and_permit_tokens(self.deployer, constants.amount)
+        [(market, _, _)], [balance] = self.get_market_states([_market_id], [self.deployer])
         print(f"Deployer's currency balance before creating outcome tokens: {balance / 1e18}")
+        print("Market Struct: ", market) # visually confirm market was initialized.
 
-        pred_market = project.PredictionMarket.at(_address, fetch_from_explorer=False)
-        print("Market Struct: ", pred_market.markets(_market_id)) # visually confirm market was initialized.
-
-        pred_market.create_outcome_tokens(_market_id, constants.amount, sender=self.deployer)
-        balance = token.balanceOf(self.deployer)
-        print(f"Deployer's currency balance after creating outcome tokens: {balance / 1e18}")
+        pred_market = self.contracts.at(project.PredictionMarket, _address)
+        if permit is None:
+            pred_market.create_outcome_tokens(_market_id, constants.amount, sender=self.deployer)
+        else:
+            pred_market.create_outcome_tokens_with_permit(_market_id, constants.amount, *permit, sender=self.deployer)
 
-        outcome_token_one = get_value("outcome1_token_address")
-        outcome_token_two = get_value("outcome2_token_address")
-        token_one = project.ExpandedERC20.at(outcome_token_one, fetch_from_explorer=False)
-        token_two = project.ExpandedERC20.at(outcome_token_two, fetch_from_explorer=False)
-        
         # With an amount 10,000 units of default_currency we get 10,000 outcome1_token and 10,000 outcome2_token tokens
-        balance_one = token_one.balanceOf(self.deployer)
-        balance_two = token_two.balanceOf(self.deployer)
+        (balance_one, balance_two, balance), = self._balances(self.deployer)
+        print(f"Deployer's currency balance after creating outcome tokens: {balance / 1e18}")
         print(f"Outcome token 1 balance: {balance_one / 1e18}")
         print(f"Outcome token 2 balance: {balance_two / 1e18}")
     
+    def _chunks(self, items):
+        items = list(items)
+        for start in range(0, len(items), constants.max_batch_markets):
+            yield items[start:start + constants.max_batch_markets]
+
+    @instrumented()
+    def create_outcome_tokens_batch(self, positions, wallet=None):
+        """
+        Create outcome tokens in several markets with `create_outcome_tokens_batch`, at most
+        `constants.max_batch_markets` markets per transaction. `positions` is a list of
+        (market_id, amount) pairs. Returns the receipts.
+        """
+        wallet = wallet or self.deployer
+        positions = [(HexBytes(_id), amount) for _id, amount in positions]
+        pred_market = self.contracts.at(project.PredictionMarket, self.registry.get("market_address"))
+
+        # Mint and approve the currency of all positions at once
+        self._allocate_and_approve_tokens(wallet, sum(amount for _, amount in positions))
+
+        receipts = []
+        for batch in self._chunks(positions):
+            receipts.append(pred_market.create_outcome_tokens_batch(batch, sender=wallet))
+            print(f"Created outcome tokens in {len(batch)} markets, gas used: {receipts[-1].gas_used}")
+        return receipts
+
+    @instrumented()
+    def redeem_outcome_tokens_batch(self, positions, wallet=None):
+        """
+        Redeem outcome tokens in several markets with `redeem_outcome_tokens_batch`, at most
+        `constants.max_batch_markets` markets per transaction. `positions` is a list of
+        (market_id, amount) pairs. Returns the receipts.
+        """
+        wallet = wallet or self.deployer
+        positions = [(HexBytes(_id), amount) for _id, amount in positions]
+        pred_market = self.contracts.at(project.PredictionMarket, self.registry.get("market_address"))
+
+        receipts = []
+        for batch in self._chunks(positions):
+            receipts.append(pred_market.redeem_outcome_tokens_batch(batch, sender=wallet))
+            print(f"Redeemed outcome tokens in {len(batch)} markets, gas used: {receipts[-1].gas_used}")
+        return receipts
+
+    @instrumented()
+    def settle_outcome_tokens_batch(self, market_ids, wallet=None):
+        """
+        Settle all outcome tokens of `wallet` in several resolved markets with `settle_outcome_tokens_batch`,
+        at most `constants.max_batch_markets` markets per transaction. Returns the total payout.
+        """
+        wallet = wallet or self.deployer
+        pred_market = self.contracts.at(project.PredictionMarket, self.registry.get("market_address"))
+
+        payout = 0
+        for batch in self._chunks(HexBytes(_id) for _id in market_ids):
+            receipt = pred_market.settle_outcome_tokens_batch(batch, sender=wallet)
+            payout += sum(log.payout for log in pred_market.TokensSettled.from_receipt(receipt))
+            print(f"Settled outcome tokens in {len(batch)} markets, gas used: {receipt.gas_used}")
+        return payout
+
+    @instrumented(_market_id)
     def redeem_outcome_tokens(self):
         """
         At any point before the market is settled we can redeem outcome tokens. 
         By redeeming an amount we are burning the same amount of outcome_token_one 
         and outcome_token_two to receive that amount of default_currency(currency).
         """
-        _id = get_value("market_id")
+        _id = self.registry.get("market_id")
         _market_id = HexBytes(_id)
-        _address = get_value("market_address")
-        outcome_token_one = get_value("outcome1_token_address")
-        outcome_token_two = get_value("outcome2_token_address")
+        _address = self.registry.get("market_address")
 
-        pred_market = project.PredictionMarket.at(_address, fetch_from_explorer=False)
+        pred_market = self.contracts.at(project.PredictionMarket, _address)
         pred_market.redeem_outcome_tokens(_market_id, constants.redeem_amount, sender=self.deployer)
 
         # After redeeming 5,000 tokens we can see how both balances of outcome_token_one 
         # and outcome_token_two have decreased by 5,000 and default_currency(currency) has increased that same amount.
-        token_one = project.ExpandedERC20.at(outcome_token_one, fetch_from_explorer=False)
-        token_two = project.ExpandedERC20.at(outcome_token_two, fetch_from_explorer=False)
-        token = project.TestERC20.at(self.currency, fetch_from_explorer=False)
-
-        balance_one = token_one.balanceOf(self.deployer)
-        balance_two = token_two.balanceOf(self.deployer)
-        balance = token.balanceOf(self.deployer)
+        (balance_one, balance_two, balance), = self._balances(self.deployer)
         print(f"Outcome token 1 balance: {balance_one / 1e18}")
         print(f"Outcome token 2 balance: {balance_two / 1e18}")
         print(f"Deployer's currency balance after redeeming tokens: {balance / 1e18}")
 
+    @instrumented(_market_id)
     def simulate_trade(self):
         """
         Transfer the remaining 5,000 outcome_token_one tokens to another(user) account.
         """
-        outcome_token_one = get_value("outcome1_token_address")
+        outcome_token_one = self.registry.get("outcome1_token_address")
 
-        token_one = project.ExpandedERC20.at(outcome_token_one, fetch_from_explorer=False)
+        token_one = self.contracts.at(project.ExpandedERC20, outcome_token_one)
         token_one.transfer(self.user, constants.transfer_amount, sender=self.deployer)
-        balance_one = token_one.balanceOf(self.user)
+        (balance_one, _, _), = self._balances(self.user)
         print(f"User's outcome token 1 balance: {balance_one / 1e18}")
 
+    @instrumented(_market_id)
     def assert_market(self):
         """
         Assert the market state.
         """
-        _id = get_value("market_id")
+        _id = self.registry.get("market_id")
         _market_id = HexBytes(_id)
-        _address = get_value("market_address")
+        _address = self.registry.get("market_address")
 
-        # Mint and approve currency tokens for the asserter
-        token = project.TestERC20.at(self.currency, fetch_from_explorer=False)
-        self._allocate_and_approve_tokens(self.asserter_wallet, constants.required_bond)
-        balance = token.balanceOf(self.asserter_wallet)
+        # Mint and approve (or sign a permit of) currency tokens for the asserter
+        permit = self._allocate_and_permit_tokens(self.asserter_wallet, constants.required_bond)
+        (_, _, balance), = self._balances(self.asserter_wallet)
         print(f"Asserter's balance before market assertion: {balance / 1e18}")
 
-        pred_market = project.PredictionMarket.at(_address, fetch_from_explorer=False)
-        receipt = pred_market.assert_market(_market_id, constants.outcome_one, sender=self.asserter_wallet) # assert market
+        pred_market = self.contracts.at(project.PredictionMarket, _address)
+        if permit is None:
+            receipt = pred_market.assert_market(_market_id, constants.outcome_one, sender=self.asserter_wallet) # assert market
+        else:
+            receipt = pred_market.assert_market_with_permit(
+                _market_id, constants.outcome_one, *permit, sender=self.asserter_wallet
+            )
 
-        balance = token.balanceOf(self.asserter_wallet)
+        (_, _, balance), = self._balances(self.asserter_wallet)
         print(f"Asserter's balance after market assertion: {balance / 1e18}")
 
         _id = receipt.return_value
-        edit_value("assertion_id", _id.hex())
+        self.registry.set("assertion_id", _id.hex())
 
+    @instrumented(_market_id)
     def settle_assertion(self):
         """
         Settle assertion in OOV3
         """
         chain.pending_timestamp += constants.duration # increase timestamp by 2 hours
 
-        _id = HexBytes(get_value("assertion_id"))
-        assertion = project.OOV3.at(self.oov3, fetch_from_explorer=False)
+        _id = HexBytes(self.registry.get("assertion_id"))
+        assertion = self.contracts.at(project.OOV3, self.oov3)
 
         assertion.settleAssertion(_id, sender=self.deployer)
 
         # Print the assertion state
         print(f"Assertion State: {assertion.assertions(_id)}")
 
-        currency = project.TestERC20.at(self.currency, fetch_from_explorer=False)
-        balance = currency.balanceOf(self.asserter_wallet)
+        (_, _, balance), = self._balances(self.asserter_wallet)
         print(f"Asserter's balance after settling assertion: {balance / 1e18}")
 
+    @instrumented()
+    def settle_assertions(self):
+        """
+        Settle every assertion of the market whose liveness has passed, in batches (see scripts/scheduler.py).
+        """
+        oov3 = self.contracts.at(project.OOV3, self.oov3)
+        scheduler = SettlementScheduler(
+            chain.provider.web3,
+            self.registry.get("market_address"),
+            oov3.address,
+            lambda calls: oov3.multicall(calls, sender=self.deployer),
+            sender=self.deployer.address,
+            start_block=int(os.getenv("INDEXER_START_BLOCK", "0")),
+        )
+        settled = scheduler.run_once()
+        stats = scheduler.stats()
+        print(f"Settled {len(settled)} assertions in {stats['batches']} transactions, {stats['queue_depth']} still pending")
+
+    @instrumented(_market_id)
     def settle_outcome_tokens(self):
         """
         Settle Outcome Tokens
         """
-        pred_market = project.PredictionMarket.at(get_value("market_address"), fetch_from_explorer=False)
-       
-        pred_market.settle_outcome_tokens(HexBytes(get_value("market_id")), sender=self.deployer)
-        pred_market.settle_outcome_tokens(HexBytes(get_value("market_id")), sender=self.user)
+        pred_market = self.contracts.at(project.PredictionMarket, self.registry.get("market_address"))
+        _market_id = HexBytes(self.registry.get("market_id"))
+
+        if self.async_mode:
+            # Both holders settle independently, so their transactions go out together.
+            pipeline = self.pipeline()
+            pipeline.add_call("deployer", pred_market.settle_outcome_tokens, _market_id, sender=self.deployer)
+            pipeline.add_call("user", pred_market.settle_outcome_tokens, _market_id, sender=self.user)
+            pipeline.run()
+            return
+
+        pred_market.settle_outcome_tokens(_market_id, sender=self.deployer)
+        pred_market.settle_outcome_tokens(_market_id, sender=self.user)
         
+    @instrumented()
     def display_all_final_token_balances(self):
         """
         Get final balances for outcome tokens and default currency for all wallets.
         """
-        outcome1_token = project.ExpandedERC20.at(get_value("outcome1_token_address"), fetch_from_explorer=False)
-        outcome2_token = project.ExpandedERC20.at(get_value("outcome2_token_address"), fetch_from_explorer=False)
-        currency = project.TestERC20.at(self.currency, fetch_from_explorer=False)
-
-        print(f"DEPLOYER WALLET BALANCE OUTCOME TOKEN ONE: {outcome1_token.balanceOf(self.deployer) / 1e18}")
-        print(f"DEPLOYER WALLET BALANCE OUTCOME TOKEN TWO: {outcome2_token.balanceOf(self.deployer) / 1e18}")
-        print(f"DEPLOYER WALLET BALANCE DEFAULT CURRENCY: {currency.balanceOf(self.deployer) / 1e18}")
-        print(f"USER BALANCE OUTCOME TOKEN ONE: {outcome1_token.balanceOf(self.user) / 1e18}")
-        print(f"USER BALANCE OUTCOME TOKEN TWO: {outcome2_token.balanceOf(self.user) / 1e18}")
-        print(f"USER BALANCE DEFAULT CURRENCY: {currency.balanceOf(self.user) / 1e18}")
+        deployer, user = self._balances(self.deployer, self.user)
+
+        print(f"DEPLOYER WALLET BALANCE OUTCOME TOKEN ONE: {deployer[0] / 1e18}")
+        print(f"DEPLOYER WALLET BALANCE OUTCOME TOKEN TWO: {deployer[1] / 1e18}")
+        print(f"DEPLOYER WALLET BALANCE DEFAULT CURRENCY: {deployer[2] / 1e18}")
+        print(f"USER BALANCE OUTCOME TOKEN ONE: {user[0] / 1e18}")
+        print(f"USER BALANCE OUTCOME TOKEN TWO: {user[1] / 1e18}")
+        print(f"USER BALANCE DEFAULT CURRENCY: {user[2] / 1e18}")
     
 def main():
-    method_flag = os.getenv("APE_METHOD") # get method flag from environment variable
-    manager = PredictionMarketManager()
-
-    if method_flag == 'get_addresses':
-        manager.get_addresses()
-    elif method_flag == 'deploy_market':
-        manager.deploy_prediction_market()
-    elif method_flag == 'init':
-        manager.init_market()
-    elif method_flag == 'create':
-        manager.create_outcome_tokens()
-    elif method_flag == 'redeem':
-        manager.redeem_outcome_tokens()
-    elif method_flag == 'trade':
-        manager.simulate_trade()
-    elif method_flag == 'assert':
-        manager.assert_market()
-    elif method_flag == 'settle_assertion':
-        manager.settle_assertion()
-    elif method_flag == 'settle_tokens':
-        manager.settle_outcome_tokens()
-    elif method_flag == 'balances':
-        manager.display_all_final_token_balances()
-    else:
+    method_flag = os.getenv("APE_METHOD", "") # get method flag from environment variable
+    try:
+        # Several steps can be given comma separated; see scripts/lifecycle.py to run them without ape run.
+        steps = parse_steps([method_flag])
+    except ValueError:
+        steps = []
+    if not steps:
         print("Invalid method string.")
+        return
+
+    manager = PredictionMarketManager()
+    # Addresses recorded by each operation are written to deployments.json once it completes.
+    try:
+        run_steps(manager, steps)
+    finally:
+        manager.metrics.export_from_env()
 
 if __name__ == "__main__":
     main()
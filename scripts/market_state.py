@@ -0,0 +1,347 @@
+from collections import OrderedDict, namedtuple
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from eth_utils import keccak, to_checksum_address
+from hexbytes import HexBytes
+from scripts.events import EventDecoder
+from scripts.utils import load_abi
+
+STATE_EVENTS = (
+    "MarketInitialized",
+    "MarketAsserted",
+    "MarketResolved",
+    "MarketAssertionRejected",
+)
+
+# Same fields, in the same order, as the contract's `Market` and `MarketDescription` structs.
+Market = namedtuple(
+    "Market",
+    "resolved asserted_outcome_id outcome1_token outcome2_token reward required_bond outcome1_id outcome2_id",
+)
+MarketDescription = namedtuple("MarketDescription", "outcome1 outcome2 description")
+AssertedMarket = namedtuple("AssertedMarket", "asserter market_id")
+
+EMPTY_ID = bytes(32)
+UNRESOLVABLE_ID = keccak(b"Unresolvable")
+MAX_VIEW_MARKETS = 32  # Same as the contract's limit for get_market_states.
+MAX_PAGE_MARKETS = 256  # Same as the contract's page size of the market index.
+MARKET_ALL = 0  # Status filter of the market index listing every market.
+
+# Layout of one record in the fixed width columns.
+_RESOLVED = 0x04  # flag bit, the low two bits hold the asserted outcome
+_ASSERTED_NONE, _ASSERTED_OUTCOME1, _ASSERTED_OUTCOME2, _ASSERTED_UNRESOLVABLE = range(4)
+_TOKENS = 40  # outcome1_token, outcome2_token
+_AMOUNTS = 64  # reward, required_bond
+_OUTCOME_IDS = 64  # outcome1_id, outcome2_id
+_ROW_BYTES = 32 + 1 + _TOKENS + _AMOUNTS + _OUTCOME_IDS  # id, flags and the groups above
+
+
+class MarketStateCache:
+    """In-memory copy of the `markets` and `asserted_markets` mappings of a `PredictionMarket`.
+
+    The cache follows the market's events: `MarketInitialized` adds a market, `MarketAsserted`,
+    `MarketResolved` and `MarketAssertionRejected` move it through the assertion states. Lookups
+    never touch the node, except for descriptions that were evicted.
+
+    Markets are stored in fixed width columns (one `bytearray` per field group) instead of one
+    object per market: 201 bytes of columns per market, about 350 bytes with its entry in the
+    market id index (measured in tests/test_market_state.py), so a million markets take about
+    350 MB besides the cached descriptions. The asserted outcome is kept as a two bit code next to the resolved
+    flag. Descriptions are the bulk of a market and are only kept for the `max_descriptions`
+    most recently used markets; older ones are read back from `market_descriptions` on demand.
+
+    The cache does not follow reorgs. Use `confirmations` to stay behind the chain head, and
+    `verify` to compare the cache with the contract.
+    """
+
+    def __init__(
+        self,
+        web3,
+        address: str,
+        abi: Optional[List[Dict[str, Any]]] = None,
+        start_block: int = 0,
+        confirmations: int = 0,
+        chunk: int = 10_000,
+        max_descriptions: int = 10_000,
+    ):
+        self.web3 = web3
+        self.address = to_checksum_address(address)
+        self.abi = abi
+        self.block = start_block - 1  # Last block whose events were applied.
+        self.confirmations = confirmations
+        self.chunk = chunk
+        self.max_descriptions = max_descriptions
+
+        self._rows: Dict[bytes, int] = {}
+        self._ids = bytearray()
+        self._flags = bytearray()
+        self._tokens = bytearray()
+        self._amounts = bytearray()
+        self._outcome_ids = bytearray()
+        self._assertions: Dict[bytes, AssertedMarket] = {}
+        self._pending: Dict[bytes, bytes] = {}  # market_id -> assertion_id
+        self._descriptions: "OrderedDict[bytes, MarketDescription]" = OrderedDict()
+        self._decoder: Optional[EventDecoder] = None
+        self._contract = None
+
+    def _get_abi(self) -> List[Dict[str, Any]]:
+        if self.abi is None:
+            self.abi = load_abi("../.build/abi/PredictionMarket.json")
+        return self.abi
+
+    @property
+    def decoder(self) -> EventDecoder:
+        if self._decoder is None:
+            self._decoder = EventDecoder(self._get_abi(), STATE_EVENTS)
+        return self._decoder
+
+    @property
+    def contract(self):
+        if self._contract is None:
+            self._contract = self.web3.eth.contract(address=self.address, abi=self._get_abi())
+        return self._contract
+
+    # Lookups
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def __contains__(self, market_id) -> bool:
+        return bytes(HexBytes(market_id)) in self._rows
+
+    def market_ids(self) -> Iterable[bytes]:
+        for row in range(len(self._rows)):
+            yield bytes(self._ids[row * 32:(row + 1) * 32])
+
+    def market(self, market_id) -> Optional[Market]:
+        """Same values as `markets(market_id)`, or None for an unknown market."""
+        row = self._rows.get(bytes(HexBytes(market_id)))
+        if row is None:
+            return None
+        flags = self._flags[row]
+        tokens = self._tokens[row * _TOKENS:(row + 1) * _TOKENS]
+        amounts = self._amounts[row * _AMOUNTS:(row + 1) * _AMOUNTS]
+        outcome_ids = self._outcome_ids[row * _OUTCOME_IDS:(row + 1) * _OUTCOME_IDS]
+        asserted = flags & 0x03
+        if asserted == _ASSERTED_OUTCOME1:
+            asserted_outcome_id = bytes(outcome_ids[:32])
+        elif asserted == _ASSERTED_OUTCOME2:
+            asserted_outcome_id = bytes(outcome_ids[32:])
+        elif asserted == _ASSERTED_UNRESOLVABLE:
+            asserted_outcome_id = UNRESOLVABLE_ID
+        else:
+            asserted_outcome_id = EMPTY_ID
+        return Market(
+            bool(flags & _RESOLVED),
+            asserted_outcome_id,
+            to_checksum_address(bytes(tokens[:20])),
+            to_checksum_address(bytes(tokens[20:])),
+            int.from_bytes(amounts[:32], "big"),
+            int.from_bytes(amounts[32:], "big"),
+            bytes(outcome_ids[:32]),
+            bytes(outcome_ids[32:]),
+        )
+
+    def is_resolved(self, market_id) -> bool:
+        row = self._rows.get(bytes(HexBytes(market_id)))
+        return row is not None and bool(self._flags[row] & _RESOLVED)
+
+    def asserted_market(self, assertion_id) -> Optional[AssertedMarket]:
+        """Same values as `asserted_markets(assertion_id)` for pending assertions, otherwise None."""
+        return self._assertions.get(bytes(HexBytes(assertion_id)))
+
+    def pending_assertion(self, market_id) -> Optional[bytes]:
+        """The id of the unsettled assertion of `market_id`, if any."""
+        return self._pending.get(bytes(HexBytes(market_id)))
+
+    def description(self, market_id) -> Optional[MarketDescription]:
+        """Outcome names and description of `market_id`; read from the contract if evicted."""
+        market_id = bytes(HexBytes(market_id))
+        if market_id not in self._rows:
+            return None
+        details = self._descriptions.get(market_id)
+        if details is not None:
+            self._descriptions.move_to_end(market_id)
+            return details
+        outcome1, outcome2, description = self.contract.functions.market_descriptions(market_id).call()
+        details = MarketDescription(outcome1.decode(), outcome2.decode(), description.decode())
+        self._remember_description(market_id, details)
+        return details
+
+    def _remember_description(self, market_id: bytes, details: MarketDescription):
+        if self.max_descriptions <= 0:
+            return
+        self._descriptions[market_id] = details
+        self._descriptions.move_to_end(market_id)
+        while len(self._descriptions) > self.max_descriptions:
+            self._descriptions.popitem(last=False)
+
+    # Updates
+
+    def apply(self, event: str, args: Dict[str, Any]):
+        """Apply one decoded event (as returned by `EventDecoder.decode`)."""
+        if event == "MarketInitialized":
+            self._add_market(args)
+            return
+        market_id = bytes(args["market_id"])
+        row = self._rows.get(market_id)
+        if row is None:
+            return  # Initialized before `start_block`.
+        if event == "MarketAsserted":
+            outcome_id = keccak(text=args["asserted_outcome"])
+            outcome_ids = self._outcome_ids[row * _OUTCOME_IDS:(row + 1) * _OUTCOME_IDS]
+            if outcome_id == outcome_ids[:32]:
+                asserted = _ASSERTED_OUTCOME1
+            elif outcome_id == outcome_ids[32:]:
+                asserted = _ASSERTED_OUTCOME2
+            else:
+                asserted = _ASSERTED_UNRESOLVABLE
+            self._flags[row] = (self._flags[row] & _RESOLVED) | asserted
+            assertion_id = bytes(args["assertion_id"])
+            self._assertions[assertion_id] = AssertedMarket(to_checksum_address(args["asserter"]), market_id)
+            self._pending[market_id] = assertion_id
+        elif event == "MarketResolved":
+            self._flags[row] |= _RESOLVED
+            self._assertions.pop(self._pending.pop(market_id, None), None)
+        elif event == "MarketAssertionRejected":
+            self._flags[row] &= _RESOLVED
+            self._assertions.pop(bytes(args["assertion_id"]), None)
+            self._pending.pop(market_id, None)
+
+    def _row(self, market_id: bytes) -> int:
+        """Row of `market_id`, appended if the market is new."""
+        row = self._rows.get(market_id)
+        if row is None:
+            row = len(self._rows)
+            self._rows[market_id] = row
+            self._ids += market_id
+            self._flags.append(0)
+            self._tokens += bytes(_TOKENS)
+            self._amounts += bytes(_AMOUNTS)
+            self._outcome_ids += bytes(_OUTCOME_IDS)
+        return row
+
+    def _add_market(self, args: Dict[str, Any]):
+        market_id = bytes(args["market_id"])
+        self._write_row(self._row(market_id), Market(
+            False,
+            EMPTY_ID,
+            args["outcome1_token"],
+            args["outcome2_token"],
+            args["reward"],
+            args["required_bond"],
+            keccak(text=args["outcome1"]),
+            keccak(text=args["outcome2"]),
+        ))
+        self._remember_description(
+            market_id, MarketDescription(args["outcome1"], args["outcome2"], args["description"])
+        )
+
+    def _write_row(self, row: int, market: Market):
+        outcome1_id, outcome2_id = bytes(market.outcome1_id), bytes(market.outcome2_id)
+        asserted_outcome_id = bytes(market.asserted_outcome_id)
+        if asserted_outcome_id == EMPTY_ID:
+            asserted = _ASSERTED_NONE
+        elif asserted_outcome_id == outcome1_id:
+            asserted = _ASSERTED_OUTCOME1
+        elif asserted_outcome_id == outcome2_id:
+            asserted = _ASSERTED_OUTCOME2
+        else:
+            asserted = _ASSERTED_UNRESOLVABLE
+        self._flags[row] = (_RESOLVED if market.resolved else 0) | asserted
+        self._tokens[row * _TOKENS:(row + 1) * _TOKENS] = (
+            HexBytes(market.outcome1_token) + HexBytes(market.outcome2_token)
+        )
+        self._amounts[row * _AMOUNTS:(row + 1) * _AMOUNTS] = (
+            market.reward.to_bytes(32, "big") + market.required_bond.to_bytes(32, "big")
+        )
+        self._outcome_ids[row * _OUTCOME_IDS:(row + 1) * _OUTCOME_IDS] = outcome1_id + outcome2_id
+
+    def apply_log(self, log: Dict[str, Any]):
+        self.apply(*self.decoder.decode(log))
+
+    def sync(self, to_block: Optional[int] = None) -> int:
+        """Apply the market's events up to `to_block` (default: latest block minus `confirmations`). Returns the number applied."""
+        if to_block is None:
+            to_block = self.web3.eth.block_number - self.confirmations
+        applied = 0
+        while self.block < to_block:
+            end = min(self.block + self.chunk, to_block)
+            logs = self.web3.eth.get_logs({
+                "address": self.address,
+                "fromBlock": self.block + 1,
+                "toBlock": end,
+                "topics": [self.decoder.topics],
+            })
+            for log in logs:
+                self.apply_log(log)
+            applied += len(logs)
+            self.block = end
+        return applied
+
+    def load_index(self, block: Optional[int] = None) -> int:
+        """
+        Load every market from the contract's market index as of `block` (default: latest block minus
+        `confirmations`), one `get_market_summaries` call per `MAX_PAGE_MARKETS` markets, and continue
+        `sync` from the next block. Returns the number of markets loaded.
+
+        This replaces syncing the events since deployment. The index has no assertion ids or
+        descriptions: `pending_assertion` and `asserted_market` only know assertions made after
+        `block`, and descriptions are read from the contract when asked for.
+        """
+        if block is None:
+            block = self.web3.eth.block_number - self.confirmations
+        if block < self.block:
+            raise ValueError(f"Cache is already synced to block {self.block}, after block {block}.")
+        functions = self.contract.functions
+        count = functions.get_market_count(MARKET_ALL).call(block_identifier=block)
+        for offset in range(0, count, MAX_PAGE_MARKETS):
+            page = functions.get_market_summaries(MARKET_ALL, offset, MAX_PAGE_MARKETS).call(block_identifier=block)
+            for market_id, _, market in page:
+                self._write_row(self._row(bytes(market_id)), Market(*market))
+        self.block = block
+        return count
+
+    # Consistency
+
+    def verify(self, market_ids: Optional[Iterable] = None, repair: bool = False) -> List[bytes]:
+        """
+        Compare cached markets (all, or `market_ids`) with `get_market_states` and pending assertions
+        with `asserted_markets`. Returns the ids of markets that differ; with `repair` the cached
+        market is overwritten with the contract's values.
+        """
+        ids = list(self.market_ids()) if market_ids is None else [bytes(HexBytes(market_id)) for market_id in market_ids]
+        mismatched: List[bytes] = []
+        for start in range(0, len(ids), MAX_VIEW_MARKETS):
+            batch = ids[start:start + MAX_VIEW_MARKETS]
+            states, _ = self.contract.functions.get_market_states(batch, []).call()
+            for market_id, state in zip(batch, states):
+                onchain = Market(*state[0])
+                if self._normalize(onchain) != self._normalize(self.market(market_id)):
+                    mismatched.append(market_id)
+                    if repair and market_id in self._rows:
+                        self._write_row(self._rows[market_id], onchain)
+
+        for assertion_id, asserted in list(self._assertions.items()):
+            asserter, market_id = self.contract.functions.asserted_markets(assertion_id).call()
+            if AssertedMarket(to_checksum_address(asserter), bytes(market_id)) != asserted:
+                if asserted.market_id not in mismatched:
+                    mismatched.append(asserted.market_id)
+                if repair:
+                    del self._assertions[assertion_id]
+                    self._pending.pop(asserted.market_id, None)
+        return mismatched
+
+    @staticmethod
+    def _normalize(market: Optional[Market]) -> Optional[Tuple]:
+        if market is None:
+            return None
+        return (
+            bool(market.resolved),
+            bytes(market.asserted_outcome_id),
+            to_checksum_address(market.outcome1_token),
+            to_checksum_address(market.outcome2_token),
+            market.reward,
+            market.required_bond,
+            bytes(market.outcome1_id),
+            bytes(market.outcome2_id),
+        )
@@ -0,0 +1,304 @@
+"""
+Per-operation metrics of `PredictionMarketManager` and `OracleContracts`.
+
+Every instrumented method is recorded as one operation with its wall time, the gas used and fees
+paid by the transactions it sent, and the JSON-RPC requests it made (count and bytes each way),
+tagged with the operation name and the market id. Operations can be exported as JSON lines and as
+a Prometheus text file:
+
+    METRICS_JSONL=metrics.jsonl METRICS_PROM=metrics.prom APE_METHOD=init ape run market
+
+`METRICS_JSONL` is appended to by every run; `METRICS_PROM` is then rendered from the whole JSONL
+file, so it aggregates all runs (otherwise only the current one). It can also be rendered later:
+
+    python -m scripts.metrics metrics.jsonl > metrics.prom
+
+RPC traffic is counted at the provider's JSON encoding of requests and decoding of responses, which
+sees the exact bytes without serializing anything again. Transaction receipts are picked up from
+the decoded responses, so gas is attributed without changes to the instrumented code. The cost per
+request is a few counter updates, see `benchmarks/bench_metrics.py`.
+"""
+import os
+import sys
+import json
+import time
+import functools
+import threading
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from hexbytes import HexBytes
+
+# Upper bounds (seconds) of the latency histogram buckets in the Prometheus export.
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+
+class Operation:
+    """One recorded call of an instrumented method."""
+
+    __slots__ = (
+        "name", "market_id", "started", "seconds", "error", "transactions", "gas_used", "fees",
+        "rpc_requests", "bytes_sent", "bytes_received",
+    )
+
+    def __init__(self, name: str, market_id: Optional[str] = None, started: float = 0.0):
+        self.name = name
+        self.market_id = market_id
+        self.started = started
+        self.seconds = 0.0
+        self.error: Optional[str] = None
+        self.transactions = 0
+        self.gas_used = 0
+        self.fees = 0  # wei, sum of gas_used * effective_gas_price
+        self.rpc_requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    @property
+    def gas_price(self) -> int:
+        """Effective gas price (wei) averaged over the operation's transactions."""
+        return self.fees // self.gas_used if self.gas_used else 0
+
+    def as_dict(self) -> Dict[str, Any]:
+        record = {name: getattr(self, name) for name in self.__slots__}
+        record["gas_price"] = self.gas_price
+        return record
+
+    @classmethod
+    def from_dict(cls, record: Dict[str, Any]) -> "Operation":
+        operation = cls(record["name"])
+        for name in cls.__slots__:
+            if name in record:
+                setattr(operation, name, record[name])
+        return operation
+
+
+class Metrics:
+    """Records operations and the RPC traffic of the providers it watches.
+
+    Counters are process wide and an operation stores the difference between its end and its start,
+    so nested operations include the traffic of the operations they call, and requests sent from
+    worker threads (for example by `TransactionPipeline`) are attributed to the running operation.
+    A transaction is counted once, by the first operation that sees its receipt.
+    """
+
+    def __init__(self):
+        self.operations: List[Operation] = []
+        self._lock = threading.Lock()
+        self._providers = set()
+        self._rpc_requests = 0
+        self._bytes_sent = 0
+        self._bytes_received = 0
+        self._transactions = 0
+        self._gas_used = 0
+        self._fees = 0
+        self._seen = set()  # hashes of the transactions whose receipt was counted
+        self._written = 0  # operations already appended by write_jsonl
+
+    def watch(self, web3):
+        """Count the RPC traffic of `web3`'s provider. Calling it again for the same provider does nothing."""
+        provider = web3.provider
+        if id(provider) in self._providers or not hasattr(provider, "encode_rpc_request"):
+            return
+        self._providers.add(id(provider))
+        encode_request = provider.encode_rpc_request
+        decode_response = provider.decode_rpc_response
+
+        def encode_rpc_request(method, params):
+            request = encode_request(method, params)
+            with self._lock:
+                self._rpc_requests += 1
+                self._bytes_sent += len(request)
+            return request
+
+        def decode_rpc_response(raw_response):
+            response = decode_response(raw_response)
+            with self._lock:
+                self._bytes_received += len(raw_response)
+            for item in response if isinstance(response, list) else (response,):
+                result = item.get("result") if isinstance(item, dict) else None
+                if isinstance(result, dict) and "gasUsed" in result and "transactionHash" in result:
+                    self._add_receipt(result)
+            return response
+
+        provider.encode_rpc_request = encode_rpc_request
+        provider.decode_rpc_response = decode_rpc_response
+        if hasattr(provider, "encode_batch_rpc_request"):
+            encode_batch_request = provider.encode_batch_rpc_request
+
+            def encode_batch_rpc_request(requests):
+                request = encode_batch_request(requests)
+                with self._lock:
+                    self._rpc_requests += len(requests)
+                    self._bytes_sent += len(request)
+                return request
+
+            provider.encode_batch_rpc_request = encode_batch_rpc_request
+
+    def _add_receipt(self, receipt: Dict[str, Any]):
+        transaction_hash = bytes(HexBytes(receipt["transactionHash"]))
+        gas_used = int(receipt["gasUsed"], 16) if isinstance(receipt["gasUsed"], str) else receipt["gasUsed"]
+        gas_price = receipt.get("effectiveGasPrice", 0)
+        gas_price = int(gas_price, 16) if isinstance(gas_price, str) else gas_price
+        with self._lock:
+            if transaction_hash in self._seen:
+                return
+            self._seen.add(transaction_hash)
+            self._transactions += 1
+            self._gas_used += gas_used
+            self._fees += gas_used * gas_price
+
+    def _counters(self):
+        return (
+            self._transactions, self._gas_used, self._fees,
+            self._rpc_requests, self._bytes_sent, self._bytes_received,
+        )
+
+    def operation(self, name: str, market_id: Optional[str] = None) -> "_Recording":
+        """Context manager recording the enclosed code as operation `name`; yields the `Operation`."""
+        return _Recording(self, Operation(name, market_id))
+
+    def _finish(self, operation: Operation, start: float, counters):
+        operation.seconds = time.perf_counter() - start
+        (
+            operation.transactions, operation.gas_used, operation.fees,
+            operation.rpc_requests, operation.bytes_sent, operation.bytes_received,
+        ) = (end - begin for end, begin in zip(self._counters(), counters))
+        self.operations.append(operation)
+
+    # Export
+
+    def write_jsonl(self, path: str):
+        """Append the operations recorded since the last call to `path`, one JSON object per line."""
+        with open(path, "a") as file:
+            for operation in self.operations[self._written:]:
+                file.write(json.dumps(operation.as_dict()) + "\n")
+        self._written = len(self.operations)
+
+    @staticmethod
+    def load_jsonl(path: str) -> List[Operation]:
+        with open(path, "r") as file:
+            return [Operation.from_dict(json.loads(line)) for line in file if line.strip()]
+
+    def export_from_env(self):
+        """Write the files named by `METRICS_JSONL` and `METRICS_PROM`, when set."""
+        jsonl_path, prometheus_path = os.getenv("METRICS_JSONL"), os.getenv("METRICS_PROM")
+        operations = self.operations
+        if jsonl_path:
+            self.write_jsonl(jsonl_path)
+            operations = self.load_jsonl(jsonl_path)
+        if prometheus_path:
+            write_prometheus(prometheus_path, operations)
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prometheus_text(operations: Iterable[Operation], prefix: str = "market_operation") -> str:
+    """
+    Render `operations` in the Prometheus text format, aggregated per operation name. Market ids are
+    not used as labels, they would make one series per market; they stay in the JSONL export.
+    """
+    totals: Dict[str, Dict[str, Any]] = {}
+    for operation in operations:
+        total = totals.setdefault(operation.name, {
+            "count": 0, "seconds": 0.0, "buckets": [0] * len(LATENCY_BUCKETS), "errors": 0,
+            "transactions": 0, "gas_used": 0, "fees": 0, "rpc_requests": 0, "bytes_sent": 0, "bytes_received": 0,
+        })
+        total["count"] += 1
+        total["seconds"] += operation.seconds
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if operation.seconds <= bound:
+                total["buckets"][index] += 1
+        total["errors"] += operation.error is not None
+        for key in ("transactions", "gas_used", "fees", "rpc_requests", "bytes_sent", "bytes_received"):
+            total[key] += getattr(operation, key)
+
+    lines = [
+        f"# HELP {prefix}_seconds Wall time of the operation.",
+        f"# TYPE {prefix}_seconds histogram",
+    ]
+    for name, total in sorted(totals.items()):
+        label = f'operation="{_label(name)}"'
+        for bound, count in zip(LATENCY_BUCKETS, total["buckets"]):
+            lines.append(f'{prefix}_seconds_bucket{{{label},le="{bound}"}} {count}')
+        lines.append(f'{prefix}_seconds_bucket{{{label},le="+Inf"}} {total["count"]}')
+        lines.append(f"{prefix}_seconds_sum{{{label}}} {total['seconds']:.6f}")
+        lines.append(f"{prefix}_seconds_count{{{label}}} {total['count']}")
+    for key, help_text in (
+        ("errors", "Operations that raised."),
+        ("transactions", "Transactions mined by the operation."),
+        ("gas_used", "Gas used by the operation's transactions."),
+        ("fees", "Fees (wei) paid for the operation's transactions, at their effective gas price."),
+        ("rpc_requests", "JSON-RPC requests sent."),
+        ("bytes_sent", "Bytes of JSON-RPC requests sent."),
+        ("bytes_received", "Bytes of JSON-RPC responses received."),
+    ):
+        metric = f"{prefix}_{key}_total"
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} counter")
+        for name, total in sorted(totals.items()):
+            lines.append(f'{metric}{{operation="{_label(name)}"}} {total[key]}')
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: str, operations: Iterable[Operation]):
+    """Write `prometheus_text(operations)` to `path`, replacing it atomically (for textfile collectors)."""
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as file:
+        file.write(prometheus_text(operations))
+    os.replace(temporary, path)
+
+
+class _Recording:
+    __slots__ = ("metrics", "operation", "start", "counters")
+
+    def __init__(self, metrics: Metrics, operation: Operation):
+        self.metrics = metrics
+        self.operation = operation
+
+    def __enter__(self) -> Operation:
+        self.operation.started = time.time()
+        self.counters = self.metrics._counters()
+        self.start = time.perf_counter()
+        return self.operation
+
+    def __exit__(self, exc_type, exc, traceback):
+        if exc_type is not None:
+            self.operation.error = exc_type.__name__
+        self.metrics._finish(self.operation, self.start, self.counters)
+        return False
+
+
+def instrumented(market_id: Optional[Callable[[Any], Optional[str]]] = None):
+    """
+    Record each call of the decorated method as an operation of `self.metrics`, named after the method.
+    `market_id(self)` is evaluated once the call returns (so that it sees ids the call recorded) and
+    tags the operation.
+    """
+    def decorator(method):
+        @functools.wraps(method)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.operation(method.__name__) as operation:
+                try:
+                    return method(self, *args, **kwargs)
+                finally:
+                    if market_id is not None:
+                        operation.market_id = market_id(self)
+        return wrapper
+    return decorator
+
+
+# Shared by PredictionMarketManager and OracleContracts.
+metrics = Metrics()
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        print("Usage: python -m scripts.metrics metrics.jsonl [...] > metrics.prom")
+        return
+    sys.stdout.write(prometheus_text(operation for path in argv for operation in Metrics.load_jsonl(path)))
+
+
+if __name__ == "__main__":
+    main()
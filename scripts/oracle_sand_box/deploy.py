@@ -5,17 +5,42 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../../"
 
 from scripts.oracle_sand_box.oracle import OracleContracts
 
-def main():
-    oracle_contracts = OracleContracts()
+def bring_up(oracle_contracts):
+    # Chain state file written after a bring-up and loaded instead of deploying, when set.
+    state_path = os.getenv("SANDBOX_STATE")
+
+    # 0. Reuse a sandbox that is already deployed, or load a saved one.
+    if oracle_contracts.is_deployed():
+        print("Sandbox already deployed, nothing to do.")
+        return
+    if state_path and os.path.exists(state_path):
+        oracle_contracts.load_state(state_path)
+        oracle_contracts.registry.flush()
+        print(f"Sandbox loaded from {state_path}")
+        return
 
     # 1. Deploy UMA ecosystem contracts with mocked oracle and selected currency.
     oracle_contracts.deploy_contracts()
+    oracle_contracts.registry.flush()
 
     # 2. Register UMA ecosystem contracts, whitelist currency and identifier.
     oracle_contracts.register_contracts()
 
     # 3. Deploy Optimistic Oracle V3 and register it in the Finder.
     oracle_contracts.deploy_and_register_oov3()
+    oracle_contracts.registry.flush()
+
+    if state_path:
+        oracle_contracts.save_state(state_path)
+        print(f"Sandbox state saved to {state_path}")
+
+def main():
+    oracle_contracts = OracleContracts()
+    try:
+        bring_up(oracle_contracts)
+    finally:
+        # METRICS_JSONL / METRICS_PROM, see scripts/metrics.py
+        oracle_contracts.metrics.export_from_env()
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,10 +1,33 @@
-from ape import accounts, project
+import os
+import json
+from ape import accounts, chain, project
+from eth_utils import keccak, to_hex
 from .. import constants
-from ..utils import edit_value
+from ..registry import DeploymentRegistry
+from ..cache import contracts as contract_cache
+from ..metrics import instrumented, metrics as default_metrics
+from ..pipeline import TransactionPipeline
+
+# Registry keys of the sandbox contracts, checked by `is_deployed` and saved with the chain state.
+SANDBOX_KEYS = (
+    "store_contract_address",
+    "ancillary_data_address",
+    "finder_address",
+    "mock_oracle_address",
+    "currency_address",
+    "address_whitelist",
+    "identifier_address",
+    "OOV3_address",
+)
 
 
 class OracleContracts:
-    def __init__(self):
+    def __init__(self, registry=None, contracts=None, metrics=None):
+        self.registry = registry or DeploymentRegistry(namespace=os.getenv("DEPLOYMENTS_NAMESPACE"))
+        self.contracts = contracts if contracts is not None else contract_cache
+        self.metrics = metrics or default_metrics
+        self.metrics.watch(chain.provider.web3)
+
         # Contract addresses
         self.finder = ""
         self.store = ""
@@ -12,118 +35,184 @@ class OracleContracts:
         self.mock = ""
         self.whitelist = ""
         self.default_currency = ""
-
+        self.code_hashes = dict(self.registry.get("sandbox_code_hashes", {}))
+
+    def _record(self, key, container, address):
+        """Record a deployed contract in the registry together with the hash of its code."""
+        contract = self.contracts.at(container, address)
+        self.registry.set(key, contract.address)
+        self.code_hashes[key] = to_hex(keccak(chain.provider.get_code(contract.address)))
+        self.registry.set("sandbox_code_hashes", self.code_hashes)
+        return contract.address
+
+    def is_deployed(self):
+        """
+        True when every sandbox contract recorded in the registry still has the code it was deployed
+        with, forexample when anvil was not restarted since the last bring-up.
+        """
+        for key in SANDBOX_KEYS:
+            address = self.registry.get(key, None)
+            if address is None or key not in self.code_hashes:
+                return False
+            if to_hex(keccak(chain.provider.get_code(address))) != self.code_hashes[key]:
+                return False
+        return True
+
+    def load_addresses(self):
+        """Point this instance at the sandbox recorded in the registry."""
+        self.store = self.registry.get("store_contract_address")
+        self.finder = self.registry.get("finder_address")
+        self.mock = self.registry.get("mock_oracle_address")
+        self.default_currency = self.registry.get("currency_address")
+        self.whitelist = self.registry.get("address_whitelist")
+        self.identifier_whitelist_address = self.registry.get("identifier_address")
+
+    @instrumented()
+    def save_state(self, path):
+        """Write the node's full chain state (`anvil_dumpState`) and the sandbox addresses to `path`."""
+        state = chain.provider.make_request("anvil_dumpState", [])
+        with open(path, "w") as file:
+            json.dump({
+                "chain_id": chain.chain_id,
+                "addresses": {key: self.registry.get(key) for key in SANDBOX_KEYS},
+                "code_hashes": self.code_hashes,
+                "state": state,
+            }, file)
+
+    @instrumented()
+    def load_state(self, path):
+        """Load a state written by `save_state` into the node (`anvil_loadState`) and record its addresses."""
+        with open(path, "r") as file:
+            saved = json.load(file)
+        chain.provider.make_request("anvil_loadState", [saved["state"]])
+        self.registry.update(saved["addresses"])
+        self.code_hashes = saved["code_hashes"]
+        self.registry.set("sandbox_code_hashes", self.code_hashes)
+        self.load_addresses()
+
+    @instrumented()
     def deploy_contracts(self):
         deployer = accounts.load("account1")  # Load deployer account
 
-        # Deploy StoreContract
-        store_contract = deployer.deploy(
+        # The contracts do not depend on each other (except the mock oracle on the Finder), so their
+        # deployments are submitted together.
+        pipeline = TransactionPipeline(chain.provider.web3)
+        pipeline.add_deploy(
+            "store_contract_address",
             project.StoreContract,
             constants.fixed_oracle_fee,
             constants.weekly_delay_fee,
             constants.empty_address,
+            sender=deployer,
         )
-        edit_value("store_contract_address", store_contract.address)
-        self.store = store_contract.address
-
-        # Deploy AncillaryDataInterface
-        ancillary_data_contract = deployer.deploy(project.AncillaryDataInterface)
-        edit_value("ancillary_data_address", ancillary_data_contract.address)
-
-        # Deploy FinderContract
-        finder_contract = deployer.deploy(project.FinderContract)
-        edit_value("finder_address", finder_contract.address)
-        self.finder = finder_contract.address
-
-        # Deploy MockAncillaryContract
-        mock_oracle_ancillary_contract = deployer.deploy(
-            project.MockAncillaryContract,
-            finder_contract.address,
-            constants.empty_address,
-        )
-        edit_value("mock_oracle_address", mock_oracle_ancillary_contract.address)
-        self.mock = mock_oracle_ancillary_contract.address
-
-        # Deploy DefaultCurrency token contract
-        default_currency_contract = deployer.deploy(
+        pipeline.add_deploy("ancillary_data_address", project.AncillaryDataInterface, sender=deployer)
+        pipeline.add_deploy("finder_address", project.FinderContract, sender=deployer)
+        pipeline.add_deploy(
+            "currency_address",
             project.TestERC20,
             constants.default_currency_name,
             constants.default_currency_symbol,
-            constants.default_currency_decimal
+            constants.default_currency_decimal,
+            constants.currency_name_eip712,
+            sender=deployer,
         )
-        edit_value("currency_address", default_currency_contract.address)
-        self.default_currency = default_currency_contract.address
-
-        # Deploy AddressWhitelistContract
-        address_whitelist_contract = deployer.deploy(project.AddressWhitelistContract)
-        edit_value("address_whitelist", address_whitelist_contract.address)
-        self.whitelist = address_whitelist_contract.address
+        pipeline.add_deploy("address_whitelist", project.AddressWhitelistContract, sender=deployer)
+        pipeline.add_deploy("identifier_address", project.IdentifierWhitelistContract, sender=deployer)
+        receipts = pipeline.run()
+
+        addresses = {
+            key: self._record(key, container, receipts[key]["contractAddress"])
+            for key, container in (
+                ("store_contract_address", project.StoreContract),
+                ("ancillary_data_address", project.AncillaryDataInterface),
+                ("finder_address", project.FinderContract),
+                ("currency_address", project.TestERC20),
+                ("address_whitelist", project.AddressWhitelistContract),
+                ("identifier_address", project.IdentifierWhitelistContract),
+            )
+        }
+        self.store = addresses["store_contract_address"]
+        self.finder = addresses["finder_address"]
+        self.default_currency = addresses["currency_address"]
+        self.whitelist = addresses["address_whitelist"]
+        self.identifier_whitelist_address = addresses["identifier_address"]
 
-        # Deploy IdentifierWhitelistContract
-        identifier_contract = deployer.deploy(project.IdentifierWhitelistContract)
-        edit_value("identifier_address", identifier_contract.address)
-        self.identifier_whitelist_address = identifier_contract.address
+        # Deploy MockAncillaryContract
+        mock_oracle_ancillary_contract = self.contracts.add(deployer.deploy(
+            project.MockAncillaryContract,
+            self.finder,
+            constants.empty_address,
+        ))
+        self.mock = self._record("mock_oracle_address", project.MockAncillaryContract, mock_oracle_ancillary_contract.address)
 
+    @instrumented()
     def register_contracts(self):
         deployer = accounts.load("account1")
-
-        # Link contracts through FinderContract
-        project.FinderContract.at(self.finder, fetch_from_explorer=False).changeImplementationAddress(
-            constants.Store,
-            self.store,
-            sender=deployer,
-        )
+        finder = self.contracts.at(project.FinderContract, self.finder)
         print("Store contract address: ", self.store)
         print("Finder contract address: ", self.finder)
 
-        project.FinderContract.at(self.finder, fetch_from_explorer=False).changeImplementationAddress(
+        # The registrations are independent of each other and are submitted together.
+        pipeline = TransactionPipeline(chain.provider.web3)
+
+        # Link contracts through FinderContract
+        pipeline.add_call("store", finder.changeImplementationAddress, constants.Store, self.store, sender=deployer)
+        pipeline.add_call(
+            "collateral_whitelist",
+            finder.changeImplementationAddress,
             constants.CollateralWhitelist,
             self.whitelist,
             sender=deployer,
         )
-        project.FinderContract.at(self.finder, fetch_from_explorer=False).changeImplementationAddress(
+        pipeline.add_call(
+            "identifier_whitelist",
+            finder.changeImplementationAddress,
             constants.IdentifierWhitelist,
             self.identifier_whitelist_address,
             sender=deployer,
         )
-        project.FinderContract.at(self.finder, fetch_from_explorer=False).changeImplementationAddress(
-            constants.Oracle,
-            self.mock,
-            sender=deployer,
-        )
+        pipeline.add_call("oracle", finder.changeImplementationAddress, constants.Oracle, self.mock, sender=deployer)
 
         # Update AddressWhitelistContract
-        project.AddressWhitelistContract.at(self.whitelist, fetch_from_explorer=False).addToWhitelist(
+        pipeline.add_call(
+            "whitelist_currency",
+            self.contracts.at(project.AddressWhitelistContract, self.whitelist).addToWhitelist,
             self.default_currency,
             sender=deployer,
         )
 
         # Update IdentifierWhitelistContract
-        project.IdentifierWhitelistContract.at(self.identifier_whitelist_address, fetch_from_explorer=False).addSupportedIdentifier(
+        pipeline.add_call(
+            "identifier",
+            self.contracts.at(project.IdentifierWhitelistContract, self.identifier_whitelist_address).addSupportedIdentifier,
             constants.default_identifier,
             sender=deployer,
         )
 
         # Update StoreContract
         final_fee = {"rawValue": int(constants.minimum_bond / 2)}
-        project.Store.at(self.store, fetch_from_explorer=False).setFinalFee(
+        pipeline.add_call(
+            "final_fee",
+            self.contracts.at(project.Store, self.store).setFinalFee,
             self.default_currency,
             final_fee,
             sender=deployer,
         )
+        pipeline.run()
 
+    @instrumented()
     def deploy_and_register_oov3(self):
         deployer = accounts.load("account1")
 
-        optimistic_oracle_contract = deployer.deploy(
+        optimistic_oracle_contract = self.contracts.add(deployer.deploy(
             project.OOV3,
             self.finder,
             self.default_currency,
             constants.default_liveness
-        )
-        edit_value("OOV3_address", optimistic_oracle_contract.address)
+        ))
+        self._record("OOV3_address", project.OOV3, optimistic_oracle_contract.address)
 
-        project.FinderContract.at(self.finder, fetch_from_explorer=False).changeImplementationAddress(
+        self.contracts.at(project.FinderContract, self.finder).changeImplementationAddress(
             constants.OptimisticOracleV3,
             optimistic_oracle_contract.address,
             sender=deployer
@@ -0,0 +1,416 @@
+import os
+import json
+from collections import namedtuple
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import numpy as np
+from eth_utils import keccak, to_checksum_address, to_hex
+from hexbytes import HexBytes
+
+# Amounts are uint256 and do not fit any NumPy integer type. They are kept as up to 8 limbs of
+# 32 bits in uint64 arrays of shape (width, n): row 0 holds the most significant limb of every
+# amount, so each limb is one contiguous vector. The spare 32 bits of every lane absorb the
+# carries of additions and of sums over up to 2**32 amounts, so whole arrays are added first and
+# carried once with `normalize`. Real balances use far fewer than 256 bits; `trim` drops the
+# leading limbs that are zero for every amount before the heavy work.
+LIMBS = 8
+LIMB_BITS = 32
+LIMB_MASK = np.uint64(2**LIMB_BITS - 1)
+
+TRANSFER_TOPIC = keccak(text="Transfer(address,address,uint256)")
+TOKENS_CREATED_TOPIC = keccak(text="TokensCreated(bytes32,address,uint256)")
+TOKENS_REDEEMED_TOPIC = keccak(text="TokensRedeemed(bytes32,address,uint256)")
+TOKENS_SETTLED_TOPIC = keccak(text="TokensSettled(bytes32,address,uint256,uint256,uint256)")
+
+RESOLUTIONS = ("outcome1", "outcome2", "unresolvable")
+ZERO_ADDRESS = bytes(20)
+
+# Position `i` is `accounts[account_index[i]]` holding `outcome1[:, i]` and `outcome2[:, i]` of market
+# `market_ids[market_index[i]]`.
+Positions = namedtuple("Positions", "accounts market_ids account_index market_index outcome1 outcome2")
+
+
+def _as_bytes(value) -> bytes:
+    return value if isinstance(value, bytes) else bytes(HexBytes(value))
+
+
+def to_limbs(values: Iterable[int]) -> np.ndarray:
+    """Convert integers in [0, 2**256) to a (8, n) limb array."""
+    return words_to_limbs(b"".join(value.to_bytes(32, "big") for value in values))
+
+
+def words_to_limbs(words: bytes) -> np.ndarray:
+    """Convert concatenated 32-byte big-endian words (as found in log data) to a (8, n) limb array."""
+    return np.frombuffer(words, dtype=">u4").reshape(-1, LIMBS).T.astype(np.uint64, order="C")
+
+
+def from_limbs(limbs: np.ndarray) -> List[int]:
+    """Convert a (width, n) limb array back to Python integers."""
+    raw = np.ascontiguousarray(widen(normalize(limbs)).T).astype(">u4").tobytes()
+    return [int.from_bytes(raw[start:start + 32], "big") for start in range(0, len(raw), 32)]
+
+
+def trim(limbs: np.ndarray) -> np.ndarray:
+    """Drop leading limbs that are zero for every amount, keeping one zero limb to carry into."""
+    used = np.flatnonzero(limbs.any(axis=1)) if limbs.shape[1] else []
+    first = used[0] if len(used) else len(limbs) - 1
+    return limbs[max(first - 1, 0):]
+
+
+def widen(limbs: np.ndarray, width: int = LIMBS) -> np.ndarray:
+    """Undo `trim`: pad with leading zero limbs to `width` limbs."""
+    if len(limbs) >= width:
+        return limbs
+    return np.concatenate((np.zeros((width - len(limbs), limbs.shape[1]), dtype=np.uint64), limbs))
+
+
+def normalize(limbs: np.ndarray) -> np.ndarray:
+    """Propagate carries so that every limb is below 2**32; raises OverflowError past the top limb."""
+    limbs = limbs.astype(np.uint64, copy=True)
+    for row in range(len(limbs) - 1, 0, -1):
+        limbs[row - 1] += limbs[row] >> np.uint64(LIMB_BITS)
+        limbs[row] &= LIMB_MASK
+    if np.any(limbs[0] >> np.uint64(LIMB_BITS)):
+        raise OverflowError("Amount exceeds uint256")
+    return limbs
+
+
+def add(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    return normalize(a + b)
+
+
+def subtract(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """`a - b` of normalized limb arrays; raises ValueError where the result would be negative."""
+    difference = a.astype(np.int64) - b.astype(np.int64)
+    for row in range(len(difference) - 1, 0, -1):
+        borrow = difference[row] < 0
+        difference[row] += borrow.astype(np.int64) << LIMB_BITS
+        difference[row - 1] -= borrow
+    if np.any(difference[0] < 0):
+        raise ValueError("Negative amount")
+    return difference.astype(np.uint64)
+
+
+def halve(limbs: np.ndarray) -> np.ndarray:
+    """`limbs // 2` of a normalized limb array."""
+    halved = limbs >> np.uint64(1)
+    halved[1:] |= (limbs[:-1] & np.uint64(1)) << np.uint64(LIMB_BITS - 1)
+    return halved
+
+
+def group_sum(limbs: np.ndarray, groups: np.ndarray, count: int) -> np.ndarray:
+    """Sum the amounts of a normalized (width, n) limb array by group index into a normalized (width, count) array."""
+    totals = np.empty((len(limbs), count), dtype=np.uint64)
+    # `np.bincount` sums in float64, which is exact below 2**53. Summing the 16-bit halves of the limbs
+    # keeps every group sum below 2**48 for up to 2**32 amounts, and needs no sort.
+    for row, values in enumerate(limbs):
+        low = np.bincount(groups, weights=values & np.uint64(0xFFFF), minlength=count)
+        high = np.bincount(groups, weights=values >> np.uint64(16), minlength=count)
+        totals[row] = low.astype(np.uint64) + (high.astype(np.uint64) << np.uint64(16))
+    return normalize(totals)
+
+
+class PayoutEngine:
+    """Per-holder payouts and per-market liabilities of `PredictionMarket` outcome tokens.
+
+    Balances are rebuilt from the outcome tokens' `Transfer` logs, which also cover mints (from the
+    zero address) and burns (to it). Only the fields of the logs are gathered in Python; every
+    (holder, market) pair gets a position number with `np.unique` when it first appears. Amounts
+    are never converted to Python integers on the way: the 32-byte value words of the logs are
+    viewed as limb arrays, credits and debits are summed per position and outcome with
+    `np.bincount`, and the payouts of `settle_outcome_tokens` are evaluated for all positions at
+    once:
+
+        outcome1      payout = outcome1 balance
+        outcome2      payout = outcome2 balance
+        unresolvable  payout = (outcome1 balance + outcome2 balance) // 2
+
+    `TokensCreated`, `TokensRedeemed` and `TokensSettled` logs of the market give the currency
+    collateral still held for every market, to compare with its liabilities.
+
+        engine = PayoutEngine()
+        for market_id in state.market_ids():
+            market = state.market(market_id)
+            engine.add_market(market_id, market.outcome1_token, market.outcome2_token)
+        engine.sync(web3, market_address, from_block)
+        report = engine.liabilities()
+    """
+
+    def __init__(self):
+        self.market_ids: List[bytes] = []
+        self.accounts: List[bytes] = []
+        self._accounts: Dict[bytes, int] = {}
+        self._topic_accounts: Dict[bytes, int] = {}  # address as a 32-byte topic -> account number, -1 for zero
+        # token (as bytes and as checksum address) -> market index * 2 + 0 for outcome1 / 1 for outcome2
+        self._tokens: Dict[Any, int] = {}
+        self._markets: Dict[bytes, int] = {}
+        # Positions by number, and their keys (account << 32 | market index) sorted for lookups.
+        self._position_accounts = np.zeros(0, dtype=np.int64)
+        self._position_markets = np.zeros(0, dtype=np.int64)
+        self._position_keys = np.zeros(0, dtype=np.int64)
+        self._position_order = np.zeros(0, dtype=np.int64)
+        # Transfers not yet folded into `_balances` by `positions`: (credit slots, debit slots, amounts).
+        self._chunks: List[Tuple[np.ndarray, np.ndarray, np.ndarray]] = []
+        self._balances = np.zeros((1, 0), dtype=np.uint64)  # one column per slot = position * 2 + outcome
+        self._collateral_in: List[Tuple[np.ndarray, np.ndarray]] = []
+        self._collateral_out: List[Tuple[np.ndarray, np.ndarray]] = []
+
+    def add_market(self, market_id, outcome1_token: str, outcome2_token: str):
+        market_id = bytes(HexBytes(market_id))
+        if market_id in self._markets:
+            return
+        self._markets[market_id] = len(self.market_ids)
+        self.market_ids.append(market_id)
+        for side, token in enumerate((outcome1_token, outcome2_token)):
+            token = bytes(HexBytes(token))
+            self._tokens[token] = self._tokens[to_checksum_address(token)] = self._markets[market_id] * 2 + side
+
+    @property
+    def token_addresses(self) -> List[str]:
+        return [token for token in self._tokens if isinstance(token, str)]
+
+    def _account_ids(self, topics: List[bytes]) -> np.ndarray:
+        """Account numbers of the addresses in 32-byte topics; -1 for the zero address."""
+        lookup = self._topic_accounts.get
+        ids = [lookup(topic) for topic in topics]
+        for index in [index for index, account in enumerate(ids) if account is None]:
+            topic = bytes(topics[index])
+            account = self._topic_accounts.get(topic)
+            if account is None:
+                address = topic[12:]
+                account = -1 if address == ZERO_ADDRESS else len(self.accounts)
+                if account >= 0:
+                    self._accounts[address] = account
+                    self.accounts.append(address)
+                self._topic_accounts[topic] = account
+            ids[index] = account
+        return np.array(ids, dtype=np.int64)
+
+    def _position_ids(self, accounts: np.ndarray, markets: np.ndarray) -> np.ndarray:
+        """Position numbers of (account, market) pairs, numbering new pairs; -1 for the zero address."""
+        positions = np.full(len(accounts), -1, dtype=np.int64)
+        holders = accounts >= 0
+        unique, inverse = np.unique((accounts[holders] << 32) | markets[holders], return_inverse=True)
+        index = np.searchsorted(self._position_keys, unique)
+        known = np.zeros(len(unique), dtype=bool)
+        if len(self._position_keys):
+            known = self._position_keys[np.minimum(index, len(self._position_keys) - 1)] == unique
+        ids = np.empty(len(unique), dtype=np.int64)
+        ids[known] = self._position_order[index[known]]
+        new = unique[~known]
+        ids[~known] = np.arange(len(self._position_accounts), len(self._position_accounts) + len(new))
+        if len(new):
+            self._position_accounts = np.concatenate((self._position_accounts, new >> 32))
+            self._position_markets = np.concatenate((self._position_markets, new & 0xFFFFFFFF))
+            keys = np.concatenate((self._position_keys, new))
+            order = np.argsort(keys, kind="stable")
+            self._position_keys = keys[order]
+            self._position_order = np.concatenate((self._position_order, ids[~known]))[order]
+        positions[holders] = ids[inverse]
+        return positions
+
+    def restore_positions(self, accounts, account_index, market_index, outcome1: np.ndarray, outcome2: np.ndarray):
+        """
+        Start from positions saved by an earlier run (see `scripts/snapshot.py`) instead of replaying
+        their logs. `accounts` are 20-byte addresses and the other arguments are laid out as in
+        `Positions`; the markets must have been added in the same order. Positions keep their numbers
+        and new ones are numbered after them.
+        """
+        if self.accounts or self._chunks or len(self._position_accounts):
+            raise ValueError("Positions can only be restored into an engine without positions.")
+        for address in accounts:
+            address = bytes(address)
+            self._accounts[address] = self._topic_accounts[bytes(12) + address] = len(self.accounts)
+            self.accounts.append(address)
+        self._position_accounts = np.array(account_index, dtype=np.int64)
+        self._position_markets = np.array(market_index, dtype=np.int64)
+        keys = (self._position_accounts << 32) | self._position_markets
+        self._position_order = np.argsort(keys, kind="stable")
+        self._position_keys = keys[self._position_order]
+        self._balances = np.empty((len(outcome1), 2 * outcome1.shape[1]), dtype=np.uint64)
+        self._balances[:, 0::2] = outcome1
+        self._balances[:, 1::2] = outcome2
+
+    def add_transfer_logs(self, logs: Sequence[Dict[str, Any]]) -> int:
+        """
+        Add raw `Transfer` logs of outcome tokens, as returned by `eth_getLogs` (topics and data as bytes);
+        logs of other contracts are skipped. Returns the number added.
+        """
+        tokens = self._tokens
+        selected = [log for log in logs if log["address"] in tokens and log["topics"][0] == TRANSFER_TOPIC]
+        if not selected:
+            return 0
+        token_sides = np.array([tokens[log["address"]] for log in selected], dtype=np.int64)
+        markets, sides = token_sides >> 1, token_sides & 1
+        topics = [log["topics"] for log in selected]
+        senders = self._position_ids(self._account_ids([topic[1] for topic in topics]), markets)
+        receivers = self._position_ids(self._account_ids([topic[2] for topic in topics]), markets)
+        # Slot of the (position, outcome) pair; the zero address keeps -1.
+        self._chunks.append((
+            np.where(receivers >= 0, receivers * 2 + sides, -1),
+            np.where(senders >= 0, senders * 2 + sides, -1),
+            words_to_limbs(b"".join([log["data"] for log in selected])),
+        ))
+        return len(selected)
+
+    def add_market_logs(self, logs: Sequence[Dict[str, Any]]) -> int:
+        """Add raw `TokensCreated`, `TokensRedeemed` and `TokensSettled` logs of the market. Returns the number added."""
+        inflows, outflows = ([], []), ([], [])
+        for log in logs:
+            topic = _as_bytes(log["topics"][0])
+            data = _as_bytes(log["data"])
+            market = self._markets.get(data[:32])
+            if market is None:
+                continue
+            if topic == TOKENS_CREATED_TOPIC:
+                target = inflows
+            elif topic in (TOKENS_REDEEMED_TOPIC, TOKENS_SETTLED_TOPIC):
+                target = outflows  # tokens_redeemed, or payout
+            else:
+                continue
+            target[0].append(market)
+            target[1].append(data[64:96])
+        for target, flows in ((self._collateral_in, inflows), (self._collateral_out, outflows)):
+            if flows[0]:
+                target.append((np.array(flows[0], dtype=np.int64), words_to_limbs(b"".join(flows[1]))))
+        return len(inflows[0]) + len(outflows[0])
+
+    def sync(self, web3, market_address: str, from_block: int, to_block: Optional[int] = None, chunk: int = 10_000) -> int:
+        """Fetch and add the outcome token and market logs between `from_block` and `to_block`. Returns the number added."""
+        if to_block is None:
+            to_block = web3.eth.block_number
+        tokens = self.token_addresses
+        added = 0
+        for start in range(from_block, to_block + 1, chunk):
+            end = min(start + chunk - 1, to_block)
+            if tokens:
+                added += self.add_transfer_logs(web3.eth.get_logs({
+                    "address": tokens, "fromBlock": start, "toBlock": end, "topics": [to_hex(TRANSFER_TOPIC)],
+                }))
+            added += self.add_market_logs(web3.eth.get_logs({
+                "address": web3.to_checksum_address(market_address),
+                "fromBlock": start,
+                "toBlock": end,
+                "topics": [[to_hex(TOKENS_CREATED_TOPIC), to_hex(TOKENS_REDEEMED_TOPIC), to_hex(TOKENS_SETTLED_TOPIC)]],
+            }))
+        return added
+
+    def positions(self) -> Positions:
+        """Outcome token balances of every (holder, market) pair that ever held either token."""
+        slots = 2 * len(self._position_accounts)
+        if self._chunks:
+            credits = np.concatenate([chunk[0] for chunk in self._chunks])
+            debits = np.concatenate([chunk[1] for chunk in self._chunks])
+            amounts = trim(np.concatenate([chunk[2] for chunk in self._chunks], axis=1))
+            self._chunks = []
+            width = max(len(amounts), len(self._balances))
+            amounts = widen(amounts, width)
+
+            # Credits and debits of every slot in one pass, debits summed into the slots after the credits.
+            # The zero address side of mints and burns is left out.
+            groups = np.concatenate((credits, debits + slots))
+            holders = np.concatenate((credits >= 0, debits >= 0))
+            sums = group_sum(np.concatenate((amounts, amounts), axis=1)[:, holders], groups[holders], 2 * slots)
+            previous = widen(self._balances, width)
+            previous = np.concatenate((previous, np.zeros((width, slots - previous.shape[1]), dtype=np.uint64)), axis=1)
+            self._balances = subtract(add(previous, sums[:, :slots]), sums[:, slots:])
+        elif self._balances.shape[1] < slots:
+            missing = slots - self._balances.shape[1]
+            self._balances = np.concatenate(
+                (self._balances, np.zeros((len(self._balances), missing), dtype=np.uint64)), axis=1
+            )
+
+        return Positions(
+            self.accounts,
+            self.market_ids,
+            self._position_accounts,
+            self._position_markets,
+            self._balances[:, 0::2],
+            self._balances[:, 1::2],
+        )
+
+    def payouts(self, positions: Optional[Positions] = None) -> Dict[str, np.ndarray]:
+        """Limb arrays with the payout of every position under each resolution."""
+        positions = positions or self.positions()
+        return {
+            "outcome1": positions.outcome1,
+            "outcome2": positions.outcome2,
+            "unresolvable": halve(add(positions.outcome1, positions.outcome2)),
+        }
+
+    def holder_payouts(self, account: str) -> Dict[bytes, Dict[str, int]]:
+        """Payouts of `account` per market under each resolution."""
+        positions = self.positions()
+        index = self._accounts.get(bytes(HexBytes(account)))
+        if index is None:
+            return {}
+        rows = np.nonzero(positions.account_index == index)[0]
+        payouts = {resolution: from_limbs(values[:, rows]) for resolution, values in self.payouts(positions).items()}
+        return {
+            self.market_ids[positions.market_index[row]]: {resolution: payouts[resolution][i] for resolution in RESOLUTIONS}
+            for i, row in enumerate(rows)
+        }
+
+    def liabilities(self) -> Dict[bytes, Dict[str, int]]:
+        """
+        Per market: the currency owed to all holders under each resolution, and the `collateral` paid in
+        for outcome tokens that was not redeemed or settled yet.
+        """
+        positions = self.positions()
+        count = len(self.market_ids)
+        payouts = self.payouts(positions)
+        totals = {
+            resolution: from_limbs(group_sum(payouts[resolution], positions.market_index, count))
+            for resolution in RESOLUTIONS
+        }
+        collateral = from_limbs(subtract(
+            self._flow_totals(self._collateral_in, count), self._flow_totals(self._collateral_out, count)
+        ))
+        return {
+            market_id: {**{resolution: totals[resolution][index] for resolution in RESOLUTIONS}, "collateral": collateral[index]}
+            for index, market_id in enumerate(self.market_ids)
+        }
+
+    @staticmethod
+    def _flow_totals(flows: List[Tuple[np.ndarray, np.ndarray]], count: int) -> np.ndarray:
+        if not flows:
+            return np.zeros((LIMBS, count), dtype=np.uint64)
+        return group_sum(
+            np.concatenate([limbs for _, limbs in flows], axis=1),
+            np.concatenate([markets for markets, _ in flows]),
+            count,
+        )
+
+
+def main():
+    from ape import chain
+    from scripts.market_state import MarketStateCache
+    from scripts.registry import DeploymentRegistry
+
+    registry = DeploymentRegistry(namespace=os.getenv("DEPLOYMENTS_NAMESPACE"))
+    market_address = registry.get("market_address")
+    start_block = int(os.getenv("INDEXER_START_BLOCK", "0"))
+    web3 = chain.provider.web3
+    head = web3.eth.block_number
+
+    state = MarketStateCache(web3, market_address, start_block=start_block)
+    state.sync(head)
+    engine = PayoutEngine()
+    for market_id in state.market_ids():
+        market = state.market(market_id)
+        engine.add_market(market_id, market.outcome1_token, market.outcome2_token)
+    engine.sync(web3, market_address, start_block, head)
+
+    report = {
+        to_hex(market_id): {key: str(value) for key, value in liabilities.items()}
+        for market_id, liabilities in engine.liabilities().items()
+    }
+    path = os.getenv("PAYOUTS_REPORT")
+    if path:
+        with open(path, "w") as file:
+            json.dump(report, file, indent=4)
+    else:
+        print(json.dumps(report, indent=4))
+
+
+if __name__ == "__main__":
+    main()
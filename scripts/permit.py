@@ -0,0 +1,80 @@
+"""
+EIP-2612 permits for the market currency, signed off-chain.
+
+A permit lets `PredictionMarket` pull currency in the same transaction that uses it
+(`initialize_market_with_permit`, `create_outcome_tokens_with_permit`, `assert_market_with_permit`)
+instead of after a separate `approve` transaction.
+"""
+from collections import namedtuple
+from typing import Any, Dict, Optional
+from eth_abi import encode
+from eth_account.messages import encode_typed_data
+from eth_utils import keccak, to_checksum_address
+from hexbytes import HexBytes
+from scripts import constants
+
+Permit = namedtuple("Permit", "deadline v r s")
+
+EIP712_DOMAIN_TYPE = "EIP712Domain(string name,string version,uint256 chainId,address verifyingContract)"
+PERMIT_TYPES = {
+    "Permit": [
+        {"name": "owner", "type": "address"},
+        {"name": "spender", "type": "address"},
+        {"name": "value", "type": "uint256"},
+        {"name": "nonce", "type": "uint256"},
+        {"name": "deadline", "type": "uint256"},
+    ],
+}
+
+
+def domain_separator(token: str, chain_id: int, name: str = constants.currency_name_eip712, version: str = constants.currency_version_eip712) -> bytes:
+    """The EIP-712 domain separator the currency at `token` computes for `name` and `version`."""
+    return keccak(encode(
+        ["bytes32", "bytes32", "bytes32", "uint256", "address"],
+        [keccak(text=EIP712_DOMAIN_TYPE), keccak(text=name), keccak(text=version), chain_id, to_checksum_address(token)],
+    ))
+
+
+def permit_message(
+    token: str,
+    chain_id: int,
+    owner: str,
+    spender: str,
+    value: int,
+    nonce: int,
+    deadline: int,
+    name: str = constants.currency_name_eip712,
+    version: str = constants.currency_version_eip712,
+) -> Dict[str, Any]:
+    """EIP-712 typed data of a permit, as accepted by `eth_account.messages.encode_typed_data(full_message=...)`."""
+    return {
+        "types": PERMIT_TYPES,
+        "primaryType": "Permit",
+        "domain": {"name": name, "version": version, "chainId": chain_id, "verifyingContract": to_checksum_address(token)},
+        "message": {
+            "owner": to_checksum_address(owner),
+            "spender": to_checksum_address(spender),
+            "value": value,
+            "nonce": nonce,
+            "deadline": deadline,
+        },
+    }
+
+
+def sign_permit(account, token, spender: str, value: int, deadline: Optional[int] = None) -> Permit:
+    """
+    Sign a permit of `value` currency from the ape `account` to `spender`, valid until `deadline`
+    (default: `constants.permit_validity` seconds after the latest block). `token` is the ape currency
+    contract; its nonce of the account and its domain separator are read from the chain.
+    """
+    provider = account.provider
+    chain_id = provider.chain_id
+    if bytes(HexBytes(token.DOMAIN_SEPARATOR())) != domain_separator(token.address, chain_id):
+        raise ValueError(f"EIP-712 domain of {token.address} does not match constants.currency_name_eip712/version.")
+    if deadline is None:
+        deadline = provider.get_block("latest").timestamp + constants.permit_validity
+    message = permit_message(token.address, chain_id, account.address, spender, value, token.nonces(account.address), deadline)
+    signature = account.sign_message(encode_typed_data(full_message=message))
+    if signature is None:
+        raise ValueError("Permit was not signed.")
+    return Permit(deadline, signature.v, bytes(signature.r), bytes(signature.s))
@@ -0,0 +1,242 @@
+import asyncio
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from eth_utils import to_hex
+from web3._utils.method_formatters import receipt_formatter
+from web3.exceptions import TransactionNotFound
+from web3.providers.base import JSONBaseProvider
+
+
+class PipelineError(Exception):
+    """Raised when a step of a `TransactionPipeline` fails or reverts."""
+
+    def __init__(self, step: str, message: str):
+        super().__init__(f"{step}: {message}")
+        self.step = step
+
+
+class NonceManager:
+    """Hands out nonces per account without asking the node for every transaction.
+
+    The first nonce of an account is read from the node (pending block); later ones are
+    counted locally. `reset` drops the local counter, for example after a transaction
+    could not be submitted, so the next nonce is read from the node again.
+    """
+
+    def __init__(self, web3):
+        self.web3 = web3
+        self._next: Dict[str, int] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+
+    def lock(self, address: str) -> asyncio.Lock:
+        """Lock held while a nonce of `address` is assigned and its transaction submitted."""
+        return self._locks.setdefault(address, asyncio.Lock())
+
+    async def peek(self, address: str) -> int:
+        if address not in self._next:
+            self._next[address] = await asyncio.to_thread(
+                self.web3.eth.get_transaction_count, address, "pending"
+            )
+        return self._next[address]
+
+    def consume(self, address: str):
+        self._next[address] += 1
+
+    def reset(self, address: Optional[str] = None):
+        if address is None:
+            self._next.clear()
+        else:
+            self._next.pop(address, None)
+
+
+class Step:
+    """One transaction of a pipeline.
+
+    `build(nonce)` returns the signed raw transaction. It runs in a worker thread, so
+    it may block on the node (gas estimation, fee lookup).
+    """
+
+    def __init__(self, name: str, sender: str, build: Callable[[int], bytes], depends_on: Iterable[str]):
+        self.name = name
+        self.sender = sender
+        self.build = build
+        self.depends_on = tuple(depends_on)
+
+
+class TransactionPipeline:
+    """Submits transactions concurrently with locally assigned nonces.
+
+    Steps declare the steps they depend on; a step is only built once all of them are
+    mined successfully. Independent steps are submitted without waiting for each other's
+    receipts, also when they come from the same account: nonces are assigned in the order
+    in which steps are submitted and the node mines them in that order. Receipts of all
+    outstanding transactions are polled together, one round per `poll_interval`, in a single
+    JSON-RPC batch request when the provider supports batches. A failed round is retried with
+    exponential backoff; after `poll_retries` failures in a row, the outstanding steps fail with
+    the error of the last round.
+
+        pipeline = TransactionPipeline(chain.provider.web3)
+        pipeline.add_call("allocate", currency.allocateTo, wallet, amount, sender=wallet)
+        pipeline.add_call("approve", currency.approve, market, amount, sender=wallet)
+        pipeline.add_call("create", market.create_outcome_tokens, market_id, amount,
+                          sender=wallet, depends_on=["allocate", "approve"])
+        receipts = pipeline.run()
+    """
+
+    def __init__(
+        self,
+        web3,
+        nonces: Optional[NonceManager] = None,
+        poll_interval: float = 0.1,
+        timeout: float = 120,
+        poll_retries: int = 5,
+    ):
+        self.web3 = web3
+        self.nonces = nonces or NonceManager(web3)
+        self.poll_interval = poll_interval
+        self.timeout = timeout
+        self.poll_retries = poll_retries
+        self.steps: Dict[str, Step] = {}
+        # Cleared once the provider or the node turns a batch request down.
+        self._batch_receipts = isinstance(web3.provider, JSONBaseProvider)
+
+    def add(self, name: str, sender: str, build: Callable[[int], bytes], depends_on: Iterable[str] = ()) -> str:
+        """Add a step that signs its own transaction; see `Step`."""
+        if name in self.steps:
+            raise ValueError(f"Duplicate step name: {name}")
+        for dependency in depends_on:
+            if dependency not in self.steps:
+                raise ValueError(f"Step {name} depends on unknown step {dependency}")
+        self.steps[name] = Step(name, self.web3.to_checksum_address(sender), build, depends_on)
+        return name
+
+    def add_call(self, name: str, method, *args, sender, depends_on: Iterable[str] = (), **kwargs) -> str:
+        """Add a call of the ape contract method `method` sent from the ape account `sender`."""
+
+        def build(nonce: int) -> bytes:
+            txn = method.as_transaction(*args, sender=sender, nonce=nonce, **kwargs)
+            return sender.sign_transaction(txn).serialize_transaction()
+
+        return self.add(name, sender.address, build, depends_on)
+
+    def add_deploy(self, name: str, container, *args, sender, depends_on: Iterable[str] = (), **kwargs) -> str:
+        """Add a deployment of the ape contract container `container`; the receipt has its `contractAddress`."""
+
+        def build(nonce: int) -> bytes:
+            txn = container.constructor.serialize_transaction(*args, sender=sender, nonce=nonce, **kwargs)
+            txn = sender.provider.prepare_transaction(txn)
+            return sender.sign_transaction(txn).serialize_transaction()
+
+        return self.add(name, sender.address, build, depends_on)
+
+    def run(self) -> Dict[str, Any]:
+        """Run all steps and return their receipts by step name."""
+        return asyncio.run(self.run_async())
+
+    async def run_async(self) -> Dict[str, Any]:
+        pending: Dict[bytes, asyncio.Future] = {}
+        results: Dict[str, asyncio.Future] = {}
+        loop = asyncio.get_running_loop()
+        for name in self.steps:
+            results[name] = loop.create_future()
+
+        poller = asyncio.create_task(self._poll_receipts(pending))
+        tasks = [asyncio.create_task(self._run_step(step, results, pending)) for step in self.steps.values()]
+        try:
+            await asyncio.gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            poller.cancel()
+            for future in results.values():
+                if future.done() and not future.cancelled():
+                    future.exception()  # Failures are reported once, by the gather above.
+        return {name: future.result() for name, future in results.items()}
+
+    async def _run_step(self, step: Step, results: Dict[str, asyncio.Future], pending: Dict[bytes, asyncio.Future]):
+        result = results[step.name]
+        try:
+            for dependency in step.depends_on:
+                await asyncio.shield(results[dependency])
+
+            async with self.nonces.lock(step.sender):
+                nonce = await self.nonces.peek(step.sender)
+                try:
+                    raw = await asyncio.to_thread(step.build, nonce)
+                    txn_hash = bytes(await asyncio.to_thread(self.web3.eth.send_raw_transaction, raw))
+                except Exception:
+                    self.nonces.reset(step.sender)
+                    raise
+                self.nonces.consume(step.sender)
+                receipt_future = asyncio.get_running_loop().create_future()
+                pending[txn_hash] = receipt_future
+
+            receipt = await asyncio.wait_for(receipt_future, self.timeout)
+            if receipt["status"] != 1:
+                raise PipelineError(step.name, f"transaction {to_hex(txn_hash)} reverted")
+            result.set_result(receipt)
+        except PipelineError as err:
+            result.set_exception(err)
+            raise
+        except Exception as err:
+            error = PipelineError(step.name, repr(err))
+            result.set_exception(error)
+            raise error from err
+
+    async def _poll_receipts(self, pending: Dict[bytes, asyncio.Future]):
+        failures = 0
+        while True:
+            if pending:
+                hashes = list(pending)
+                try:
+                    receipts = await asyncio.to_thread(self._get_receipts, hashes)
+                except Exception as err:
+                    failures += 1
+                    if failures < self.poll_retries:
+                        await asyncio.sleep(self.poll_interval * 2 ** failures)
+                        continue
+                    # Give up on the transactions polled so far; later ones start a new series.
+                    failures = 0
+                    for txn_hash in hashes:
+                        future = pending.pop(txn_hash)
+                        if not future.done():
+                            future.set_exception(err)
+                    continue
+                failures = 0
+                for txn_hash, receipt in zip(hashes, receipts):
+                    if receipt is not None:
+                        future = pending.pop(txn_hash)
+                        if not future.done():
+                            future.set_result(receipt)
+            await asyncio.sleep(self.poll_interval)
+
+    def _get_receipts(self, hashes: List[bytes]) -> List[Optional[Dict[str, Any]]]:
+        """Receipts of `hashes`, None for transactions not mined yet."""
+        if self._batch_receipts and len(hashes) > 1:
+            receipts = self._get_receipts_batch(hashes)
+            if receipts is not None:
+                return receipts
+        receipts = []
+        for txn_hash in hashes:
+            try:
+                receipts.append(self.web3.eth.get_transaction_receipt(txn_hash))
+            except TransactionNotFound:
+                receipts.append(None)
+        return receipts
+
+    def _get_receipts_batch(self, hashes: List[bytes]) -> Optional[List[Optional[Dict[str, Any]]]]:
+        """All receipts in one batch request, or None when batches are not supported."""
+        try:
+            responses = self.web3.provider.make_batch_request(
+                [("eth_getTransactionReceipt", [to_hex(txn_hash)]) for txn_hash in hashes]
+            )
+        except NotImplementedError:
+            responses = None
+        if not isinstance(responses, list) or len(responses) != len(hashes):
+            # A node without batch support answers with a single error.
+            self._batch_receipts = False
+            return None
+        # A failed lookup is treated like a pending transaction and asked for again next round.
+        return [
+            receipt_formatter(response["result"]) if response.get("result") else None
+            for response in responses
+        ]
@@ -0,0 +1,126 @@
+import os
+import json
+import tempfile
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+base_dir = os.path.dirname(os.path.abspath(__file__))
+default_path = os.path.join(base_dir, "deployments.json")
+
+_MISSING = object()
+
+
+class DeploymentRegistry:
+    """In-memory view of `deployments.json` with batched, atomic writes.
+
+    The file is read once on first access and every lookup is then served from memory.
+    Writes are staged and only reach the disk on `flush()` (or at the end of a
+    `transaction()` block), where they are merged into the current file contents and
+    written to a temporary file that atomically replaces the original.
+
+    When `namespace` is given (forexample a chain id or `"sepolia-fork"`), keys are kept
+    under a nested object of that name so that several deployments can live side by side
+    in the same file. Without a namespace the registry reads and writes top-level keys,
+    matching the layout used by `edit_value` and `get_value`.
+    """
+
+    def __init__(self, path: Optional[str] = None, namespace: Optional[str] = None):
+        self.path = path or default_path
+        self.namespace = str(namespace) if namespace is not None else None
+        self._data: Optional[Dict[str, Any]] = None  # Last known file contents
+        self._pending: Dict[str, Any] = {}  # Staged writes, not yet on disk
+
+    def _read_file(self) -> Dict[str, Any]:
+        try:
+            with open(self.path, "r") as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+
+    def _scope(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        if self.namespace is None:
+            return data
+        scope = data.setdefault(self.namespace, {})
+        if not isinstance(scope, dict):
+            raise ValueError(f"Key '{self.namespace}' in {self.path} is not a namespace.")
+        return scope
+
+    def load(self) -> "DeploymentRegistry":
+        """(Re)load the file from disk. Staged writes are kept."""
+        self._data = self._read_file()
+        return self
+
+    def get(self, key: str, default: Any = _MISSING) -> Any:
+        if key in self._pending:
+            return self._pending[key]
+        if self._data is None:
+            self.load()
+        scope = self._scope(self._data)
+        if key in scope:
+            return scope[key]
+        if default is _MISSING:
+            raise KeyError(f"'{key}' not found in {self.path} (namespace: {self.namespace}).")
+        return default
+
+    def set(self, key: str, value: Any):
+        """Stage `key` to be written on the next flush."""
+        self._pending[key] = value
+
+    def update(self, values: Dict[str, Any]):
+        self._pending.update(values)
+
+    def __getitem__(self, key: str) -> Any:
+        return self.get(key)
+
+    def __setitem__(self, key: str, value: Any):
+        self.set(key, value)
+
+    def __contains__(self, key: str) -> bool:
+        try:
+            self.get(key)
+        except KeyError:
+            return False
+        return True
+
+    @property
+    def dirty(self) -> bool:
+        return bool(self._pending)
+
+    def rollback(self):
+        """Drop every staged write."""
+        self._pending.clear()
+
+    def flush(self):
+        """Merge staged writes into the file and atomically replace it."""
+        if not self._pending:
+            return
+
+        # Re-read so writes made to other namespaces since our load are not lost.
+        data = self._read_file()
+        self._scope(data).update(self._pending)
+
+        directory = os.path.dirname(self.path) or "."
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".deployments.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as file:
+                json.dump(data, file, indent=4)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        self._data = data
+        self._pending.clear()
+
+    @contextmanager
+    def transaction(self) -> Iterator["DeploymentRegistry"]:
+        """Flush staged writes when the block succeeds, discard them if it raises."""
+        try:
+            yield self
+        except BaseException:
+            self.rollback()
+            raise
+        self.flush()
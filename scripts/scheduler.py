@@ -0,0 +1,324 @@
+"""
+Settle market assertions as soon as their liveness has passed.
+
+`SettlementScheduler` discovers assertions from the market's `MarketAsserted` events and keeps them in
+a priority queue ordered by the time they can be settled (block timestamp of the assertion plus the
+market's `assertion_liveness`). `MarketResolved` and `MarketAssertionRejected` take them out again,
+also when someone else settled them. Every round settles all matured assertions, `batch_size` at a
+time, in one `OOV3.multicall` transaction per batch.
+
+Run: `ape run scheduler --network ethereum:local:foundry`
+
+`SCHEDULER_POLL_INTERVAL` sets the seconds between rounds (default 5), `SCHEDULER_ROUNDS` stops after
+that many rounds, `SCHEDULER_PROM` names a Prometheus text file rewritten after every round.
+"""
+import os
+import time
+import heapq
+from typing import Callable, Dict, List, Optional, Tuple
+from eth_abi import encode
+from eth_utils import keccak, to_checksum_address, to_hex
+from hexbytes import HexBytes
+from web3.exceptions import Web3Exception
+from scripts import constants
+from scripts.events import MARKET_EVENT_TOPICS
+
+SETTLE_ASSERTION_SELECTOR = keccak(text="settleAssertion(bytes32)")[:4]
+MULTICALL_SELECTOR = keccak(text="multicall(bytes[])")[:4]
+SCHEDULER_EVENTS = ("MarketAsserted", "MarketResolved", "MarketAssertionRejected")
+
+
+def settle_calldata(assertion_id) -> bytes:
+    """Calldata of `OOV3.settleAssertion(assertion_id)`."""
+    return SETTLE_ASSERTION_SELECTOR + bytes(HexBytes(assertion_id))
+
+
+def multicall_calldata(calls: List[bytes]) -> bytes:
+    """Calldata of `OOV3.multicall(calls)`."""
+    return MULTICALL_SELECTOR + encode(["bytes[]"], [calls])
+
+
+class SettlementScheduler:
+    """Deadline ordered queue of pending assertions of a `PredictionMarket`.
+
+    `submit(calls)` sends one transaction calling `OOV3.multicall(calls)` and returns once it is mined,
+    for example `lambda calls: oov3.multicall(calls, sender=account)` with ape. A batch is first
+    simulated with `eth_call`; when it would revert (an assertion was disputed and is not resolved yet,
+    or was settled in the meantime) it is split in halves until the assertions that cannot be settled
+    are isolated. Those are retried `retry_delay` seconds later, as are the assertions of a batch whose
+    `submit` raises; the remaining batches of the round are still submitted.
+
+    Times are chain time: an assertion is due once the latest block's timestamp reaches its deadline.
+    Settlement lag is the chain time between the deadline and the block after the settling batch.
+    """
+
+    def __init__(
+        self,
+        web3,
+        market_address: str,
+        oov3_address: str,
+        submit: Callable[[List[bytes]], object],
+        sender: Optional[str] = None,
+        start_block: int = 0,
+        confirmations: int = 0,
+        chunk: int = 10_000,
+        liveness: int = constants.assertion_liveness,
+        batch_size: int = constants.max_settle_batch,
+        retry_delay: int = 600,
+    ):
+        self.web3 = web3
+        self.market_address = to_checksum_address(market_address)
+        self.oov3_address = to_checksum_address(oov3_address)
+        self.submit = submit
+        self.sender = sender
+        self.block = start_block - 1  # Last block whose events were applied.
+        self.confirmations = confirmations
+        self.chunk = chunk
+        self.liveness = liveness
+        self.batch_size = batch_size
+        self.retry_delay = retry_delay
+
+        # Entries whose deadline differs from `_deadlines` (cancelled or rescheduled) are skipped when popped.
+        self._queue: List[Tuple[int, bytes]] = []
+        self._deadlines: Dict[bytes, int] = {}
+        self._markets: Dict[bytes, bytes] = {}  # assertion_id -> market_id
+        self._pending: Dict[bytes, bytes] = {}  # market_id -> assertion_id
+
+        self.settled = 0
+        self.failed = 0
+        self.batches = 0
+        self.lag_sum = 0
+        self.lag_max = 0
+        self.last_lag: Optional[int] = None
+
+    # Queue
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
+    def __contains__(self, assertion_id) -> bool:
+        return bytes(HexBytes(assertion_id)) in self._deadlines
+
+    def schedule(self, assertion_id, market_id, deadline: int):
+        """Queue `assertion_id` (of `market_id`) to be settled at `deadline`, replacing an earlier deadline."""
+        assertion_id, market_id = bytes(HexBytes(assertion_id)), bytes(HexBytes(market_id))
+        self._deadlines[assertion_id] = deadline
+        self._markets[assertion_id] = market_id
+        self._pending[market_id] = assertion_id
+        heapq.heappush(self._queue, (deadline, assertion_id))
+
+    def cancel(self, assertion_id):
+        assertion_id = bytes(HexBytes(assertion_id))
+        self._deadlines.pop(assertion_id, None)
+        market_id = self._markets.pop(assertion_id, None)
+        if market_id is not None and self._pending.get(market_id) == assertion_id:
+            del self._pending[market_id]
+
+    def cancel_market(self, market_id):
+        """Drop the pending assertion of `market_id`, if any."""
+        assertion_id = self._pending.get(bytes(HexBytes(market_id)))
+        if assertion_id is not None:
+            self.cancel(assertion_id)
+
+    def next_deadline(self) -> Optional[int]:
+        self._drop_stale()
+        return self._queue[0][0] if self._queue else None
+
+    def due(self, now: int) -> int:
+        """Number of queued assertions whose deadline is at or before `now`."""
+        return sum(1 for deadline in self._deadlines.values() if deadline <= now)
+
+    def pop_due(self, now: int) -> List[bytes]:
+        """Remove and return the assertions due at `now`, earliest deadline first."""
+        due: Dict[bytes, None] = {}
+        while True:
+            self._drop_stale()
+            if not self._queue or self._queue[0][0] > now:
+                return list(due)
+            _, assertion_id = heapq.heappop(self._queue)
+            due[assertion_id] = None
+
+    def _drop_stale(self):
+        while self._queue and self._deadlines.get(self._queue[0][1]) != self._queue[0][0]:
+            heapq.heappop(self._queue)
+
+    # Discovery
+
+    def sync(self, to_block: Optional[int] = None) -> int:
+        """Apply the market's assertion events up to `to_block` (default: latest minus `confirmations`)."""
+        if to_block is None:
+            to_block = self.web3.eth.block_number - self.confirmations
+        topics = [to_hex(topic) for topic, (name, _) in MARKET_EVENT_TOPICS.items() if name in SCHEDULER_EVENTS]
+        applied = 0
+        timestamps: Dict[int, int] = {}
+        while self.block < to_block:
+            end = min(self.block + self.chunk, to_block)
+            logs = self.web3.eth.get_logs({
+                "address": self.market_address,
+                "fromBlock": self.block + 1,
+                "toBlock": end,
+                "topics": [topics],
+            })
+            for log in logs:
+                name, decode = MARKET_EVENT_TOPICS[bytes(HexBytes(log["topics"][0]))]
+                event = decode(bytes(HexBytes(log["data"])))
+                if name == "MarketAsserted":
+                    number = log["blockNumber"]
+                    if number not in timestamps:
+                        timestamps[number] = self.web3.eth.get_block(number)["timestamp"]
+                    self.schedule(event.assertion_id, event.market_id, timestamps[number] + self.liveness)
+                elif name == "MarketAssertionRejected":
+                    self.cancel(event.assertion_id)
+                else:
+                    self.cancel_market(event.market_id)
+            applied += len(logs)
+            self.block = end
+        return applied
+
+    # Settlement
+
+    def _now(self) -> int:
+        return self.web3.eth.get_block("latest")["timestamp"]
+
+    def _can_settle(self, assertion_ids: List[bytes]) -> bool:
+        transaction = {"to": self.oov3_address, "data": multicall_calldata([settle_calldata(a) for a in assertion_ids])}
+        if self.sender is not None:
+            transaction["from"] = to_checksum_address(self.sender)
+        try:
+            self.web3.eth.call(transaction)
+        except (Web3Exception, ValueError):
+            return False
+        return True
+
+    def settle_due(self, now: Optional[int] = None) -> List[bytes]:
+        """Settle every assertion due at `now` (default: latest block timestamp). Returns the settled ids."""
+        now = self._now() if now is None else now
+        due = self.pop_due(now)
+        settled: List[bytes] = []
+        for start in range(0, len(due), self.batch_size):
+            settled += self._settle(due[start:start + self.batch_size], now)
+        return settled
+
+    def _settle(self, assertion_ids: List[bytes], now: int) -> List[bytes]:
+        if not self._can_settle(assertion_ids):
+            if len(assertion_ids) == 1:
+                self.failed += 1
+                self.schedule(assertion_ids[0], self._markets[assertion_ids[0]], now + self.retry_delay)
+                return []
+            middle = len(assertion_ids) // 2
+            return self._settle(assertion_ids[:middle], now) + self._settle(assertion_ids[middle:], now)
+
+        deadlines = [self._deadlines[assertion_id] for assertion_id in assertion_ids]
+        try:
+            self.submit([settle_calldata(assertion_id) for assertion_id in assertion_ids])
+        except Exception:
+            # Not sent, or not mined in time: the retry is simulated again before it is submitted.
+            self.failed += len(assertion_ids)
+            for assertion_id in assertion_ids:
+                self.schedule(assertion_id, self._markets[assertion_id], now + self.retry_delay)
+            return []
+        settled_at = self._now()
+        self.batches += 1
+        for assertion_id, deadline in zip(assertion_ids, deadlines):
+            self.cancel(assertion_id)
+            lag = max(settled_at - deadline, 0)
+            self.settled += 1
+            self.lag_sum += lag
+            self.lag_max = max(self.lag_max, lag)
+            self.last_lag = lag
+        return assertion_ids
+
+    def run_once(self) -> List[bytes]:
+        self.sync()
+        return self.settle_due()
+
+    def run(self, poll_interval: float = 5, rounds: Optional[int] = None, on_round: Optional[Callable[["SettlementScheduler"], None]] = None):
+        """Sync and settle every `poll_interval` seconds, `rounds` times or until interrupted."""
+        done = 0
+        while rounds is None or done < rounds:
+            self.run_once()
+            if on_round is not None:
+                on_round(self)
+            done += 1
+            if rounds is None or done < rounds:
+                time.sleep(poll_interval)
+
+    # Metrics
+
+    def stats(self, now: Optional[int] = None) -> Dict[str, Optional[int]]:
+        """Queue depth, due and overdue assertions at `now` and settlement lag so far (seconds of chain time)."""
+        now = self._now() if now is None else now
+        next_deadline = self.next_deadline()
+        overdue = [now - deadline for deadline in self._deadlines.values() if deadline <= now]
+        return {
+            "queue_depth": len(self),
+            "due": len(overdue),
+            "oldest_overdue": max(overdue) if overdue else 0,
+            "next_deadline": next_deadline,
+            "settled": self.settled,
+            "failed": self.failed,
+            "batches": self.batches,
+            "lag_max": self.lag_max,
+            "lag_avg": self.lag_sum // self.settled if self.settled else 0,
+            "last_lag": self.last_lag,
+        }
+
+    def prometheus_text(self, now: Optional[int] = None, prefix: str = "assertion_settlement") -> str:
+        stats = self.stats(now)
+        lines = []
+        for name, kind, value, help_text in (
+            ("queue_depth", "gauge", stats["queue_depth"], "Pending assertions in the queue."),
+            ("due", "gauge", stats["due"], "Queued assertions whose liveness has passed."),
+            ("oldest_overdue_seconds", "gauge", stats["oldest_overdue"], "Time since the deadline of the oldest due assertion."),
+            ("settled_total", "counter", self.settled, "Assertions settled by the scheduler."),
+            ("failed_total", "counter", self.failed, "Settlement attempts that would revert and were retried later."),
+            ("batches_total", "counter", self.batches, "Settlement transactions sent."),
+            ("lag_seconds_max", "gauge", self.lag_max, "Largest time between deadline and settlement."),
+        ):
+            lines += [f"# HELP {prefix}_{name} {help_text}", f"# TYPE {prefix}_{name} {kind}", f"{prefix}_{name} {value}"]
+        lines += [
+            f"# HELP {prefix}_lag_seconds Time between the deadline and the settlement of assertions.",
+            f"# TYPE {prefix}_lag_seconds summary",
+            f"{prefix}_lag_seconds_sum {self.lag_sum}",
+            f"{prefix}_lag_seconds_count {self.settled}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def main():
+    from ape import accounts, chain, project
+    from scripts.cache import contracts
+    from scripts.registry import DeploymentRegistry
+
+    registry = DeploymentRegistry(namespace=os.getenv("DEPLOYMENTS_NAMESPACE"))
+    sender = accounts.load(os.getenv("SCHEDULER_ACCOUNT", "account1"))
+    oov3 = contracts.at(project.OOV3, registry.get("OOV3_address"))
+    scheduler = SettlementScheduler(
+        chain.provider.web3,
+        registry.get("market_address"),
+        oov3.address,
+        lambda calls: oov3.multicall(calls, sender=sender),
+        sender=sender.address,
+        start_block=int(os.getenv("INDEXER_START_BLOCK", "0")),
+        confirmations=int(os.getenv("INDEXER_CONFIRMATIONS", "0")),
+    )
+    prometheus_path = os.getenv("SCHEDULER_PROM")
+    rounds = os.getenv("SCHEDULER_ROUNDS")
+
+    def report(scheduler):
+        stats = scheduler.stats()
+        print(
+            f"queue depth: {stats['queue_depth']}, due: {stats['due']}, settled: {stats['settled']}, "
+            f"failed: {stats['failed']}, max lag: {stats['lag_max']}s"
+        )
+        if prometheus_path:
+            temporary = f"{prometheus_path}.{os.getpid()}.tmp"
+            with open(temporary, "w") as file:
+                file.write(scheduler.prometheus_text())
+            os.replace(temporary, prometheus_path)
+
+    scheduler.run(
+        poll_interval=float(os.getenv("SCHEDULER_POLL_INTERVAL", "5")),
+        rounds=int(rounds) if rounds else None,
+        on_round=report,
+    )
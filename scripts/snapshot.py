@@ -0,0 +1,286 @@
+"""
+Columnar snapshots of the markets and outcome token positions of a `PredictionMarket`.
+
+A snapshot is a directory with one raw file per column and a small `manifest.json`:
+
+    markets     market_id (32 bytes), outcome1_token, outcome2_token (20 bytes), reward, required_bond
+                (uint256), resolved (bool), asserted_outcome (ASSERTED_* code)
+    accounts    account (20 bytes)
+    positions   account_index, market_index (rows of accounts and markets), outcome1_balance,
+                outcome2_balance (uint256)
+
+Every column has a fixed width per row, so `Snapshot` maps a column with `np.memmap` and a query on
+it only reads the pages it touches. uint256 amounts are stored as 8 uint64 limbs of 32 bits per row,
+most significant first, and `Snapshot.limbs` returns them in the (8, n) layout of `scripts/payouts.py`
+without copying.
+
+    SNAPSHOT_DIR=snapshot ape run snapshot --network ethereum:local:foundry
+
+Each export continues from the block of the manifest. Markets come from the contract's market index,
+positions from the outcome tokens' `Transfer` logs since that block on top of the saved positions.
+New markets, accounts and positions are appended, since their rows never move. The status of existing
+markets and the balances of existing positions are rewritten in place, and only where they changed.
+The manifest is replaced last. A reader that opens the manifest first never reads past the rows
+it lists, but it can see in-place updates from an export that runs at the same time.
+"""
+import os
+import json
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from hexbytes import HexBytes
+from eth_utils import to_checksum_address
+from scripts.market_state import EMPTY_ID, MarketStateCache
+from scripts.payouts import LIMBS, PayoutEngine, Positions, to_limbs, widen
+
+FORMAT = 1
+MANIFEST = "manifest.json"
+
+# Codes of the asserted_outcome column.
+ASSERTED_NONE, ASSERTED_OUTCOME1, ASSERTED_OUTCOME2, ASSERTED_UNRESOLVABLE = range(4)
+
+# table -> column -> (dtype, shape of one row, rewritten in place by later exports)
+TABLES: Dict[str, Dict[str, Tuple[str, Tuple[int, ...], bool]]] = {
+    "markets": {
+        "market_id": ("u1", (32,), False),
+        "outcome1_token": ("u1", (20,), False),
+        "outcome2_token": ("u1", (20,), False),
+        "reward": ("<u8", (LIMBS,), False),
+        "required_bond": ("<u8", (LIMBS,), False),
+        "resolved": ("?", (), True),
+        "asserted_outcome": ("u1", (), True),
+    },
+    "accounts": {
+        "account": ("u1", (20,), False),
+    },
+    "positions": {
+        "account_index": ("<u4", (), False),
+        "market_index": ("<u4", (), False),
+        "outcome1_balance": ("<u8", (LIMBS,), True),
+        "outcome2_balance": ("<u8", (LIMBS,), True),
+    },
+}
+
+
+def _bytes_column(values: List[bytes], width: int) -> np.ndarray:
+    return np.frombuffer(b"".join(values), dtype=np.uint8).reshape(len(values), width)
+
+
+def _limb_rows(limbs: np.ndarray) -> np.ndarray:
+    """A (width, n) limb array of `scripts/payouts.py` as (n, LIMBS) rows."""
+    return np.ascontiguousarray(widen(limbs, LIMBS).T)
+
+
+class Snapshot:
+    """Read-only view of a snapshot directory, with columns mapped on first access."""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        with open(os.path.join(directory, MANIFEST), "r") as file:
+            self.manifest = json.load(file)
+        if self.manifest.get("format") != FORMAT:
+            raise ValueError(f"Unsupported snapshot format {self.manifest.get('format')} in {directory}.")
+        self._columns: Dict[Tuple[str, str], np.ndarray] = {}
+
+    @property
+    def block(self) -> int:
+        """Last block included in the snapshot."""
+        return self.manifest["block"]
+
+    def rows(self, table: str) -> int:
+        return self.manifest["tables"][table]["rows"]
+
+    def column(self, table: str, name: str) -> np.ndarray:
+        """The column as a read-only memory map of `rows(table)` rows."""
+        key = (table, name)
+        if key not in self._columns:
+            spec = self.manifest["tables"][table]["columns"][name]
+            shape = (self.rows(table), *spec["shape"])
+            if shape[0] == 0:
+                self._columns[key] = np.zeros(shape, dtype=spec["dtype"])
+            else:
+                path = os.path.join(self.directory, spec["file"])
+                self._columns[key] = np.memmap(path, dtype=spec["dtype"], mode="r", shape=shape)
+        return self._columns[key]
+
+    def limbs(self, table: str, name: str) -> np.ndarray:
+        """An amount column as a (LIMBS, rows) limb array, for the arithmetic of `scripts/payouts.py`."""
+        return self.column(table, name).T
+
+    def market_ids(self) -> List[bytes]:
+        return [bytes(row) for row in self.column("markets", "market_id")]
+
+    def accounts(self) -> List[bytes]:
+        return [bytes(row) for row in self.column("accounts", "account")]
+
+
+def market_columns(state: MarketStateCache, market_ids: List[bytes]) -> Dict[str, np.ndarray]:
+    """Columns of the `markets` table for `market_ids`, read from `state`."""
+    markets = [state.market(market_id) for market_id in market_ids]
+    asserted = []
+    for market in markets:
+        asserted_outcome_id = bytes(market.asserted_outcome_id)
+        if asserted_outcome_id == EMPTY_ID:
+            asserted.append(ASSERTED_NONE)
+        elif asserted_outcome_id == bytes(market.outcome1_id):
+            asserted.append(ASSERTED_OUTCOME1)
+        elif asserted_outcome_id == bytes(market.outcome2_id):
+            asserted.append(ASSERTED_OUTCOME2)
+        else:
+            asserted.append(ASSERTED_UNRESOLVABLE)
+    return {
+        "market_id": _bytes_column(market_ids, 32),
+        "outcome1_token": _bytes_column([bytes(HexBytes(market.outcome1_token)) for market in markets], 20),
+        "outcome2_token": _bytes_column([bytes(HexBytes(market.outcome2_token)) for market in markets], 20),
+        "reward": _limb_rows(to_limbs(market.reward for market in markets)),
+        "required_bond": _limb_rows(to_limbs(market.required_bond for market in markets)),
+        "resolved": np.array([market.resolved for market in markets], dtype=bool),
+        "asserted_outcome": np.array(asserted, dtype=np.uint8),
+    }
+
+
+def position_columns(positions: Positions) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    """Columns of the `accounts` and `positions` tables."""
+    return (
+        {"account": _bytes_column(positions.accounts, 20)},
+        {
+            "account_index": positions.account_index.astype(np.uint32),
+            "market_index": positions.market_index.astype(np.uint32),
+            "outcome1_balance": _limb_rows(positions.outcome1),
+            "outcome2_balance": _limb_rows(positions.outcome2),
+        },
+    )
+
+
+def _write_column(path: str, dtype: str, row_shape: Tuple[int, ...], previous_rows: int, values: np.ndarray, mutable: bool):
+    """
+    Bring the column file at `path` from `previous_rows` rows to `values`: rewrite the changed rows
+    of a mutable column in place and append the new rows. Bytes past `previous_rows`, left by an
+    interrupted export, are dropped first.
+    """
+    values = np.ascontiguousarray(values, dtype=dtype)
+    row_bytes = values.dtype.itemsize * int(np.prod(row_shape, dtype=np.int64))
+    mode = "r+b" if os.path.exists(path) else "w+b"
+    with open(path, mode) as file:
+        file.truncate(previous_rows * row_bytes)
+    if mutable and previous_rows:
+        stored = np.memmap(path, dtype=dtype, mode="r+", shape=(previous_rows, *row_shape))
+        changed = stored != values[:previous_rows]
+        if changed.ndim > 1:
+            changed = changed.reshape(previous_rows, -1).any(axis=1)
+        rows = np.nonzero(changed)[0]
+        if len(rows):
+            stored[rows] = values[rows]
+            stored.flush()
+        del stored
+    with open(path, "ab") as file:
+        file.write(values[previous_rows:].tobytes())
+
+
+def write_snapshot(directory: str, block: int, market_address: str, tables: Dict[str, Dict[str, np.ndarray]]):
+    """
+    Write `tables` (table -> column -> array with one row per entry, as built by `market_columns`
+    and `position_columns`) to the snapshot in `directory` as of `block`. Rows already in the
+    snapshot must keep their position.
+    """
+    os.makedirs(directory, exist_ok=True)
+    manifest_path = os.path.join(directory, MANIFEST)
+    previous: Optional[Dict[str, Any]] = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r") as file:
+            previous = json.load(file)
+        if previous["market_address"] != to_checksum_address(market_address):
+            raise ValueError(f"{directory} holds a snapshot of {previous['market_address']}.")
+
+    manifest = {"format": FORMAT, "market_address": to_checksum_address(market_address), "block": block, "tables": {}}
+    for table, columns in TABLES.items():
+        rows = len(tables[table][next(iter(columns))])
+        previous_rows = previous["tables"][table]["rows"] if previous else 0
+        if rows < previous_rows:
+            raise ValueError(f"{table} has {rows} rows, fewer than the {previous_rows} already in the snapshot.")
+        manifest["tables"][table] = {"rows": rows, "columns": {}}
+        for name, (dtype, row_shape, mutable) in columns.items():
+            file_name = f"{table}.{name}.bin"
+            _write_column(
+                os.path.join(directory, file_name), dtype, row_shape, previous_rows, tables[table][name], mutable
+            )
+            manifest["tables"][table]["columns"][name] = {"file": file_name, "dtype": dtype, "shape": list(row_shape)}
+
+    temporary = f"{manifest_path}.{os.getpid()}.tmp"
+    with open(temporary, "w") as file:
+        json.dump(manifest, file, indent=4)
+    os.replace(temporary, manifest_path)
+
+
+def export(
+    web3,
+    market_address: str,
+    directory: str,
+    start_block: int = 0,
+    to_block: Optional[int] = None,
+    abi: Optional[List[Dict[str, Any]]] = None,
+    chunk: int = 10_000,
+) -> Snapshot:
+    """
+    Export the markets and positions of the market at `market_address` as of `to_block` (default:
+    latest) to `directory`. Logs are read from `start_block` on the first export and from the block
+    after the snapshot's afterwards.
+    """
+    if to_block is None:
+        to_block = web3.eth.block_number
+    snapshot = Snapshot(directory) if os.path.exists(os.path.join(directory, MANIFEST)) else None
+    if snapshot is not None:
+        if to_block < snapshot.block:
+            raise ValueError(f"Snapshot in {directory} is already at block {snapshot.block}.")
+        start_block = snapshot.block + 1
+
+    state = MarketStateCache(web3, market_address, abi=abi)
+    state.load_index(to_block)
+    market_ids = list(state.market_ids())
+    engine = PayoutEngine()
+    for market_id in market_ids:
+        market = state.market(market_id)
+        engine.add_market(market_id, market.outcome1_token, market.outcome2_token)
+    if snapshot is not None:
+        if market_ids[:snapshot.rows("markets")] != snapshot.market_ids():
+            raise ValueError(f"Markets of the snapshot in {directory} do not match the market index.")
+        engine.restore_positions(
+            snapshot.accounts(),
+            snapshot.column("positions", "account_index"),
+            snapshot.column("positions", "market_index"),
+            snapshot.limbs("positions", "outcome1_balance"),
+            snapshot.limbs("positions", "outcome2_balance"),
+        )
+    engine.sync(web3, market_address, start_block, to_block, chunk)
+
+    accounts, positions = position_columns(engine.positions())
+    write_snapshot(directory, to_block, market_address, {
+        "markets": market_columns(state, market_ids),
+        "accounts": accounts,
+        "positions": positions,
+    })
+    return Snapshot(directory)
+
+
+def main():
+    from ape import chain
+    from scripts.registry import DeploymentRegistry
+
+    registry = DeploymentRegistry(namespace=os.getenv("DEPLOYMENTS_NAMESPACE"))
+    directory = os.getenv("SNAPSHOT_DIR", "snapshot")
+    web3 = chain.provider.web3
+    to_block = web3.eth.block_number - int(os.getenv("SNAPSHOT_CONFIRMATIONS", "0"))
+    snapshot = export(
+        web3,
+        registry.get("market_address"),
+        directory,
+        start_block=int(os.getenv("INDEXER_START_BLOCK", "0")),
+        to_block=to_block,
+    )
+    print(
+        f"Snapshot of block {snapshot.block} in {directory}: {snapshot.rows('markets')} markets, "
+        f"{snapshot.rows('accounts')} accounts, {snapshot.rows('positions')} positions"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@ import os
 import json
 from typing import Any, Dict, List
 from hexbytes import HexBytes
-from eth_utils import keccak
 
 base_dir = os.path.dirname(os.path.abspath(__file__))
 relative_path = f"./deployments.json"
@@ -27,20 +26,28 @@ def get_value(_key):
     
     return data[_key]
 
+_abi_cache: Dict[str, Any] = {}
+
 def load_abi(relative_path: str) -> Dict[str, Any]:
     """Load contract ABI from a JSON file located relative to the calling file.
     
     In the calling file, Pass the relative path to the ABI file based on the module's location
 
     Forexample: abi = `load_abi("./.build/abi/MyContract.json")`
+
+    The parsed ABI is cached per file and shared between callers, so treat it as read-only.
+    Call `clear_abi_cache()` after recompiling.
     >>>
     """
     base_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(base_dir, relative_path)
+    file_path = os.path.normpath(os.path.join(base_dir, relative_path))
+    if file_path in _abi_cache:
+        return _abi_cache[file_path]
     
     try:
         with open(file_path, "r") as file:
-            return json.load(file)
+            _abi_cache[file_path] = json.load(file)
+            return _abi_cache[file_path]
     except FileNotFoundError:
         print(f"ABI file not found at: {file_path}")
         raise
@@ -48,24 +55,32 @@ def load_abi(relative_path: str) -> Dict[str, Any]:
         print(f"Failed to decode JSON from file: {file_path}")
         raise
 
+def clear_abi_cache():
+    """Forget every ABI parsed by `load_abi`."""
+    _abi_cache.clear()
+
 def get_event_topic(abi: List[Dict[str, Any]], event_name: str) -> HexBytes:
     """
     Fetch contract events and return a built event signature string.
+
+    Signatures are hashed once per ABI, see `scripts.events.event_index`.
     """
-    for item in abi:
-        if item.get("type") == "event" and item.get("name") == event_name:
-            types = ",".join(input["type"] for input in item["inputs"])
-            event_signature = f"{event_name}({types})"
-            return keccak(text=event_signature)
-    print(f"Event '{event_name}' not found in ABI.")
-    raise ValueError(f"Event '{event_name}' not found in ABI.")
+    from scripts.events import event_index
+
+    topic = event_index(abi).topics.get(event_name)
+    if topic is None:
+        print(f"Event '{event_name}' not found in ABI.")
+        raise ValueError(f"Event '{event_name}' not found in ABI.")
+    return HexBytes(topic)
 
 def get_event_abi(abi: List[Dict[str, Any]], event_name: str) -> Dict[str, Any]:
     """
     Fetch contract events and return the event ABI.
     """
-    for item in abi:
-        if item.get("type") == "event" and item.get("name") == event_name:
-            return item
-    print(f"Event '{event_name}' not found in ABI.")
-    raise ValueError(f"Event '{event_name}' not found in ABI.")
\ No newline at end of file
+    from scripts.events import event_index
+
+    item = event_index(abi).by_name.get(event_name)
+    if item is None:
+        print(f"Event '{event_name}' not found in ABI.")
+        raise ValueError(f"Event '{event_name}' not found in ABI.")
+    return item
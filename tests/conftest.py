@@ -1,10 +1,183 @@
 import os
 import sys
+import json
+import time
 import pytest
+import warnings
+from types import SimpleNamespace
+from eth_utils import keccak, to_hex
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
 from scripts import constants
+from scripts.pipeline import TransactionPipeline
+
+GAS_BASELINE = os.path.join(os.path.dirname(__file__), "gas_baseline.json")
+
+# Providers that run the EVM inside the test process; every other provider is an external node.
+IN_PROCESS_PROVIDERS = ("test",)
+
+def pytest_configure(config):
+    """
+    Give every pytest-xdist worker (`-n <workers>`) its own local chain. The in-process `test`
+    provider is already per process; for foundry each worker starts anvil on its own port,
+    counting up from ANVIL_BASE_PORT (default 8600).
+    """
+    worker = os.getenv("PYTEST_XDIST_WORKER")
+    if worker and "APE_FOUNDRY_HOST" not in os.environ:
+        port = int(os.getenv("ANVIL_BASE_PORT", "8600")) + int(worker.lstrip("gw"))
+        os.environ["APE_FOUNDRY_HOST"] = f"http://127.0.0.1:{port}"
+    config.addinivalue_line("markers", "node: needs an external node (anvil); skipped on the in-process backend")
+    config.backend_timer = BackendTimer(os.getenv("BACKEND_TIMING"))
+
+def _backend(provider):
+    return "in-process" if provider.name in IN_PROCESS_PROVIDERS else "node"
+
+class BackendTimer:
+    """
+    Wall time of every test and of every transaction it sends, on the backend the run uses. Only
+    the test call is timed, not its fixtures; transactions are timed around the provider's
+    `send_transaction`, from submission until the receipt is available, on both backends.
+    Enabled by BACKEND_TIMING=<file>, which receives the results as JSON (one file per
+    pytest-xdist worker, suffixed with the worker id).
+    """
+    def __init__(self, path):
+        self.path = path
+        self.backend = None
+        self.provider = None
+        self.tests = {}
+        self._current = None
+
+    def install(self, provider):
+        if self.backend is not None:
+            return
+        self.backend, self.provider = _backend(provider), provider.name
+        provider_class = type(provider)
+        send_transaction = provider_class.send_transaction
+        timer = self
+
+        def timed_send_transaction(self, txn):
+            start = time.perf_counter()
+            try:
+                return send_transaction(self, txn)
+            finally:
+                if timer._current is not None:
+                    timer._current["transactions"] += 1
+                    timer._current["transaction_seconds"] += time.perf_counter() - start
+
+        provider_class.send_transaction = timed_send_transaction
+
+    def start(self, nodeid):
+        self._current = self.tests[nodeid] = {"seconds": 0.0, "transactions": 0, "transaction_seconds": 0.0}
+        return time.perf_counter()
+
+    def stop(self, start):
+        self._current["seconds"] = time.perf_counter() - start
+        self._current = None
+
+    def summary(self):
+        lines = [f"backend: {self.backend} ({self.provider})", f"{'test':<70} {'seconds':>8} {'txs':>5} {'ms/tx':>8}"]
+        for nodeid, result in self.tests.items():
+            per_transaction = result["transaction_seconds"] / result["transactions"] * 1e3 if result["transactions"] else 0
+            lines.append(f"{nodeid:<70} {result['seconds']:>8.3f} {result['transactions']:>5} {per_transaction:>8.2f}")
+        total = sum(result["seconds"] for result in self.tests.values())
+        transactions = sum(result["transactions"] for result in self.tests.values())
+        lines.append(f"{'total':<70} {total:>8.3f} {transactions:>5}")
+        return "\n".join(lines)
+
+    def write(self):
+        worker = os.getenv("PYTEST_XDIST_WORKER")
+        with open(f"{self.path}.{worker}" if worker else self.path, "w") as file:
+            json.dump({"backend": self.backend, "provider": self.provider, "tests": self.tests}, file, indent=2)
+
+@pytest.hookimpl(hookwrapper=True)
+def pytest_runtest_call(item):
+    timer = item.config.backend_timer
+    if not timer.path:
+        yield
+        return
+    from ape import chain
+    timer.install(chain.provider)
+    start = timer.start(item.nodeid)
+    try:
+        yield
+    finally:
+        timer.stop(start)
+
+def pytest_terminal_summary(terminalreporter, config):
+    timer = getattr(config, "backend_timer", None)
+    if timer is None or not timer.path or not timer.tests:
+        return
+    timer.write()
+    terminalreporter.write_line(timer.summary())
+
+class GasReport:
+    """
+    Records gas used per named operation and compares it with the committed baseline.
+    A measurement fails when it exceeds its baseline by more than `tolerance` (a fraction).
+    A measurement without a baseline entry fails too, or only warns when `warn_missing`.
+    Set UPDATE_GAS_BASELINE=1 to write the measurements back to the baseline file instead.
+    """
+    def __init__(self, path, tolerance, update, warn_missing=False):
+        self.path = path
+        self.tolerance = tolerance
+        self.update = update
+        self.warn_missing = warn_missing
+        self.results = {}
+        self.missing = []
+        if os.path.exists(path):
+            with open(path, "r") as file:
+                self.baseline = json.load(file)
+        else:
+            self.baseline = {}
+
+    def record(self, name, gas_used):
+        gas_used = int(gas_used)
+        self.results[name] = gas_used
+        expected = self.baseline.get(name)
+        if self.update:
+            return
+        if expected is None:
+            self.missing.append(name)
+            message = f"{name} has no entry in {os.path.basename(self.path)}; run with UPDATE_GAS_BASELINE=1 and commit it"
+            assert self.warn_missing, message
+            warnings.warn(message)
+            return
+        limit = int(expected * (1 + self.tolerance))
+        assert gas_used <= limit, (
+            f"{name} regressed: {gas_used} gas, baseline {expected} (+{self.tolerance:.0%} = {limit})"
+        )
+
+    def write(self):
+        baseline = {**self.baseline, **self.results}
+        with open(self.path, "w") as file:
+            json.dump(dict(sorted(baseline.items())), file, indent=4)
+            file.write("\n")
+
+    def summary(self):
+        lines = []
+        for name, gas_used in sorted(self.results.items()):
+            expected = self.baseline.get(name)
+            delta = f"{(gas_used - expected) / expected:+.2%}" if expected else "new"
+            lines.append(f"{name:<60} {gas_used:>10} {delta:>8}")
+        if self.missing:
+            lines.append(f"{len(self.missing)} measurement(s) not checked, no baseline entry: {', '.join(self.missing)}")
+        return "\n".join(lines)
 
 class Sandbox:
+    # Contract type of every deployed contract, used to rebuild the handles after `load_state`.
+    CONTRACT_TYPES = {
+        "finder_contract": "FinderContract",
+        "store_contract": "StoreContract",
+        "ancillary_interface": "AncillaryDataInterface",
+        "currency": "TestERC20",
+        "address_whitelist": "AddressWhitelistContract",
+        "identifier_whitelist": "IdentifierWhitelistContract",
+        "mock_oracle": "MockAncillaryContract",
+        "optimistic_oracle_v3": "OOV3",
+        "expanded_token_implementation": "ExpandedERC20",
+        "factory": "OutComeTokenFactory",
+        "prediction_market": "PredictionMarket",
+    }
+
     def __init__(self, project, deployer):
         self.project = project
         self.deployer = deployer
@@ -35,7 +208,8 @@ class Sandbox:
                 self.project.TestERC20,
                 "Test ERC20",
                 "TT",
-                18
+                18,
+                constants.currency_name_eip712
             )
 
     def deploy_address_whitelist(self):
@@ -63,40 +237,29 @@ class Sandbox:
         mock = self._contracts["mock_oracle"]
         currency = self._contracts["currency"]
 
-        finder.changeImplementationAddress(
-            constants.Store,
-            store.address,
-            sender=self.deployer
-        )
-        finder.changeImplementationAddress(
+        # The registrations are independent of each other and are submitted together.
+        pipeline = TransactionPipeline(self.deployer.provider.web3)
+        pipeline.add_call("store", finder.changeImplementationAddress, constants.Store, store.address, sender=self.deployer)
+        pipeline.add_call(
+            "collateral_whitelist",
+            finder.changeImplementationAddress,
             constants.CollateralWhitelist,
             whitelist.address,
-            sender=self.deployer
+            sender=self.deployer,
         )
-        finder.changeImplementationAddress(
+        pipeline.add_call(
+            "identifier_whitelist",
+            finder.changeImplementationAddress,
             constants.IdentifierWhitelist,
             identifier.address,
-            sender=self.deployer
-        )
-        finder.changeImplementationAddress(
-            constants.Oracle,
-            mock.address,
-            sender=self.deployer,
-        )
-        whitelist.addToWhitelist(
-            currency.address,
-            sender=self.deployer,
-        )
-        identifier.addSupportedIdentifier(
-            constants.default_identifier,
             sender=self.deployer,
         )
+        pipeline.add_call("oracle", finder.changeImplementationAddress, constants.Oracle, mock.address, sender=self.deployer)
+        pipeline.add_call("whitelist_currency", whitelist.addToWhitelist, currency.address, sender=self.deployer)
+        pipeline.add_call("identifier", identifier.addSupportedIdentifier, constants.default_identifier, sender=self.deployer)
         final_fee = {"rawValue": int(constants.minimum_bond / 2)}
-        store.setFinalFee(
-            currency.address,
-            final_fee,
-            sender=self.deployer,
-        )
+        pipeline.add_call("final_fee", store.setFinalFee, currency.address, final_fee, sender=self.deployer)
+        pipeline.run()
 
     def deploy_optimistic_oracle_v3(self):
         if "optimistic_oracle_v3" not in self._contracts:
@@ -125,12 +288,23 @@ class Sandbox:
                 18
             )
 
+    def deploy_expanded_token_implementation(self):
+        if "expanded_token_implementation" not in self._contracts:
+            self._contracts["expanded_token_implementation"] = self.deployer.deploy(
+                self.project.ExpandedERC20,
+                "Expanded Token",
+                "EXT",
+                18
+            )
+
     def deploy_outcome_token_factory(self):
         if "factory" not in self._contracts:
             blueprint = self._contracts["expanded_token_blueprint"]
+            implementation = self._contracts["expanded_token_implementation"]
             self._contracts["factory"] = self.deployer.deploy(
                 self.project.OutComeTokenFactory,
                 blueprint.contract_address,
+                implementation.address,
             )
     
     def deploy_all(self):
@@ -144,11 +318,44 @@ class Sandbox:
         self.register_contracts()
         self.deploy_optimistic_oracle_v3()
         self.deploy_expanded_token_blueprint()
+        self.deploy_expanded_token_implementation()
         self.deploy_outcome_token_factory()
     
     def get_contracts(self):
         return self._contracts
 
+    def fingerprint(self):
+        """Hash of the compiled deployment bytecode of every contract; a saved state is only reused while it matches."""
+        bytecode = b"".join(
+            bytes(getattr(self.project, contract_type).contract_type.get_deployment_bytecode() or b"")
+            for contract_type in sorted(set(self.CONTRACT_TYPES.values()))
+        )
+        return to_hex(keccak(bytecode))
+
+    def save_state(self, path):
+        """Write the node's chain state (`anvil_dumpState`) and the contract addresses to `path`."""
+        state = self.deployer.provider.make_request("anvil_dumpState", [])
+        addresses = {name: self._contracts[name].address for name in self.CONTRACT_TYPES}
+        addresses["expanded_token_blueprint"] = self._contracts["expanded_token_blueprint"].contract_address
+        with open(path, "w") as file:
+            json.dump({"fingerprint": self.fingerprint(), "addresses": addresses, "state": state}, file)
+
+    def load_state(self, path):
+        """
+        Load a state written by `save_state` into the node and rebuild the contract handles.
+        Returns False, without touching the node, when the contracts changed since it was saved.
+        """
+        with open(path, "r") as file:
+            saved = json.load(file)
+        if saved.get("fingerprint") != self.fingerprint():
+            return False
+        self.deployer.provider.make_request("anvil_loadState", [saved["state"]])
+        addresses = saved["addresses"]
+        for name, contract_type in self.CONTRACT_TYPES.items():
+            self._contracts[name] = getattr(self.project, contract_type).at(addresses[name], fetch_from_explorer=False)
+        self._contracts["expanded_token_blueprint"] = SimpleNamespace(contract_address=addresses["expanded_token_blueprint"])
+        return True
+
     
     def deploy_prediction_market(self):
         if "prediction_market" not in self._contracts:
@@ -191,4 +398,57 @@ def other_account(accounts):
 
 @pytest.fixture(scope="session")
 def sandbox(project, owner):
-    return Sandbox(project, owner)
\ No newline at end of file
+    """
+    Deploy and register the whole sandbox and the prediction market once per session. Deploying
+    from inside a test would be undone by the per-test revert below while staying cached here.
+    With SANDBOX_STATE set (external node only), the deployed chain state is saved to that file and loaded
+    by later sessions instead of deploying, until the compiled contracts change.
+    """
+    sandbox = Sandbox(project, owner)
+    # The saved chain state is anvil's; the in-process backend deploys every session.
+    state_path = os.getenv("SANDBOX_STATE") if _backend(owner.provider) == "node" else None
+    if not (state_path and os.path.exists(state_path) and sandbox.load_state(state_path)):
+        sandbox.deploy_prediction_market()
+        if state_path:
+            sandbox.save_state(state_path)
+    return sandbox
+
+@pytest.fixture(scope="session")
+def backend(chain):
+    """"in-process" on ape's `test` provider (ethereum:local:test), "node" on an external node such as anvil."""
+    return _backend(chain.provider)
+
+@pytest.fixture(autouse=True)
+def node_only(request):
+    """Skip tests marked `node` on the in-process backend; they check behaviour of the real node."""
+    if request.node.get_closest_marker("node") and request.getfixturevalue("backend") != "node":
+        pytest.skip("needs an external node (--network ethereum:local:foundry)")
+
+@pytest.fixture(autouse=True)
+def clean_chain(request):
+    """
+    Start every sandbox test from the freshly deployed state and revert whatever it changed. Ape
+    already snapshots around each test, so this only takes over when running with `--disable-isolation`.
+    """
+    if "sandbox" not in request.fixturenames or not request.config.getoption("disable_isolation", default=False):
+        yield
+        return
+    request.getfixturevalue("sandbox")
+    chain = request.getfixturevalue("chain")
+    snapshot = chain.snapshot()
+    yield
+    chain.restore(snapshot)
+
+@pytest.fixture(scope="session")
+def gas_report():
+    report = GasReport(
+        GAS_BASELINE,
+        float(os.getenv("GAS_TOLERANCE", "0.02")),
+        os.getenv("UPDATE_GAS_BASELINE") == "1",
+        os.getenv("GAS_BASELINE_WARN") == "1",
+    )
+    yield report
+    if report.results:
+        print("\n" + report.summary())
+    if report.update:
+        report.write()
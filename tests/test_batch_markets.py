@@ -0,0 +1,116 @@
+import os
+import sys
+import ape
+from hexbytes import HexBytes
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts import constants
+
+BATCH_SIZE = 8
+
+
+def _specs(count, description=constants.description):
+    return [
+        {
+            "outcome1": constants.outcome_one,
+            "outcome2": constants.outcome_two,
+            "description": description,
+            "reward": constants.reward,
+            "required_bond": constants.required_bond,
+        }
+        for _ in range(count)
+    ]
+
+def _fund(sandbox, market, wallet, amount):
+    currency = sandbox.get_contracts()["currency"]
+    currency.allocateTo(wallet, amount, sender=wallet)
+    currency.approve(market.address, amount, sender=wallet)
+
+
+def test_initialize_markets(accounts, sandbox):
+    creator = accounts[5]
+    market = sandbox.deploy_prediction_market()
+    currency = sandbox.get_contracts()["currency"]
+    balance_before = currency.balanceOf(market.address)
+
+    # the same description twice in one batch still yields distinct markets
+    specs = _specs(2) + _specs(1, description="Arsenal Won the 2025 Premier League Title.")
+    _fund(sandbox, market, creator, constants.reward * len(specs))
+    receipt = market.initialize_markets(specs, sender=creator)
+
+    logs = list(market.MarketInitialized.from_receipt(receipt))
+    assert len(logs) == len(specs)
+    assert len({log.market_id for log in logs}) == len(specs)
+    for log in logs:
+        assert market.markets(HexBytes(log.market_id)).outcome1_token == log.outcome1_token
+
+    # rewards are pulled in a single transfer
+    transfers = list(currency.Transfer.from_receipt(receipt))
+    assert len(transfers) == 1
+    assert currency.balanceOf(market.address) - balance_before == constants.reward * len(specs)
+    assert currency.balanceOf(creator) == 0
+
+def test_initialize_markets_gas(accounts, sandbox, gas_report):
+    creator = accounts[5]
+    market = sandbox.deploy_prediction_market()
+
+    _fund(sandbox, market, creator, constants.reward * BATCH_SIZE * 2)
+    single_gas = sum(
+        market.initialize_market(
+            spec["outcome1"],
+            spec["outcome2"],
+            spec["description"],
+            spec["reward"],
+            spec["required_bond"],
+            sender=creator
+        ).gas_used
+        for spec in _specs(BATCH_SIZE)
+    )
+    batch_gas = market.initialize_markets(_specs(BATCH_SIZE), sender=creator).gas_used
+
+    gas_report.record(f"initialize_market[repeat={BATCH_SIZE}]/market", single_gas // BATCH_SIZE)
+    gas_report.record(f"initialize_markets[markets={BATCH_SIZE},constants]/market", batch_gas // BATCH_SIZE)
+    assert batch_gas < single_gas
+
+def test_position_batches(accounts, chain, sandbox):
+    holder = accounts[5]
+    market = sandbox.deploy_prediction_market()
+    currency = sandbox.get_contracts()["currency"]
+    oov3 = sandbox.get_contracts()["optimistic_oracle_v3"]
+
+    specs = [
+        dict(spec, description=f"Batch positions market {index}")
+        for index, spec in enumerate(_specs(3))
+    ]
+    _fund(sandbox, market, holder, constants.reward * len(specs))
+    receipt = market.initialize_markets(specs, sender=holder)
+    market_ids = [HexBytes(log.market_id) for log in market.MarketInitialized.from_receipt(receipt)]
+
+    amounts = [100, 200, 300]
+    _fund(sandbox, market, holder, sum(amounts))
+    receipt = market.create_outcome_tokens_batch(list(zip(market_ids, amounts)), sender=holder)
+    assert [log.tokens_created for log in market.TokensCreated.from_receipt(receipt)] == amounts
+    assert len(list(currency.Transfer.from_receipt(receipt))) == 1
+    assert currency.balanceOf(holder) == 0
+
+    receipt = market.redeem_outcome_tokens_batch([(market_ids[0], 50), (market_ids[1], 50)], sender=holder)
+    assert len(list(market.TokensRedeemed.from_receipt(receipt))) == 2
+    assert len(list(currency.Transfer.from_receipt(receipt))) == 1
+    assert currency.balanceOf(holder) == 100
+
+    # resolve the first market to outcome1 and the second as unresolvable
+    for market_id, outcome in ((market_ids[0], constants.outcome_one), (market_ids[1], "Unresolvable")):
+        _fund(sandbox, market, holder, constants.required_bond)
+        assertion_id = market.assert_market(market_id, outcome, sender=holder).return_value
+        chain.pending_timestamp += constants.default_liveness
+        oov3.settleAssertion(assertion_id, sender=holder)
+
+    with ape.reverts("Market not resolved"):
+        market.settle_outcome_tokens_batch(market_ids, sender=holder)
+
+    balance_before = currency.balanceOf(holder)
+    receipt = market.settle_outcome_tokens_batch(market_ids[:2], sender=holder)
+    payouts = [log.payout for log in market.TokensSettled.from_receipt(receipt)]
+    assert payouts == [50, 150]
+    assert receipt.return_value == sum(payouts)
+    assert len(list(currency.Transfer.from_receipt(receipt))) == 1
+    assert currency.balanceOf(holder) - balance_before == sum(payouts)
@@ -0,0 +1,32 @@
+import os
+import sys
+from ape import project
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts.cache import ContractCache
+
+
+def test_contract_cache(owner, sandbox):
+    currency = sandbox.get_contracts()["currency"]
+    cache = ContractCache()
+
+    instance = cache.at(project.TestERC20, currency.address)
+    assert cache.get("TestERC20", currency.address.lower()) is instance
+    assert len(cache) == 1
+
+    # a redeployed contract replaces the cached handle
+    cache.add(currency)
+    assert cache.at(project.TestERC20, currency.address) is currency
+
+    cache.invalidate(address=currency.address)
+    assert len(cache) == 0
+    assert cache.at(project.TestERC20, currency.address) is not currency
+
+
+def test_empty_cache_is_kept(tmp_path):
+    from scripts.oracle_sand_box.oracle import OracleContracts
+    from scripts.registry import DeploymentRegistry
+
+    # an empty cache has len() 0 but must not be swapped for the shared one
+    cache = ContractCache()
+    oracle = OracleContracts(registry=DeploymentRegistry(str(tmp_path / "deployments.json")), contracts=cache)
+    assert oracle.contracts is cache
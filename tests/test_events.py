@@ -0,0 +1,80 @@
+import os
+import sys
+import pytest
+from ape import project
+from eth_abi import encode
+from eth_utils import keccak, to_checksum_address
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts.events import (
+    MARKET_EVENT_DECODERS,
+    MARKET_EVENT_TOPICS,
+    EventDecoder,
+    decode_market_logs,
+    find_market_event,
+)
+from scripts.utils import get_event_abi, get_event_topic
+
+MARKET = "0x" + "aa" * 20
+TRANSFER_TOPIC = keccak(text="Transfer(address,address,uint256)")
+
+
+def _sample(arg_type, index):
+    if arg_type == "bytes32":
+        return bytes([index + 1]) * 32
+    if arg_type == "string":
+        return f"value {index} ✓"
+    if arg_type == "address":
+        return to_checksum_address(bytes([0x10 + index]) * 20)
+    return 10**30 + index
+
+
+def _abi_and_logs():
+    abi, logs, expected = [], [], []
+    for signature, (name, decoder) in MARKET_EVENT_DECODERS.items():
+        types = signature[len(name) + 1:-1].split(",")
+        record = type(decoder(encode(types, [_sample(t, i) for i, t in enumerate(types)])))
+        abi.append({
+            "type": "event",
+            "name": name,
+            "anonymous": False,
+            "inputs": [{"name": field, "type": t, "indexed": False} for field, t in zip(record._fields, types)],
+        })
+        values = [_sample(t, i) for i, t in enumerate(types)]
+        logs.append({"address": MARKET, "topics": [keccak(text=signature)], "data": encode(types, values)})
+        expected.append(record(*values))
+        # unrelated logs around every market event
+        logs.append({"address": "0x" + "bb" * 20, "topics": [TRANSFER_TOPIC, bytes(32), bytes(32)], "data": bytes(32)})
+    return abi, logs, expected
+
+
+def test_typed_decode_matches_abi_decode():
+    abi, logs, expected = _abi_and_logs()
+    assert list(decode_market_logs(logs)) == expected
+    assert list(decode_market_logs(logs, address="0x" + "bb" * 20)) == []
+    assert list(decode_market_logs(logs, ("MarketResolved", "TokensSettled"))) == [
+        record for record in expected if type(record).__name__ in ("MarketResolved", "TokensSettled")
+    ]
+    assert find_market_event(logs, "MarketAsserted").asserter == expected[1].asserter
+    assert find_market_event(logs[1:2], "MarketAsserted") is None
+
+    decoder = EventDecoder(abi, [item["name"] for item in abi])
+    decoded = list(decoder.decode_logs(logs, MARKET))
+    assert [(name, tuple(args.values())) for name, args in decoded] == [
+        (type(record).__name__, tuple(record)) for record in expected
+    ]
+
+    assert get_event_topic(abi, "MarketResolved") == keccak(text="MarketResolved(bytes32)")
+    assert get_event_abi(abi, "MarketResolved") is abi[2]
+    with pytest.raises(ValueError):
+        get_event_topic(abi, "Transfer")
+    with pytest.raises(ValueError):
+        EventDecoder(abi, ["Transfer"])
+
+
+def test_market_event_signatures():
+    # the typed decoders must follow the contract's events
+    abi = [item.model_dump(mode="json", by_alias=True) for item in project.PredictionMarket.contract_type.abi]
+    for name, _ in MARKET_EVENT_TOPICS.values():
+        item = get_event_abi(abi, name)
+        assert not any(input.get("indexed") for input in item["inputs"])
+        assert bytes(get_event_topic(abi, name)) in MARKET_EVENT_TOPICS
@@ -0,0 +1,154 @@
+import os
+import sys
+import pytest
+from ape import chain
+from hexbytes import HexBytes
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts import constants
+
+# The baseline is measured on anvil; the in-process EVM may price a different hardfork.
+pytestmark = pytest.mark.node
+
+DESCRIPTION_LENGTHS = [16, 180, 720]
+MARKET_COUNTS = [1, 4, 16]
+
+
+def _description(length, salt=""):
+    text = f"{salt}{constants.description} "
+    return (text * (length // len(text) + 1))[:length]
+
+def _fund(sandbox, market, wallet, amount):
+    currency = sandbox.get_contracts()["currency"]
+    currency.allocateTo(wallet, amount, sender=wallet)
+    currency.approve(market.address, amount, sender=wallet)
+
+def _market_id(market, receipt):
+    return HexBytes(next(iter(market.MarketInitialized.from_receipt(receipt))).market_id)
+
+
+@pytest.mark.parametrize("length", DESCRIPTION_LENGTHS)
+def test_gas_market_lifecycle(accounts, sandbox, gas_report, length):
+    creator, holder, asserter = accounts[5], accounts[6], accounts[7]
+    market = sandbox.deploy_prediction_market()
+    oov3 = sandbox.get_contracts()["optimistic_oracle_v3"]
+
+    _fund(sandbox, market, creator, constants.reward + constants.amount)
+    receipt = market.initialize_market(
+        constants.outcome_one,
+        constants.outcome_two,
+        _description(length, "lifecycle "),
+        constants.reward,
+        constants.required_bond,
+        sender=creator
+    )
+    gas_report.record(f"initialize_market[description={length}]", receipt.gas_used)
+    market_id = _market_id(market, receipt)
+
+    receipt = market.create_outcome_tokens(market_id, constants.amount, sender=creator)
+    gas_report.record(f"create_outcome_tokens[description={length}]", receipt.gas_used)
+
+    receipt = market.redeem_outcome_tokens(market_id, constants.redeem_amount, sender=creator)
+    gas_report.record(f"redeem_outcome_tokens[description={length}]", receipt.gas_used)
+
+    token_one = market.markets(market_id).outcome1_token
+    sandbox.project.ExpandedERC20.at(token_one, fetch_from_explorer=False).transfer(
+        holder, constants.transfer_amount, sender=creator
+    )
+
+    _fund(sandbox, market, asserter, constants.required_bond)
+    receipt = market.assert_market(market_id, constants.outcome_one, sender=asserter)
+    gas_report.record(f"assert_market[description={length}]", receipt.gas_used)
+    assertion_id = receipt.return_value
+
+    chain.pending_timestamp += constants.default_liveness
+    receipt = oov3.settleAssertion(assertion_id, sender=asserter)
+    gas_report.record(f"settleAssertion+assertionResolvedCallback[description={length}]", receipt.gas_used)
+    assert market.markets(market_id).resolved
+
+    # The holder has the winning outcome1 tokens, the creator is left with outcome2 tokens only.
+    receipt = market.settle_outcome_tokens(market_id, sender=holder)
+    gas_report.record(f"settle_outcome_tokens[description={length}]", receipt.gas_used)
+    receipt = market.settle_outcome_tokens(market_id, sender=creator)
+    gas_report.record(f"settle_outcome_tokens[description={length},losing]", receipt.gas_used)
+
+@pytest.mark.parametrize("count", MARKET_COUNTS)
+def test_gas_initialize_markets(accounts, sandbox, gas_report, count):
+    creator = accounts[5]
+    market = sandbox.deploy_prediction_market()
+
+    specs = [
+        {
+            "outcome1": constants.outcome_one,
+            "outcome2": constants.outcome_two,
+            "description": _description(180, f"batch {index} "),
+            "reward": constants.reward,
+            "required_bond": constants.required_bond,
+        }
+        for index in range(count)
+    ]
+    _fund(sandbox, market, creator, constants.reward * count)
+    receipt = market.initialize_markets(specs, sender=creator)
+    gas_report.record(f"initialize_markets[markets={count}]/market", receipt.gas_used // count)
+
+def test_gas_deploy_outcome_token(owner, sandbox, gas_report):
+    sandbox.deploy_prediction_market()
+    factory = sandbox.get_contracts()["factory"]
+    factory.whitelist(owner, sender=owner)
+
+    # blueprint deployment, followed by the role grants a market needs
+    receipt = factory.deploy_outcome_token("YES Token", "O1T", 18, sender=owner)
+    token = sandbox.project.ExpandedERC20.at(receipt.return_value, fetch_from_explorer=False)
+    gas = receipt.gas_used
+    gas += token.add_minter(owner, sender=owner).gas_used
+    gas += token.add_burner(owner, sender=owner).gas_used
+    gas_report.record("OutComeTokenFactory.deploy_outcome_token", receipt.gas_used)
+    gas_report.record("OutComeTokenFactory.deploy_outcome_token+roles", gas)
+
+    receipt = factory.clone_outcome_token("YES Token", "O1T", 18, owner, owner, sender=owner)
+    gas_report.record("OutComeTokenFactory.clone_outcome_token", receipt.gas_used)
+
+    receipt = factory.deploy_outcome_token_pair("YES Token", "NO Token", 18, sender=owner)
+    gas_report.record("OutComeTokenFactory.deploy_outcome_token_pair", receipt.gas_used)
+    factory.blacklist(owner, sender=owner)
+
+@pytest.mark.parametrize("count", MARKET_COUNTS)
+def test_gas_position_batches(accounts, sandbox, gas_report, count):
+    holder = accounts[6]
+    market = sandbox.deploy_prediction_market()
+    oov3 = sandbox.get_contracts()["optimistic_oracle_v3"]
+
+    specs = [
+        {
+            "outcome1": constants.outcome_one,
+            "outcome2": constants.outcome_two,
+            "description": _description(180, f"positions {index} "),
+            "reward": constants.reward,
+            "required_bond": constants.required_bond,
+        }
+        for index in range(count)
+    ]
+    _fund(sandbox, market, holder, constants.reward * count)
+    receipt = market.initialize_markets(specs, sender=holder)
+    positions = [
+        (HexBytes(log.market_id), constants.amount)
+        for log in market.MarketInitialized.from_receipt(receipt)
+    ]
+
+    _fund(sandbox, market, holder, constants.amount * count)
+    receipt = market.create_outcome_tokens_batch(positions, sender=holder)
+    gas_report.record(f"create_outcome_tokens_batch[markets={count}]/market", receipt.gas_used // count)
+
+    positions = [(market_id, constants.redeem_amount) for market_id, _ in positions]
+    receipt = market.redeem_outcome_tokens_batch(positions, sender=holder)
+    gas_report.record(f"redeem_outcome_tokens_batch[markets={count}]/market", receipt.gas_used // count)
+
+    _fund(sandbox, market, holder, constants.required_bond * count)
+    assertion_ids = [
+        market.assert_market(market_id, constants.outcome_one, sender=holder).return_value
+        for market_id, _ in positions
+    ]
+    chain.pending_timestamp += constants.default_liveness
+    for assertion_id in assertion_ids:
+        oov3.settleAssertion(assertion_id, sender=holder)
+    receipt = market.settle_outcome_tokens_batch([market_id for market_id, _ in positions], sender=holder)
+    gas_report.record(f"settle_outcome_tokens_batch[markets={count}]/market", receipt.gas_used // count)
@@ -0,0 +1,100 @@
+import os
+import sys
+import sqlite3
+from ape import chain, project
+from hexbytes import HexBytes
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts import constants
+from scripts.indexer import EventStore, MarketEventIndexer
+
+
+def _abi():
+    return [item.model_dump(mode="json", by_alias=True) for item in project.PredictionMarket.contract_type.abi]
+
+def _init_market(sandbox, market, wallet, description):
+    currency = sandbox.get_contracts()["currency"]
+    currency.allocateTo(wallet, constants.reward + constants.amount, sender=wallet)
+    currency.approve(market.address, constants.reward + constants.amount, sender=wallet)
+    receipt = market.initialize_market(
+        constants.outcome_one,
+        constants.outcome_two,
+        description,
+        constants.reward,
+        constants.required_bond,
+        sender=wallet
+    )
+    return HexBytes(next(iter(market.MarketInitialized.from_receipt(receipt))).market_id)
+
+
+def test_indexer_sync_and_reorg(accounts, sandbox, tmp_path):
+    wallet = accounts[8]
+    market = sandbox.deploy_prediction_market()
+    start_block = chain.blocks.head.number + 1
+
+    market_id = _init_market(sandbox, market, wallet, "Liverpool Won the 2025 Carabao Cup.")
+    market.create_outcome_tokens(market_id, constants.amount, sender=wallet)
+
+    store = EventStore(str(tmp_path / "events.db"))
+    indexer = MarketEventIndexer(
+        chain.provider.web3,
+        market.address,
+        store,
+        abi=_abi(),
+        start_block=start_block,
+        initial_chunk=1,
+    )
+    assert indexer.sync() == 2
+    assert [event["event"] for event in store.events(market_id=market_id)] == ["MarketInitialized", "TokensCreated"]
+    created = store.events(event="TokensCreated")[0]
+    assert created["account"] == wallet.address
+    assert int(created["args"]["tokens_created"]) == constants.amount
+
+    # nothing new to index on resume
+    assert indexer.sync() == 0
+
+    # replace the last blocks with a different history
+    snapshot = chain.snapshot()
+    market.redeem_outcome_tokens(market_id, constants.redeem_amount, sender=wallet)
+    assert indexer.sync() == 1
+    chain.restore(snapshot)
+    chain.mine(3)
+
+    assert indexer.sync() == 0
+    assert [event["event"] for event in store.events(market_id=market_id)] == ["MarketInitialized", "TokensCreated"]
+    assert store.get_checkpoint(indexer.address) == chain.blocks.head.number
+    store.close()
+
+
+def test_event_store_blocks_per_address(tmp_path):
+    first, second = "0x" + "11" * 20, "0x" + "22" * 20
+    path = str(tmp_path / "events.db")
+    store = EventStore(path)
+    store.commit_range(first, [], {5: "0xa5", 9: "0xa9"}, 9)
+    store.commit_range(second, [], {5: "0xb5", 8: "0xb8"}, 8)
+    assert store.get_block_hash(first, 5) == "0xa5" and store.get_block_hash(second, 5) == "0xb5"
+    assert store.recorded_blocks(second, 9, 10) == [(8, "0xb8"), (5, "0xb5")]
+
+    # Rolling one address back leaves the reorg detection of the other intact.
+    store.rollback_to(first, 5)
+    assert store.recorded_blocks(first, 9, 10) == [(5, "0xa5")]
+    assert store.recorded_blocks(second, 9, 10) == [(8, "0xb8"), (5, "0xb5")]
+    assert (store.get_checkpoint(first), store.get_checkpoint(second)) == (5, 8)
+    store.close()
+
+
+def test_event_store_migrates_unscoped_blocks(tmp_path):
+    address = "0x" + "11" * 20
+    path = str(tmp_path / "events.db")
+    connection = sqlite3.connect(path)
+    connection.executescript(
+        "CREATE TABLE blocks (block_number INTEGER PRIMARY KEY, block_hash TEXT NOT NULL);"
+        "CREATE TABLE checkpoint (address TEXT PRIMARY KEY, block_number INTEGER NOT NULL);"
+    )
+    connection.executemany("INSERT INTO blocks VALUES (?, ?)", [(3, "0x03"), (7, "0x07")])
+    connection.execute("INSERT INTO checkpoint VALUES (?, ?)", (address, 7))
+    connection.commit()
+    connection.close()
+
+    store = EventStore(path)
+    assert store.recorded_blocks(address, 7, 10) == [(7, "0x07"), (3, "0x03")]
+    store.close()
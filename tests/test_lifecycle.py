@@ -0,0 +1,54 @@
+import os
+import sys
+import json
+import pytest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts.lifecycle import STEPS, load_scenario, main, parse_steps, run_steps
+from scripts.registry import DeploymentRegistry
+
+
+class RecordingManager:
+    def __init__(self, registry):
+        self.registry = registry
+        self.calls = []
+
+    def __getattr__(self, name):
+        if name not in STEPS.values():
+            raise AttributeError(name)
+
+        def step():
+            self.calls.append(name)
+            self.registry.set(name, True)
+            if name == "assert_market":
+                raise RuntimeError("assertion failed")
+        return step
+
+
+def test_parse_steps():
+    assert parse_steps(["init,create", "redeem", " trade "]) == ["init", "create", "redeem", "trade"]
+    with pytest.raises(ValueError, match="settle"):
+        parse_steps(["init", "settle"])
+
+def test_load_scenario(tmp_path):
+    path = tmp_path / "scenario.json"
+    path.write_text(json.dumps({"steps": ["init", "create"], "network": "ethereum:local:test"}))
+    assert load_scenario(path) == (["init", "create"], "ethereum:local:test")
+    path.write_text(json.dumps(["balances"]))
+    assert load_scenario(path) == (["balances"], None)
+
+def test_run_steps_keeps_completed_steps(tmp_path):
+    path = str(tmp_path / "deployments.json")
+    manager = RecordingManager(DeploymentRegistry(path))
+
+    with pytest.raises(RuntimeError):
+        run_steps(manager, ["init", "create", "assert", "balances"])
+    assert manager.calls == ["init_market", "create_outcome_tokens", "assert_market"]
+
+    saved = DeploymentRegistry(path)
+    assert saved.get("create_outcome_tokens")
+    assert "assert_market" not in saved
+
+def test_main_validates_before_connecting(capsys):
+    with pytest.raises(SystemExit):
+        main(["init", "bogus"])
+    assert "bogus" in capsys.readouterr().err
@@ -5,18 +5,12 @@ from ape import project
 from hexbytes import HexBytes
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
 from scripts import constants
+from scripts.events import find_market_event
 
 def _decode_logs(receipt):
-    decoded_logs = receipt.decode_logs()
-    for log in decoded_logs:
-        if log.event_name == "MarketInitialized":
-            # extract the market_id
-            _market_id = log.market_id
-
-            # extract the outcome token addresses
-            outcome_token_one = log.outcome1_token
-            outcome_token_two = log.outcome2_token
-            return _market_id, outcome_token_one, outcome_token_two
+    event = find_market_event(receipt.logs, "MarketInitialized")
+    if event is not None:
+        return event.market_id, event.outcome1_token, event.outcome2_token
 
 
 def test_market(
@@ -0,0 +1,124 @@
+import os
+import sys
+import tracemalloc
+from ape import project
+from eth_utils import keccak, to_checksum_address
+from hexbytes import HexBytes
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts import constants
+from scripts.market_state import _ROW_BYTES, EMPTY_ID, UNRESOLVABLE_ID, AssertedMarket, MarketStateCache
+
+TOKEN1 = "0x" + "11" * 20
+TOKEN2 = "0x" + "22" * 20
+ASSERTER = "0x" + "33" * 20
+
+
+def _initialized(market_id, description="Arsenal Won the 2025 Premier League."):
+    return {
+        "market_id": market_id,
+        "outcome1": constants.outcome_one,
+        "outcome2": constants.outcome_two,
+        "description": description,
+        "outcome1_token": TOKEN1,
+        "outcome2_token": TOKEN2,
+        "reward": 10**30,
+        "required_bond": constants.required_bond,
+    }
+
+
+def test_market_state_transitions():
+    cache = MarketStateCache(None, "0x" + "00" * 20, max_descriptions=1)
+    first, second = b"\x01" * 32, b"\x02" * 32
+    cache.apply("MarketInitialized", _initialized(first))
+    cache.apply("MarketInitialized", _initialized(second, "Second market"))
+    # events of markets initialized before the first synced block are ignored
+    cache.apply("MarketResolved", {"market_id": b"\x03" * 32})
+
+    assert len(cache) == 2 and first in cache
+    assert list(cache.market_ids()) == [first, second]
+    market = cache.market(first)
+    assert market.reward == 10**30
+    assert market.outcome1_token == to_checksum_address(TOKEN1) and market.outcome2_token == to_checksum_address(TOKEN2)
+    assert market.outcome1_id == keccak(text=constants.outcome_one)
+    assert market.asserted_outcome_id == EMPTY_ID and not market.resolved
+    assert cache.market(b"\x03" * 32) is None
+    # only the newest description is kept
+    assert cache.description(second).description == "Second market"
+
+    cache.apply("MarketAsserted", {
+        "market_id": first, "asserted_outcome": "Unresolvable", "assertion_id": b"\xaa" * 32, "asserter": ASSERTER,
+    })
+    assert cache.market(first).asserted_outcome_id == UNRESOLVABLE_ID
+    assert cache.asserted_market(b"\xaa" * 32) == AssertedMarket(to_checksum_address(ASSERTER), first)
+    cache.apply("MarketAssertionRejected", {"market_id": first, "assertion_id": b"\xaa" * 32})
+    assert cache.market(first).asserted_outcome_id == EMPTY_ID
+    assert cache.asserted_market(b"\xaa" * 32) is None
+
+    cache.apply("MarketAsserted", {
+        "market_id": first, "asserted_outcome": constants.outcome_two, "assertion_id": b"\xbb" * 32, "asserter": ASSERTER,
+    })
+    assert cache.pending_assertion(first) == b"\xbb" * 32
+    cache.apply("MarketResolved", {"market_id": first})
+    market = cache.market(first)
+    assert market.resolved and market.asserted_outcome_id == keccak(text=constants.outcome_two)
+    assert cache.is_resolved(first) and not cache.is_resolved(second)
+    assert cache.pending_assertion(first) is None and cache.asserted_market(b"\xbb" * 32) is None
+    assert not cache.market(second).resolved
+
+
+def test_market_state_memory_per_market():
+    count = 20_000
+    cache = MarketStateCache(None, "0x" + "44" * 20, max_descriptions=1)
+    tracemalloc.start()
+    try:
+        for index in range(count):
+            cache.apply("MarketInitialized", _initialized(index.to_bytes(32, "big")))
+        per_market = tracemalloc.get_traced_memory()[0] / count
+    finally:
+        tracemalloc.stop()
+    # The columns plus the market id index, as quoted in the MarketStateCache docstring.
+    assert _ROW_BYTES == 201
+    assert _ROW_BYTES < per_market < 400
+
+
+def test_market_state_sync_and_verify(accounts, chain, sandbox):
+    wallet = accounts[8]
+    market = sandbox.deploy_prediction_market()
+    currency = sandbox.get_contracts()["currency"]
+    abi = [item.model_dump(mode="json", by_alias=True) for item in project.PredictionMarket.contract_type.abi]
+    cache = MarketStateCache(chain.provider.web3, market.address, abi=abi, start_block=chain.blocks.head.number + 1)
+
+    currency.allocateTo(wallet, 2 * constants.reward + constants.required_bond, sender=wallet)
+    currency.approve(market.address, 2 * constants.reward + constants.required_bond, sender=wallet)
+    market_ids = []
+    for description in ("Liverpool Won the 2025 Carabao Cup.", "Newcastle Won the 2025 Carabao Cup."):
+        receipt = market.initialize_market(
+            constants.outcome_one, constants.outcome_two, description, constants.reward, constants.required_bond,
+            sender=wallet,
+        )
+        market_ids.append(HexBytes(next(iter(market.MarketInitialized.from_receipt(receipt))).market_id))
+    assertion_id = market.assert_market(market_ids[0], constants.outcome_one, sender=wallet).return_value
+
+    assert cache.sync() == 3
+    assert cache.sync() == 0
+    assert cache.asserted_market(assertion_id) == AssertedMarket(wallet.address, bytes(market_ids[0]))
+    assert cache.verify() == []
+
+    # descriptions evicted from the cache are read back from the contract
+    cache.max_descriptions = 0
+    cache._descriptions.clear()
+    assert cache.description(market_ids[1]).description == "Newcastle Won the 2025 Carabao Cup."
+
+    # a change the cache has not seen yet is reported, and repaired on request
+    chain.pending_timestamp += constants.default_liveness
+    sandbox.get_contracts()["optimistic_oracle_v3"].settleAssertion(assertion_id, sender=wallet)
+    assert cache.verify() == [bytes(market_ids[0])]
+    assert cache.verify(repair=True) == [bytes(market_ids[0])]
+    assert cache.verify() == [] and cache.is_resolved(market_ids[0])
+
+    # a new cache loads the same markets from the market index instead of the events
+    loaded = MarketStateCache(chain.provider.web3, market.address, abi=abi)
+    assert loaded.load_index() == 2
+    assert list(loaded.market_ids()) == [bytes(market_id) for market_id in market_ids]
+    assert loaded.verify() == [] and loaded.is_resolved(market_ids[0])
+    assert loaded.sync() == 0
@@ -0,0 +1,115 @@
+import os
+import sys
+from hexbytes import HexBytes
+from eth_utils import keccak
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts import constants
+
+
+def test_get_market_states(accounts, sandbox):
+    creator = accounts[6]
+    holder = accounts[7]
+    market = sandbox.deploy_prediction_market()
+    currency = sandbox.get_contracts()["currency"]
+
+    currency.allocateTo(creator, constants.reward + constants.amount, sender=creator)
+    currency.approve(market.address, constants.reward + constants.amount, sender=creator)
+    receipt = market.initialize_market(
+        constants.outcome_one,
+        constants.outcome_two,
+        "Chelsea Won the 2025 FA Cup.",
+        constants.reward,
+        constants.required_bond,
+        sender=creator
+    )
+    log = next(iter(market.MarketInitialized.from_receipt(receipt)))
+    market_id = HexBytes(log.market_id)
+    market.create_outcome_tokens(market_id, constants.amount, sender=creator)
+    currency.allocateTo(holder, constants.reward, sender=holder)
+
+    unknown_id = HexBytes(b"\x01" * 32)
+    states, currency_balances = market.get_market_states([market_id, unknown_id], [creator, holder])
+
+    assert len(states) == 2
+    assert states[0].market.outcome1_token == log.outcome1_token
+    assert states[0].market.reward == constants.reward
+    assert HexBytes(states[0].market.outcome1_id) == keccak(text=constants.outcome_one)
+    assert HexBytes(states[0].market.outcome2_id) == keccak(text=constants.outcome_two)
+    assert list(states[0].outcome1_balances) == [constants.amount, 0]
+    assert list(states[0].outcome2_balances) == [constants.amount, 0]
+    assert states[1].market.outcome1_token == constants.empty_address
+    assert list(states[1].outcome1_balances) == [0, 0]
+    assert list(currency_balances) == [currency.balanceOf(creator), constants.reward]
+    details = market.market_descriptions(market_id)
+    assert details.outcome1 == constants.outcome_one.encode()
+    assert details.description == b"Chelsea Won the 2025 FA Cup."
+
+
+def test_assert_market_claim(accounts, chain, sandbox):
+    creator = accounts[6]
+    market = sandbox.deploy_prediction_market()
+    contracts = sandbox.get_contracts()
+    currency, oov3 = contracts["currency"], contracts["optimistic_oracle_v3"]
+    assert currency.allowance(market, oov3) == 2**256 - 1
+
+    currency.allocateTo(creator, constants.reward + constants.required_bond, sender=creator)
+    currency.approve(market.address, constants.reward + constants.required_bond, sender=creator)
+    receipt = market.initialize_market(
+        constants.outcome_one,
+        constants.outcome_two,
+        "Chelsea Won the 2025 FA Cup.",
+        constants.reward,
+        constants.required_bond,
+        sender=creator
+    )
+    market_id = HexBytes(next(iter(market.MarketInitialized.from_receipt(receipt))).market_id)
+    receipt = market.assert_market(market_id, constants.outcome_one, sender=creator)
+
+    timestamp = chain.provider.get_block(receipt.block_number).timestamp
+    claim = next(iter(oov3.AssertionMade.from_receipt(receipt))).claim
+    assert HexBytes(claim) == (
+        f"As of assertion timestamp {timestamp}, the described prediction market outcome is: "
+        f"{constants.outcome_one}. The market description is: Chelsea Won the 2025 FA Cup."
+    ).encode()
+    # OpenZeppelin tokens do not spend infinite allowances, so no approval is needed again.
+    assert currency.allowance(market, oov3) == 2**256 - 1
+
+
+def test_market_index(accounts, chain, sandbox):
+    creator = accounts[6]
+    market = sandbox.deploy_prediction_market()
+    contracts = sandbox.get_contracts()
+    currency, oov3 = contracts["currency"], contracts["optimistic_oracle_v3"]
+
+    currency.allocateTo(creator, 3 * constants.reward + constants.required_bond, sender=creator)
+    currency.approve(market.address, 3 * constants.reward + constants.required_bond, sender=creator)
+    specs = [
+        (constants.outcome_one, constants.outcome_two, f"Team {index} Won the 2025 FA Cup.", constants.reward, constants.required_bond)
+        for index in range(3)
+    ]
+    receipt = market.initialize_markets(specs, sender=creator)
+    first, second, third = [HexBytes(log.market_id) for log in market.MarketInitialized.from_receipt(receipt)]
+
+    def ids(status, offset=0, limit=constants.max_page_markets):
+        return [HexBytes(market_id) for market_id in market.get_market_ids(status, offset, limit)]
+
+    assert market.get_market_count(constants.market_all) == 3
+    assert ids(constants.market_all) == ids(constants.market_open) == [first, second, third]
+    assert ids(constants.market_all, 1, 1) == [second]
+    assert ids(constants.market_all, 3) == []
+
+    # The asserted market leaves the open list, the last open market takes its place.
+    assertion_id = market.assert_market(first, constants.outcome_one, sender=creator).return_value
+    assert ids(constants.market_open) == [third, second]
+    assert ids(constants.market_asserted) == [first]
+
+    chain.pending_timestamp += constants.default_liveness
+    oov3.settleAssertion(assertion_id, sender=creator)
+    assert ids(constants.market_asserted) == []
+    assert ids(constants.market_resolved) == [first]
+    assert ids(constants.market_all) == [first, second, third]
+
+    summaries = market.get_market_summaries(constants.market_all, 0, 2)
+    assert [HexBytes(summary.market_id) for summary in summaries] == [first, second]
+    assert [summary.status for summary in summaries] == [constants.market_resolved, constants.market_open]
+    assert summaries[0].market.resolved and summaries[0].market.reward == constants.reward
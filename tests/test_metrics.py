@@ -0,0 +1,78 @@
+import os
+import sys
+import json
+import pytest
+from web3 import Web3
+from web3.providers.base import JSONBaseProvider
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts.metrics import Metrics, instrumented, prometheus_text
+
+
+class ReplayProvider(JSONBaseProvider):
+    """Answers every request with a fixed result, through the JSON encoding of a real provider."""
+
+    def __init__(self, results):
+        super().__init__()
+        self.results = results
+
+    def make_request(self, method, params):
+        request = json.loads(self.encode_rpc_request(method, params))
+        response = {"jsonrpc": "2.0", "id": request["id"], "result": self.results[method]}
+        return self.decode_rpc_response(json.dumps(response).encode())
+
+
+def _receipt(transaction_hash, gas_used, gas_price):
+    return {"transactionHash": transaction_hash, "gasUsed": hex(gas_used), "effectiveGasPrice": hex(gas_price)}
+
+
+class Manager:
+    def __init__(self, metrics, web3):
+        self.metrics = metrics
+        self.web3 = web3
+        self.market_id = None
+
+    @instrumented(lambda self: self.market_id)
+    def init_market(self):
+        self.web3.provider.make_request("eth_getTransactionReceipt", ["0x01"])
+        self.market_id = "0xaa"
+
+    @instrumented()
+    def settle(self):
+        # the same receipt fetched twice and one new transaction
+        self.web3.provider.make_request("eth_getTransactionReceipt", ["0x01"])
+        self.web3.provider.make_request("eth_getTransactionReceipt", ["0x02"])
+        raise RuntimeError("reverted")
+
+
+def test_operations_record_gas_and_rpc(tmp_path):
+    provider = ReplayProvider({"eth_getTransactionReceipt": _receipt("0x" + "01" * 32, 50_000, 3)})
+    web3 = Web3(provider)
+    metrics = Metrics()
+    metrics.watch(web3)
+    metrics.watch(web3)  # once per provider
+    manager = Manager(metrics, web3)
+
+    manager.init_market()
+    provider.results["eth_getTransactionReceipt"] = _receipt("0x" + "02" * 32, 20_000, 5)
+    with pytest.raises(RuntimeError):
+        manager.settle()
+
+    init, settle = metrics.operations
+    assert (init.name, init.market_id, init.error) == ("init_market", "0xaa", None)
+    assert (init.transactions, init.gas_used, init.gas_price, init.rpc_requests) == (1, 50_000, 3, 1)
+    assert init.bytes_sent > 0 and init.bytes_received > 0
+    assert (settle.name, settle.market_id, settle.error) == ("settle", None, "RuntimeError")
+    assert (settle.transactions, settle.gas_used, settle.fees, settle.rpc_requests) == (1, 20_000, 100_000, 2)
+
+    path = str(tmp_path / "metrics.jsonl")
+    metrics.write_jsonl(path)
+    metrics.write_jsonl(path)  # nothing new to append
+    loaded = Metrics.load_jsonl(path)
+    assert [operation.as_dict() for operation in loaded] == [init.as_dict(), settle.as_dict()]
+
+    text = prometheus_text(loaded + [init])
+    assert 'market_operation_seconds_count{operation="init_market"} 2' in text
+    assert 'market_operation_seconds_bucket{operation="init_market",le="+Inf"} 2' in text
+    assert 'market_operation_gas_used_total{operation="init_market"} 100000' in text
+    assert 'market_operation_errors_total{operation="settle"} 1' in text
+    assert 'market_operation_rpc_requests_total{operation="settle"} 2' in text
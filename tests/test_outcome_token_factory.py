@@ -0,0 +1,64 @@
+import os
+import sys
+import ape
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts import constants
+
+
+def test_deploy_outcome_token_pair(accounts, sandbox):
+    creator = accounts[9]
+    sandbox.deploy_prediction_market()
+    factory = sandbox.get_contracts()["factory"]
+    factory.whitelist(creator, sender=accounts[0])
+
+    receipt = factory.deploy_outcome_token_pair("YES Token", "NO Token", 18, sender=creator)
+    token_one, token_two = receipt.return_value
+    token_one = sandbox.project.ExpandedERC20.at(token_one, fetch_from_explorer=False)
+    token_two = sandbox.project.ExpandedERC20.at(token_two, fetch_from_explorer=False)
+
+    assert (token_one.name(), token_one.symbol(), token_one.decimals()) == ("YES Token", "O1T", 18)
+    assert (token_two.name(), token_two.symbol(), token_two.decimals()) == ("NO Token", "O2T", 18)
+    # EIP-1167 runtime code delegating to the implementation
+    assert len(ape.chain.provider.get_code(token_one.address)) == 45
+
+    # the caller can mint and burn without further role grants
+    token_one.mint(creator, 100, sender=creator)
+    token_one.burn_from(creator, 40, sender=creator)
+    assert token_one.balanceOf(creator) == 60
+
+    # settling burns the whole balance in one call and reports the amount
+    assert token_one.burn_all_from(creator, sender=creator).return_value == 60
+    assert token_one.balanceOf(creator) == 0 and token_one.totalSupply() == 0
+    receipt = token_one.burn_all_from(creator, sender=creator)
+    assert receipt.return_value == 0 and not list(token_one.Transfer.from_receipt(receipt))
+    with ape.reverts():
+        token_two.burn_all_from(creator, sender=accounts[8])
+
+    with ape.reverts("Token already initialized"):
+        token_one.initialize("X", "X", 18, creator, creator, creator, sender=creator)
+    implementation = sandbox.get_contracts()["expanded_token_implementation"]
+    with ape.reverts("Token already initialized"):
+        implementation.initialize("X", "X", 18, creator, creator, creator, sender=creator)
+
+    factory.blacklist(creator, sender=accounts[0])
+    with ape.reverts():
+        factory.deploy_outcome_token_pair("YES Token", "NO Token", 18, sender=creator)
+
+
+def test_long_outcome_names(accounts, sandbox):
+    creator = accounts[9]
+    market = sandbox.deploy_prediction_market()
+    currency = sandbox.get_contracts()["currency"]
+    currency.allocateTo(creator, constants.reward, sender=creator)
+    currency.approve(market.address, constants.reward, sender=creator)
+
+    # Outcomes take up to 16 characters, so token names run up to 22 with the " Token" suffix.
+    outcome1, outcome2 = "Arsenal FC Wins!", "Arsenal FC Lose!"
+    receipt = market.initialize_market(
+        outcome1, outcome2, "Arsenal Won the 2025 FA Cup.", constants.reward, constants.required_bond, sender=creator
+    )
+    market_id = next(iter(market.MarketInitialized.from_receipt(receipt))).market_id
+    tokens = market.markets(market_id)
+    token_one = sandbox.project.ExpandedERC20.at(tokens.outcome1_token, fetch_from_explorer=False)
+    token_two = sandbox.project.ExpandedERC20.at(tokens.outcome2_token, fetch_from_explorer=False)
+    assert (token_one.name(), token_two.name()) == (f"{outcome1} Token", f"{outcome2} Token")
@@ -0,0 +1,117 @@
+import os
+import sys
+import random
+import pytest
+from hexbytes import HexBytes
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts.payouts import (
+    TOKENS_CREATED_TOPIC,
+    TOKENS_REDEEMED_TOPIC,
+    TRANSFER_TOPIC,
+    PayoutEngine,
+    add,
+    from_limbs,
+    halve,
+    subtract,
+    to_limbs,
+)
+
+ZERO = bytes(20)
+
+
+def _word(value):
+    return value.to_bytes(32, "big")
+
+
+def _transfer(token, sender, receiver, value):
+    return {
+        "address": token,
+        "topics": [TRANSFER_TOPIC, bytes(12) + sender, bytes(12) + receiver],
+        "data": _word(value),
+    }
+
+
+def test_limb_arithmetic():
+    rng = random.Random(7)
+    a = [rng.randrange(2**255) for _ in range(200)] + [2**255 - 1, 0, 2**32, 2**32 - 1]
+    b = [rng.randrange(value + 1) for value in a]
+    assert from_limbs(to_limbs(a)) == a
+    assert from_limbs(add(to_limbs(a), to_limbs(b))) == [x + y for x, y in zip(a, b)]
+    assert from_limbs(subtract(to_limbs(a), to_limbs(b))) == [x - y for x, y in zip(a, b)]
+    assert from_limbs(halve(to_limbs(a))) == [x // 2 for x in a]
+    with pytest.raises(ValueError):
+        subtract(to_limbs([1]), to_limbs([2]))
+    with pytest.raises(OverflowError):
+        add(to_limbs([2**256 - 1]), to_limbs([1]))
+
+
+def test_payouts_match_settlement_rules():
+    rng = random.Random(11)
+    holders = [bytes([index]) * 20 for index in range(1, 6)] + [b"\x07" + bytes(19)]
+    markets = [bytes([0xA0 + index]) * 32 for index in range(3)]
+    engine = PayoutEngine()
+    tokens = {}
+    for index, market_id in enumerate(markets):
+        tokens[market_id] = (bytes([0xB0 + index]) * 20, bytes([0xC0 + index]) * 20)
+        engine.add_market(market_id, *tokens[market_id])
+
+    expected = {}  # (holder, market_id) -> [outcome1 balance, outcome2 balance]
+    transfer_logs, market_logs = [], []
+    collateral = {market_id: 0 for market_id in markets}
+    for _ in range(300):
+        market_id, holder = rng.choice(markets), rng.choice(holders)
+        balances = expected.setdefault((holder, market_id), [0, 0])
+        amount = rng.randrange(1, 10**30)
+        if rng.random() < 0.6 or min(balances) == 0:
+            # create: mint both tokens
+            for side in (0, 1):
+                transfer_logs.append(_transfer(tokens[market_id][side], ZERO, holder, amount))
+                balances[side] += amount
+            market_logs.append({"topics": [TOKENS_CREATED_TOPIC], "data": market_id + bytes(12) + holder + _word(amount)})
+            collateral[market_id] += amount
+        elif rng.random() < 0.5:
+            # redeem: burn both tokens
+            amount = rng.randrange(1, min(balances) + 1)
+            for side in (0, 1):
+                transfer_logs.append(_transfer(tokens[market_id][side], holder, ZERO, amount))
+                balances[side] -= amount
+            market_logs.append({"topics": [TOKENS_REDEEMED_TOPIC], "data": market_id + bytes(12) + holder + _word(amount)})
+            collateral[market_id] -= amount
+        else:
+            # trade one token to another holder
+            side, receiver = rng.randrange(2), rng.choice(holders)
+            amount = rng.randrange(1, balances[side] + 1)
+            transfer_logs.append(_transfer(tokens[market_id][side], holder, receiver, amount))
+            balances[side] -= amount
+            expected.setdefault((receiver, market_id), [0, 0])[side] += amount
+
+    # a transfer of an unknown token is ignored
+    transfer_logs.append(_transfer(b"\xee" * 20, holders[0], holders[1], 5))
+    half = len(transfer_logs) // 2
+    assert engine.add_transfer_logs(transfer_logs[:half]) == half
+    engine.positions()  # fold the first half, the rest is added on top
+    assert engine.add_transfer_logs(transfer_logs[half:]) == len(transfer_logs) - half - 1
+    engine.add_market_logs(market_logs)
+
+    for holder in holders:
+        payouts = engine.holder_payouts(holder)
+        for market_id in markets:
+            b1, b2 = expected.get((holder, market_id), [0, 0])
+            if (holder, market_id) not in expected:
+                assert market_id not in payouts
+                continue
+            assert payouts[market_id] == {"outcome1": b1, "outcome2": b2, "unresolvable": (b1 + b2) // 2}
+    assert engine.holder_payouts(b"\x99" * 20) == {}
+
+    liabilities = engine.liabilities()
+    for market_id in markets:
+        balances = [value for (_, market), value in expected.items() if market == market_id]
+        assert liabilities[market_id] == {
+            "outcome1": sum(b1 for b1, _ in balances),
+            "outcome2": sum(b2 for _, b2 in balances),
+            "unresolvable": sum((b1 + b2) // 2 for b1, b2 in balances),
+            "collateral": collateral[market_id],
+        }
+        # every token pair is backed by one unit of currency
+        assert liabilities[market_id]["outcome1"] == collateral[market_id]
+    assert HexBytes(engine.token_addresses[0]) == tokens[markets[0]][0]
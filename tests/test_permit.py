@@ -0,0 +1,51 @@
+import os
+import sys
+from eth_account import Account
+from eth_account.messages import encode_typed_data
+from hexbytes import HexBytes
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts import constants
+from scripts.permit import domain_separator, permit_message, sign_permit
+
+
+def test_permit_message_domain():
+    owner = Account.create()
+    token = "0x" + "11" * 20
+    message = permit_message(token, 1337, owner.address, "0x" + "22" * 20, constants.amount, 0, 2**32)
+    signable = encode_typed_data(full_message=message)
+    assert signable.header == domain_separator(token, 1337)
+
+    signed = owner.sign_message(signable)
+    assert Account.recover_message(signable, signature=signed.signature) == owner.address
+
+
+def test_market_calls_with_permit(accounts, chain, sandbox):
+    creator = accounts[6]
+    market = sandbox.deploy_prediction_market()
+    currency = sandbox.get_contracts()["currency"]
+    assert HexBytes(currency.DOMAIN_SEPARATOR()) == domain_separator(currency.address, chain.chain_id)
+
+    # No approve transaction: each pull is authorized by a permit submitted in the same call.
+    currency.allocateTo(creator, constants.reward + constants.amount + constants.required_bond, sender=creator)
+    permit = sign_permit(creator, currency, market.address, constants.reward)
+    receipt = market.initialize_market_with_permit(
+        constants.outcome_one,
+        constants.outcome_two,
+        "Chelsea Won the 2025 FA Cup.",
+        constants.reward,
+        constants.required_bond,
+        *permit,
+        sender=creator
+    )
+    market_id = next(iter(market.MarketInitialized.from_receipt(receipt))).market_id
+
+    permit = sign_permit(creator, currency, market.address, constants.amount)
+    market.create_outcome_tokens_with_permit(market_id, constants.amount, *permit, sender=creator)
+    assert currency.balanceOf(market) == constants.reward + constants.amount
+
+    # A permit submitted by someone else first still leaves the allowance the call spends.
+    permit = sign_permit(creator, currency, market.address, constants.required_bond)
+    currency.permit(creator, market.address, constants.required_bond, *permit, sender=accounts[7])
+    market.assert_market_with_permit(market_id, constants.outcome_one, *permit, sender=creator)
+    assert currency.balanceOf(creator) == 0
+    assert currency.allowance(creator, market) == 0
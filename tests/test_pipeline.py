@@ -0,0 +1,85 @@
+import os
+import sys
+import pytest
+from types import SimpleNamespace
+from eth_utils import to_checksum_address, to_hex
+from hexbytes import HexBytes
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts import constants
+from scripts.pipeline import PipelineError, TransactionPipeline
+
+
+def test_pipeline_market_flow(accounts, chain, sandbox):
+    creator, holder = accounts[6], accounts[7]
+    market = sandbox.deploy_prediction_market()
+    currency = sandbox.get_contracts()["currency"]
+    nonce = holder.nonce
+    balance = currency.balanceOf(holder)
+
+    pipeline = TransactionPipeline(chain.provider.web3, poll_interval=0.01)
+    pipeline.add_call("allocate_reward", currency.allocateTo, creator, constants.reward, sender=creator)
+    pipeline.add_call("approve_reward", currency.approve, market, constants.reward, sender=creator)
+    pipeline.add_call(
+        "init",
+        market.initialize_market,
+        constants.outcome_one,
+        constants.outcome_two,
+        "Pipeline market",
+        constants.reward,
+        constants.required_bond,
+        sender=creator,
+        depends_on=["allocate_reward", "approve_reward"],
+    )
+    # the holder's steps are independent of the creator's until the market exists
+    pipeline.add_call("allocate", currency.allocateTo, holder, constants.amount, sender=holder)
+    pipeline.add_call("approve", currency.approve, market, constants.amount, sender=holder)
+    receipts = pipeline.run()
+
+    assert all(receipt["status"] == 1 for receipt in receipts.values())
+    assert holder.nonce == nonce + 2
+    receipt = chain.get_receipt(to_hex(receipts["init"]["transactionHash"]))
+    market_id = HexBytes(next(iter(market.MarketInitialized.from_receipt(receipt))).market_id)
+
+    pipeline = TransactionPipeline(chain.provider.web3, poll_interval=0.01)
+    pipeline.add_call("create", market.create_outcome_tokens, market_id, constants.amount, sender=holder)
+    pipeline.add_call(
+        "redeem", market.redeem_outcome_tokens, market_id, constants.redeem_amount, sender=holder, depends_on=["create"]
+    )
+    pipeline.run()
+    assert currency.balanceOf(holder) == balance + constants.redeem_amount
+
+def test_pipeline_failed_dependency(accounts, chain, sandbox):
+    holder = accounts[7]
+    market = sandbox.deploy_prediction_market()
+    unknown_id = HexBytes(b"\x02" * 32)
+
+    pipeline = TransactionPipeline(chain.provider.web3, poll_interval=0.01)
+    pipeline.add_call("create", market.create_outcome_tokens, unknown_id, 1, sender=holder)
+    pipeline.add_call("redeem", market.redeem_outcome_tokens, unknown_id, 1, sender=holder, depends_on=["create"])
+    with pytest.raises(PipelineError) as err:
+        pipeline.run()
+    assert err.value.step == "create"
+
+    with pytest.raises(ValueError):
+        pipeline.add_call("settle", market.settle_outcome_tokens, unknown_id, sender=holder, depends_on=["missing"])
+
+
+def test_pipeline_receipt_polling_error():
+    def get_transaction_receipt(txn_hash):
+        raise ConnectionError("node went away")
+
+    web3 = SimpleNamespace(
+        provider=None,
+        to_checksum_address=to_checksum_address,
+        eth=SimpleNamespace(
+            get_transaction_count=lambda address, block: 0,
+            send_raw_transaction=lambda raw: b"\x01" * 32,
+            get_transaction_receipt=get_transaction_receipt,
+        ),
+    )
+    pipeline = TransactionPipeline(web3, poll_interval=0.001, timeout=None, poll_retries=3)
+    pipeline.add("send", "0x" + "11" * 20, lambda nonce: b"")
+
+    # The polling error reaches the step instead of leaving it waiting for a receipt forever.
+    with pytest.raises(PipelineError, match="node went away"):
+        pipeline.run()
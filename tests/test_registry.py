@@ -0,0 +1,58 @@
+import os
+import sys
+import json
+import pytest
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts.registry import DeploymentRegistry
+
+
+@pytest.fixture
+def deployments(tmp_path):
+    path = tmp_path / "deployments.json"
+    path.write_text(json.dumps({"finder_address": "0x01"}))
+    return str(path)
+
+def _read(path):
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+def test_registry_batches_writes(deployments):
+    registry = DeploymentRegistry(deployments)
+    assert registry.get("finder_address") == "0x01"
+
+    registry.set("market_address", "0x02")
+    assert registry.get("market_address") == "0x02"
+    assert "market_address" not in _read(deployments)
+
+    registry.flush()
+    assert _read(deployments) == {"finder_address": "0x01", "market_address": "0x02"}
+    assert not registry.dirty
+
+def test_registry_transaction_rollback(deployments):
+    registry = DeploymentRegistry(deployments)
+    with pytest.raises(RuntimeError):
+        with registry.transaction():
+            registry.set("market_address", "0x02")
+            raise RuntimeError("deployment failed")
+
+    assert "market_address" not in registry
+    assert _read(deployments) == {"finder_address": "0x01"}
+
+def test_registry_namespaces(deployments):
+    sandbox = DeploymentRegistry(deployments, namespace=31337)
+    fork = DeploymentRegistry(deployments, namespace="sepolia-fork")
+    sandbox.load()
+    fork.load()
+
+    with sandbox.transaction():
+        sandbox.set("market_address", "0x0a")
+    with fork.transaction():
+        fork.set("market_address", "0x0b")
+
+    data = _read(deployments)
+    assert data["31337"] == {"market_address": "0x0a"}
+    assert data["sepolia-fork"] == {"market_address": "0x0b"}
+    assert data["finder_address"] == "0x01"
+    with pytest.raises(KeyError):
+        sandbox.get("finder_address")
@@ -0,0 +1,103 @@
+import os
+import sys
+from hexbytes import HexBytes
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts import constants
+from scripts.scheduler import SettlementScheduler
+
+MARKET = "0x" + "aa" * 20
+OOV3 = "0x" + "bb" * 20
+
+
+def test_scheduler_queue_order():
+    scheduler = SettlementScheduler(None, MARKET, OOV3, submit=None)
+    ids = [bytes([index]) * 32 for index in range(1, 5)]
+    scheduler.schedule(ids[0], b"\x10" * 32, 300)
+    scheduler.schedule(ids[1], b"\x11" * 32, 100)
+    scheduler.schedule(ids[2], b"\x12" * 32, 200)
+    scheduler.schedule(ids[3], b"\x13" * 32, 150)
+    scheduler.schedule(ids[0], b"\x10" * 32, 50)  # rescheduled earlier
+    scheduler.cancel(ids[3])
+    scheduler.cancel_market(b"\x12" * 32)
+
+    assert len(scheduler) == 2 and ids[2] not in scheduler
+    assert scheduler.next_deadline() == 50
+    assert scheduler.due(100) == 2 and scheduler.due(99) == 1
+    assert scheduler.pop_due(99) == [ids[0]]
+    assert scheduler.pop_due(1000) == [ids[1]]
+    assert scheduler.pop_due(1000) == [] and scheduler.next_deadline() is None
+
+
+def test_scheduler_retries_failed_submit():
+    submitted = []
+
+    def submit(calls):
+        submitted.append(calls)
+        if len(submitted) == 1:
+            raise ValueError("nonce too low")
+
+    scheduler = SettlementScheduler(None, MARKET, OOV3, submit=submit, batch_size=2, retry_delay=60)
+    scheduler._now = lambda: 1000
+    scheduler._can_settle = lambda assertion_ids: True
+    ids = [bytes([index]) * 32 for index in range(1, 5)]
+    for index, assertion_id in enumerate(ids):
+        scheduler.schedule(assertion_id, bytes([0x10 + index]) * 32, 100 + index)
+
+    # The first batch fails and is queued again; the second one is still submitted.
+    assert scheduler.settle_due(1000) == ids[2:]
+    assert len(submitted) == 2 and (scheduler.failed, scheduler.settled) == (2, 2)
+    assert len(scheduler) == 2 and scheduler.next_deadline() == 1060
+    assert scheduler.settle_due(1059) == []
+    assert scheduler.settle_due(1060) == ids[:2] and len(scheduler) == 0
+
+
+def test_scheduler_settles_matured_assertions(accounts, chain, sandbox):
+    holder = accounts[9]
+    market = sandbox.deploy_prediction_market()
+    currency = sandbox.get_contracts()["currency"]
+    oov3 = sandbox.get_contracts()["optimistic_oracle_v3"]
+    count = 5
+    specs = [{
+        "outcome1": constants.outcome_one,
+        "outcome2": constants.outcome_two,
+        "description": f"Scheduled market {index}",
+        "reward": constants.reward,
+        "required_bond": constants.required_bond,
+    } for index in range(count)]
+    total = count * (constants.reward + constants.required_bond)
+    currency.allocateTo(holder, total, sender=holder)
+    currency.approve(market.address, total, sender=holder)
+
+    scheduler = SettlementScheduler(
+        chain.provider.web3,
+        market.address,
+        oov3.address,
+        lambda calls: oov3.multicall(calls, sender=holder),
+        sender=holder.address,
+        start_block=chain.blocks.head.number + 1,
+        batch_size=2,
+    )
+    receipt = market.initialize_markets(specs, sender=holder)
+    market_ids = [HexBytes(log.market_id) for log in market.MarketInitialized.from_receipt(receipt)]
+    assertion_ids = [HexBytes(market.assert_market(market_id, constants.outcome_one, sender=holder).return_value) for market_id in market_ids]
+
+    scheduler.sync()
+    assert len(scheduler) == count
+    assert scheduler.settle_due() == []  # liveness not over yet
+    assert scheduler.stats()["due"] == 0
+
+    chain.pending_timestamp += constants.assertion_liveness
+    chain.mine()
+    # settled by someone else after the scheduler saw it: its batch is split and it is retried later
+    oov3.settleAssertion(assertion_ids[1], sender=holder)
+    settled = scheduler.settle_due()
+    assert sorted(settled) == sorted(bytes(assertion_id) for index, assertion_id in enumerate(assertion_ids) if index != 1)
+    assert all(market.markets(market_id).resolved for market_id in market_ids)
+    stats = scheduler.stats()
+    assert (stats["settled"], stats["failed"], stats["queue_depth"]) == (count - 1, 1, 1)
+    assert stats["batches"] == 3 and stats["lag_max"] >= 0
+
+    # the MarketResolved event of the assertion settled elsewhere takes it out of the queue
+    scheduler.sync()
+    assert len(scheduler) == 0
+    assert "assertion_settlement_settled_total 4" in scheduler.prometheus_text()
@@ -0,0 +1,138 @@
+import os
+import sys
+import random
+import numpy as np
+from ape import project
+from hexbytes import HexBytes
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../")))
+from scripts import constants
+from scripts.market_state import MarketStateCache
+from scripts.payouts import TRANSFER_TOPIC, PayoutEngine, from_limbs
+from scripts.snapshot import (
+    ASSERTED_NONE,
+    ASSERTED_OUTCOME2,
+    Snapshot,
+    export,
+    market_columns,
+    position_columns,
+    write_snapshot,
+)
+
+ZERO = bytes(20)
+MARKET_ADDRESS = "0x" + "00" * 19 + "01"
+
+
+def _transfer(token, sender, receiver, value):
+    return {
+        "address": token,
+        "topics": [TRANSFER_TOPIC, bytes(12) + sender, bytes(12) + receiver],
+        "data": value.to_bytes(32, "big"),
+    }
+
+
+def _tables(state, engine):
+    accounts, positions = position_columns(engine.positions())
+    return {"markets": market_columns(state, list(state.market_ids())), "accounts": accounts, "positions": positions}
+
+
+def test_snapshot_append_and_update(tmp_path):
+    rng = random.Random(3)
+    holders = [bytes([index]) * 20 for index in range(1, 5)]
+    state = MarketStateCache(None, MARKET_ADDRESS)
+    tokens = {}
+    for index in range(3):
+        market_id = bytes([0xA0 + index]) * 32
+        tokens[market_id] = (bytes([0xB0 + index]) * 20, bytes([0xC0 + index]) * 20)
+        state.apply("MarketInitialized", {
+            "market_id": market_id, "outcome1": constants.outcome_one, "outcome2": constants.outcome_two,
+            "description": f"Market {index}", "outcome1_token": tokens[market_id][0],
+            "outcome2_token": tokens[market_id][1], "reward": 10**30 + index, "required_bond": constants.required_bond,
+        })
+    market_ids = list(state.market_ids())
+
+    logs = []
+    for _ in range(200):
+        market_id, holder = rng.choice(market_ids[:2]), rng.choice(holders[:3])
+        logs.append(_transfer(tokens[market_id][rng.randrange(2)], ZERO, holder, rng.randrange(1, 10**30)))
+    first = PayoutEngine()
+    for market_id in market_ids:
+        first.add_market(market_id, *tokens[market_id])
+    first.add_transfer_logs(logs)
+    write_snapshot(str(tmp_path), 10, MARKET_ADDRESS, _tables(state, first))
+
+    snapshot = Snapshot(str(tmp_path))
+    assert snapshot.block == 10 and snapshot.market_ids() == market_ids
+    assert from_limbs(snapshot.limbs("markets", "reward")) == [10**30, 10**30 + 1, 10**30 + 2]
+    assert isinstance(snapshot.column("positions", "outcome1_balance"), np.memmap)
+    rows = snapshot.rows("positions")
+
+    # Later blocks: a market resolves, existing holders trade, a new holder enters the third market.
+    state.apply("MarketAsserted", {
+        "market_id": market_ids[0], "asserted_outcome": constants.outcome_two,
+        "assertion_id": b"\xaa" * 32, "asserter": "0x" + "33" * 20,
+    })
+    state.apply("MarketResolved", {"market_id": market_ids[0]})
+    more = [_transfer(tokens[market_ids[2]][0], ZERO, holders[3], 7)]
+    positions = first.positions()
+    for index in range(len(positions.market_index)):
+        market_id = market_ids[positions.market_index[index]]
+        holder = positions.accounts[positions.account_index[index]]
+        balance = from_limbs(positions.outcome1[:, index:index + 1])[0]
+        if balance:
+            more.append(_transfer(tokens[market_id][0], holder, holders[3], balance // 2))
+
+    restored = PayoutEngine()
+    for market_id in market_ids:
+        restored.add_market(market_id, *tokens[market_id])
+    restored.restore_positions(
+        snapshot.accounts(),
+        snapshot.column("positions", "account_index"),
+        snapshot.column("positions", "market_index"),
+        snapshot.limbs("positions", "outcome1_balance"),
+        snapshot.limbs("positions", "outcome2_balance"),
+    )
+    restored.add_transfer_logs(more)
+    write_snapshot(str(tmp_path), 20, MARKET_ADDRESS, _tables(state, restored))
+
+    # The same as replaying every log from the start, with the earlier rows kept in place.
+    replayed = PayoutEngine()
+    for market_id in market_ids:
+        replayed.add_market(market_id, *tokens[market_id])
+    replayed.add_transfer_logs(logs + more)
+    expected = _tables(state, replayed)
+    snapshot = Snapshot(str(tmp_path))
+    assert snapshot.block == 20 and snapshot.rows("positions") > rows
+    for table, columns in expected.items():
+        for name, values in columns.items():
+            assert np.array_equal(snapshot.column(table, name), values), (table, name)
+    assert list(snapshot.column("markets", "asserted_outcome")) == [ASSERTED_OUTCOME2, ASSERTED_NONE, ASSERTED_NONE]
+    assert list(snapshot.column("markets", "resolved")) == [True, False, False]
+
+
+def test_snapshot_export(accounts, chain, sandbox, tmp_path):
+    wallet, holder = accounts[8], accounts[9]
+    market = sandbox.deploy_prediction_market()
+    currency = sandbox.get_contracts()["currency"]
+    abi = [item.model_dump(mode="json", by_alias=True) for item in project.PredictionMarket.contract_type.abi]
+    start_block = chain.blocks.head.number + 1
+
+    currency.allocateTo(wallet, constants.reward + constants.amount, sender=wallet)
+    currency.approve(market.address, constants.reward + constants.amount, sender=wallet)
+    receipt = market.initialize_market(
+        constants.outcome_one, constants.outcome_two, "Everton Won the 2025 FA Cup.", constants.reward,
+        constants.required_bond, sender=wallet,
+    )
+    market_id = HexBytes(next(iter(market.MarketInitialized.from_receipt(receipt))).market_id)
+    market.create_outcome_tokens(market_id, constants.amount, sender=wallet)
+    snapshot = export(chain.provider.web3, market.address, str(tmp_path), start_block=start_block, abi=abi)
+    assert snapshot.market_ids() == [bytes(market_id)]
+    assert from_limbs(snapshot.limbs("positions", "outcome1_balance")) == [constants.amount]
+
+    token = project.ExpandedERC20.at(market.markets(market_id).outcome1_token, fetch_from_explorer=False)
+    token.transfer(holder, constants.transfer_amount, sender=wallet)
+    snapshot = export(chain.provider.web3, market.address, str(tmp_path), abi=abi)
+    assert snapshot.block == chain.blocks.head.number
+    assert [HexBytes(account) for account in snapshot.accounts()] == [HexBytes(wallet.address), HexBytes(holder.address)]
+    assert from_limbs(snapshot.limbs("positions", "outcome1_balance")) == [
+        constants.amount - constants.transfer_amount, constants.transfer_amount,
+    ]